@@ -0,0 +1,22 @@
+"""Batch tooling: multi-process pipelines that generate and solve puzzles at scale."""
+from .corpus import CorpusWriter, generate_corpus, read_corpus
+from .feasibility import BatchFeasibility, triage_corpus
+from .puzzles import PuzzleRating, count_solutions, generate_rated_puzzles, rate_puzzle
+from .results import ResultStore, ResultWriter, SolveResult
+from .runner import solve_corpus
+
+__all__ = [
+    "BatchFeasibility",
+    "CorpusWriter",
+    "PuzzleRating",
+    "count_solutions",
+    "generate_corpus",
+    "generate_rated_puzzles",
+    "rate_puzzle",
+    "read_corpus",
+    "ResultStore",
+    "ResultWriter",
+    "SolveResult",
+    "solve_corpus",
+    "triage_corpus",
+]
@@ -0,0 +1,188 @@
+"""Parallel, streaming generator of starting-layout corpora."""
+from __future__ import annotations
+
+import argparse
+import collections
+import hashlib
+import json
+import multiprocessing
+import random
+import struct
+import sys
+import time
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from game_logic import PIECE_CODES, PIECE_COLOR
+from game_logic.board import Board
+
+MAGIC = b"IQLC"
+FORMAT_VERSION = 1
+# Binary corpus: a header (MAGIC, FORMAT_VERSION, record size), then records.
+HEADER = struct.Struct("<4sHH")
+# 55 cells packed two per byte (one pad nibble), then a bitmask of available piece codes.
+RECORD = struct.Struct("<28sH")
+_CODE_COLOR: Dict[int, PIECE_COLOR] = {code: color for color, code in PIECE_CODES.items() if code}
+
+
+def encode_layout(key: str) -> bytes:
+    """Pack a ``Board.canonical_key`` into a fixed 30-byte record."""
+    cells_hex, _, pieces_hex = key.partition(":")
+    mask = 0
+    for digit in pieces_hex:
+        mask |= 1 << int(digit, 16)
+    return RECORD.pack(bytes.fromhex(cells_hex + "0"), mask)
+
+
+def decode_layout(record: bytes) -> str:
+    """Inverse of ``encode_layout``."""
+    cells, mask = RECORD.unpack(record)
+    pieces = "".join(format(code, "x") for code in sorted(_CODE_COLOR) if mask >> code & 1)
+    return f"{cells.hex()[:-1]}:{pieces}"
+
+
+def read_corpus(path: str) -> Iterator[str]:
+    """Yield the canonical keys stored in a JSONL or binary corpus file."""
+    with open(path, "rb") as handle:
+        head = handle.read(HEADER.size)
+        if head[:4] == MAGIC:
+            _, version, size = HEADER.unpack(head)
+            if version != FORMAT_VERSION or size != RECORD.size:
+                raise ValueError(f"unsupported corpus format {version} (record size {size})")
+            while record := handle.read(size):
+                yield decode_layout(record)
+            return
+        handle.seek(0)
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)["board"]
+
+
+def _layout_worker(task: Tuple[int, int, int]) -> Tuple[List[str], int]:
+    """Run ``attempts`` layout attempts from the seed of chunk ``index``.
+
+    Returns the keys of the valid layouts, in order, and the number rejected.
+    """
+    seed, index, attempts = task
+    rng = random.Random(f"{seed}:{index}")
+    board = Board(generate=False)
+    keys: List[str] = []
+    rejected = 0
+    for _ in range(attempts):
+        if board.try_random_layout(rng):
+            keys.append(board.canonical_key())
+        else:
+            rejected += 1
+    return keys, rejected
+
+
+class CorpusWriter:
+    """Write canonical keys to a corpus file that ``read_corpus`` can read back.
+
+    ``fmt`` is ``"jsonl"`` (one ``{"board": key}`` object per line) or
+    ``"binary"`` (``HEADER`` then one ``RECORD`` per key).
+    """
+
+    def __init__(self, path: str, fmt: str):
+        if fmt not in ("jsonl", "binary"):
+            raise ValueError(f"unknown corpus format {fmt!r}")
+        self.binary = fmt == "binary"
+        self.handle = open(path, "wb")
+        if self.binary:
+            self.handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size))
+
+    def write(self, key: str) -> None:
+        if self.binary:
+            self.handle.write(encode_layout(key))
+        else:
+            self.handle.write(json.dumps({"board": key}).encode() + b"\n")
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+def generate_corpus(
+    count: int,
+    out_path: str,
+    workers: int | None = None,
+    seed: int = 0,
+    fmt: str = "jsonl",
+    chunk: int = 1000,
+    max_attempts: int | None = None,
+) -> Dict[str, float]:
+    """Write ``count`` distinct valid starting layouts to ``out_path``.
+
+    Chunks of ``chunk`` attempts run on a process pool, each with its own
+    seed derived from ``seed`` and the chunk index. Results are consumed in
+    chunk order, so the file depends only on ``seed`` and ``chunk``, never on
+    ``workers``. At most a few chunks per worker are in flight, and layouts
+    are written as they arrive. The only state that grows with the corpus is
+    the set of 8-byte digests of the ``encode_layout`` records used to drop
+    duplicates: about 70 bytes per layout in CPython, so roughly 70 MB for a
+    million. Two distinct layouts share a digest with probability about
+    ``count**2 / 2**65`` (3e-8 for a million); such a layout would be
+    counted as a duplicate and skipped.
+
+    Gives up after ``max_attempts`` attempts (default ``100 * count``), so
+    ``written`` can fall short of ``count`` when the layouts run out.
+    """
+    if max_attempts is None:
+        max_attempts = 100 * count
+    workers = workers or multiprocessing.cpu_count()
+    seen: set[int] = set()
+    written = rejected = duplicates = attempts = 0
+    start = time.perf_counter()
+    writer = CorpusWriter(out_path, fmt)
+    pending: collections.deque = collections.deque()
+    next_index = 0
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            while written < count and attempts < max_attempts:
+                while len(pending) < workers * 4:
+                    pending.append(pool.apply_async(_layout_worker, ((seed, next_index, chunk),)))
+                    next_index += 1
+                keys, chunk_rejected = pending.popleft().get()
+                attempts += chunk
+                rejected += chunk_rejected
+                for key in keys:
+                    digest = int.from_bytes(hashlib.blake2b(encode_layout(key), digest_size=8).digest(), "little")
+                    if digest in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(digest)
+                    writer.write(key)
+                    written += 1
+                    if written >= count:
+                        break
+            pool.terminate()
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    return {
+        "written": written,
+        "attempts": attempts,
+        "rejected": rejected,
+        "duplicates": duplicates,
+        "rejected_rate": round(rejected / attempts, 4) if attempts else 0.0,
+        "duplicate_rate": round(duplicates / (attempts - rejected), 4) if attempts > rejected else 0.0,
+        "seconds": round(elapsed, 3),
+        "per_second": round(written / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a corpus of distinct valid starting layouts.")
+    parser.add_argument("--count", type=int, required=True)
+    parser.add_argument("--output", required=True, help="corpus file to write")
+    parser.add_argument("--format", choices=("jsonl", "binary"), default="jsonl")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=1000, help="layout attempts per worker task")
+    args = parser.parse_args(argv)
+    stats = generate_corpus(args.count, args.output, workers=args.workers, seed=args.seed,
+                            fmt=args.format, chunk=args.chunk)
+    print(json.dumps(stats), file=sys.stderr)
+    return 0 if stats["written"] >= args.count else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,220 @@
+"""Vectorised feasibility of many boards at once, for corpus triage.
+
+Every board shares one placement universe (``solver.tables``), so a stack
+of boards can be tested against all placements in a single matrix product:
+a placement is legal on a board when it overlaps none of its occupied
+cells and its piece is still available. From the legal-placement matrix
+follow each board's per-piece placement counts, how many legal placements
+cover each empty cell, the cells only one placement can fill (forced) and
+the cells none can (dead).
+
+NumPy is optional for the rest of the application; this module raises
+ImportError on use when it is missing.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterable, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+from batch.corpus import FORMAT_VERSION, HEADER, MAGIC, RECORD, CorpusWriter, read_corpus
+from game_logic import NB_COLS, NB_ROWS
+from game_logic.board import Board
+from solver.tables import PlacementTables, cell_bit, get_tables
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("batch feasibility needs numpy (pip install numpy)")
+
+
+@dataclass
+class FeasibilityReport:
+    """Per-board results of ``BatchFeasibility.evaluate``; row ``i`` is board ``i``.
+
+    Cell columns follow ``solver.tables.cell_bit`` order and piece columns
+    ``PlacementTables.colors``.
+    """
+
+    free: "np.ndarray"  # (boards, cells) empty cells
+    legal_counts: "np.ndarray"  # (boards, pieces) legal placements of each available piece
+    cover: "np.ndarray"  # (boards, cells) legal placements covering each empty cell
+    forced_cells: "np.ndarray"  # (boards, cells) empty cells exactly one placement covers
+    dead_cells: "np.ndarray"  # (boards, cells) empty cells no placement covers
+    stuck_pieces: "np.ndarray"  # (boards, pieces) available pieces without a legal placement
+    area_mismatch: "np.ndarray"  # (boards,) empty cells != area of the available pieces
+
+    @property
+    def dead(self) -> "np.ndarray":
+        """Boards that certainly have no solution."""
+        return self.area_mismatch | self.dead_cells.any(axis=1) | self.stuck_pieces.any(axis=1)
+
+    @property
+    def forced_counts(self) -> "np.ndarray":
+        return self.forced_cells.sum(axis=1)
+
+    @property
+    def min_branching(self) -> "np.ndarray":
+        """Fewest placements covering any empty cell (0 when dead, -1 when full).
+
+        This is the branching factor of the first exact-cover step, a cheap
+        proxy for how constrained, and so how easy, a board is.
+        """
+        masked = np.where(self.free, self.cover, np.iinfo(self.cover.dtype).max)
+        result = masked.min(axis=1)
+        result[~self.free.any(axis=1)] = -1
+        return result
+
+
+class BatchFeasibility:
+    """Placement-matrix evaluator for stacks of boards.
+
+    Built once from the placement tables: ``placements`` is the
+    (placements, cells) 0/1 matrix and ``piece_matrix`` the (placements,
+    pieces) one-hot piece of each placement. Matrices are float32 so the
+    products go through BLAS; every value is a small integer and exact.
+    """
+
+    def __init__(self, tables: PlacementTables | None = None, chunk: int = 4096):
+        _require_numpy()
+        self.tables = tables or get_tables()
+        tables = self.tables
+        self.chunk = chunk
+        self.cell_count = NB_ROWS * NB_COLS
+        self.placements = np.zeros((len(tables.masks), self.cell_count), dtype=np.float32)
+        for pid, mask in enumerate(tables.masks):
+            bit = 0
+            while mask:
+                if mask & 1:
+                    self.placements[pid, bit] = 1.0
+                mask >>= 1
+                bit += 1
+        self.piece_of = np.frombuffer(tables.piece_of, dtype=np.uint8).astype(np.intp)
+        self.piece_matrix = np.zeros((len(tables.masks), len(tables.colors)), dtype=np.float32)
+        self.piece_matrix[np.arange(len(tables.masks)), self.piece_of] = 1.0
+        self.piece_sizes = np.asarray(tables.sizes, dtype=np.int32)
+        # Row-major board index of each cell_bit column.
+        self.cell_order = np.empty(self.cell_count, dtype=np.intp)
+        for row in range(NB_ROWS):
+            for col in range(NB_COLS):
+                self.cell_order[cell_bit(row, col)] = row * NB_COLS + col
+        self.code_order = np.asarray(tables.codes, dtype=np.intp)
+
+    # --- Building the board stack ---
+    def from_keys(self, keys: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """(occupied, available) boolean matrices for ``Board.canonical_key`` strings."""
+        cells = np.frombuffer("".join(key[: self.cell_count] for key in keys).encode("ascii"), dtype=np.uint8)
+        occupied = (cells.reshape(len(keys), self.cell_count) != ord("0"))[:, self.cell_order]
+        masks = np.zeros(len(keys), dtype=np.int64)
+        for index, key in enumerate(keys):
+            for digit in key[self.cell_count + 1:]:
+                masks[index] |= 1 << int(digit, 16)
+        return occupied, self._available(masks)
+
+    def from_boards(self, boards: Iterable[Board]) -> Tuple["np.ndarray", "np.ndarray"]:
+        return self.from_keys([board.canonical_key() for board in boards])
+
+    def from_binary_corpus(self, path: str) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Decode a whole binary corpus file without a Python loop per record."""
+        with open(path, "rb") as handle:
+            magic, version, size = HEADER.unpack(handle.read(HEADER.size))
+            if magic != MAGIC or version != FORMAT_VERSION or size != RECORD.size:
+                raise ValueError(f"{path} is not a binary corpus")
+            data = np.frombuffer(handle.read(), dtype=np.uint8)
+        records = data[: len(data) // size * size].reshape(-1, size)
+        packed = records[:, :28]
+        nibbles = np.empty((len(records), 56), dtype=np.uint8)
+        nibbles[:, 0::2] = packed >> 4
+        nibbles[:, 1::2] = packed & 0xF
+        occupied = (nibbles[:, : self.cell_count] != 0)[:, self.cell_order]
+        masks = records[:, 28].astype(np.int64) | records[:, 29].astype(np.int64) << 8
+        return occupied, self._available(masks)
+
+    def _available(self, masks: "np.ndarray") -> "np.ndarray":
+        return (masks[:, None] >> self.code_order[None, :]) & 1 == 1
+
+    # --- Evaluation ---
+    def evaluate(self, occupied: "np.ndarray", available: "np.ndarray") -> FeasibilityReport:
+        """Feasibility of each board in the stack, ``self.chunk`` boards per matrix product."""
+        count = len(occupied)
+        pieces = len(self.tables.colors)
+        legal_counts = np.zeros((count, pieces), dtype=np.int32)
+        cover = np.zeros((count, self.cell_count), dtype=np.int32)
+        for start in range(0, count, self.chunk):
+            stop = min(start + self.chunk, count)
+            occ = occupied[start:stop].astype(np.float32)
+            legal = (occ @ self.placements.T == 0) & available[start:stop][:, self.piece_of]
+            legal = legal.astype(np.float32)
+            legal_counts[start:stop] = legal @ self.piece_matrix
+            cover[start:stop] = legal @ self.placements
+        free = ~occupied
+        area = (available * self.piece_sizes).sum(axis=1)
+        return FeasibilityReport(
+            free=free,
+            legal_counts=legal_counts,
+            cover=cover,
+            forced_cells=free & (cover == 1),
+            dead_cells=free & (cover == 0),
+            stuck_pieces=available & (legal_counts == 0),
+            area_mismatch=free.sum(axis=1) != area,
+        )
+
+
+def triage_corpus(path: str, alive_path: str | None = None, fmt: str = "jsonl") -> dict:
+    """Evaluate every layout of a corpus; optionally write the ones not proven dead.
+
+    Binary corpora are decoded straight into the board matrix; JSONL ones go
+    through ``read_corpus``.
+    """
+    evaluator = BatchFeasibility()
+    start = time.perf_counter()
+    with open(path, "rb") as handle:
+        binary = handle.read(4) == MAGIC
+    keys = None
+    if binary and alive_path is None:
+        occupied, available = evaluator.from_binary_corpus(path)
+    else:
+        keys = list(read_corpus(path))
+        occupied, available = evaluator.from_keys(keys)
+    report = evaluator.evaluate(occupied, available)
+    dead = report.dead
+    if alive_path is not None:
+        writer = CorpusWriter(alive_path, fmt)
+        try:
+            for key, is_dead in zip(keys, dead):
+                if not is_dead:
+                    writer.write(key)
+        finally:
+            writer.close()
+    elapsed = time.perf_counter() - start
+    boards = len(occupied)
+    return {
+        "boards": boards,
+        "dead": int(dead.sum()),
+        "mean_forced_cells": round(float(report.forced_counts.mean()), 3) if boards else 0.0,
+        "mean_min_branching": round(float(report.min_branching.mean()), 3) if boards else 0.0,
+        "seconds": round(elapsed, 3),
+        "per_second": round(boards / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Flag dead layouts in a corpus with one vectorised pass.")
+    parser.add_argument("corpus", help="JSONL or binary corpus file")
+    parser.add_argument("--alive", help="write the layouts not proven dead to this corpus file")
+    parser.add_argument("--format", choices=("jsonl", "binary"), default="jsonl", help="format of --alive")
+    args = parser.parse_args(argv)
+    print(json.dumps(triage_corpus(args.corpus, args.alive, args.format)), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
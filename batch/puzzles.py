@@ -0,0 +1,171 @@
+"""Unique-solution puzzle generation with difficulty ratings."""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+from game_logic import PIECE_COLOR
+from game_logic.board import Board
+from solver.bt_solver import Placement, SolverConfig
+from solver.iterative import Frame, IterativeSolver
+from solver.kernel import KernelSolver
+
+Step = Tuple[PIECE_COLOR, Placement]
+TIERS: Tuple[Tuple[float, str], ...] = ((4.0, "easy"), (7.0, "medium"), (10.0, "hard"))
+
+
+def count_solutions(board: Board, limit: int = 2) -> int:
+    """Count solutions of ``board``, stopping as soon as ``limit`` are found."""
+    return KernelSolver(board).count(limit)
+
+
+@dataclass(frozen=True)
+class PuzzleRating:
+    """Search statistics of a full (uniqueness-proving) search, plus a score.
+
+    ``forced_moves`` counts search levels where exactly one placement
+    survived the consistency checks, ``dead_ends`` levels where none did and
+    ``branching`` is the mean number of surviving placements per level.
+    """
+
+    solutions: int
+    nodes: int
+    nodes_to_first: int
+    forced_moves: int
+    dead_ends: int
+    branching: float
+    score: float
+    tier: str
+
+
+class _RatingSolver(IterativeSolver):
+    def __init__(self, board: Board):
+        # Ratings count forced levels themselves, so the search must not absorb them.
+        super().__init__(board, config=SolverConfig(propagate=False))
+        self.closed_children: List[int] = []
+        self.nodes_to_first = 0
+
+    def _frame_closed(self, frame: Frame) -> None:
+        self.closed_children.append(frame.children)
+
+    def _record_solution(self, on_solution) -> None:
+        if not self.solutions_found:
+            self.nodes_to_first = self.nodes_visited
+        super()._record_solution(on_solution)
+
+
+def rate_puzzle(board: Board) -> PuzzleRating:
+    """Exhaust the search tree of ``board`` and score how hard it was.
+
+    The score grows with the size of the tree (log2 of nodes) and with the
+    share of dead ends, and shrinks with the share of forced moves.
+    """
+    solver = _RatingSolver(board)
+    solver.run(on_solution=lambda _steps: None)
+    levels = solver.closed_children
+    forced = sum(1 for children in levels if children == 1)
+    dead = sum(1 for children in levels if children == 0)
+    branching = sum(levels) / len(levels) if levels else 0.0
+    forced_ratio = forced / len(levels) if levels else 1.0
+    dead_ratio = dead / len(levels) if levels else 0.0
+    score = round(math.log2(1 + solver.nodes_visited) * (1 + dead_ratio) * (1 - 0.5 * forced_ratio), 3)
+    tier = next((name for limit, name in TIERS if score < limit), "expert")
+    return PuzzleRating(
+        solutions=solver.solutions_found,
+        nodes=solver.nodes_visited,
+        nodes_to_first=solver.nodes_to_first,
+        forced_moves=forced,
+        dead_ends=dead,
+        branching=round(branching, 3),
+        score=score,
+        tier=tier,
+    )
+
+
+def uniquify(board: Board, solution: Sequence[Step], rng: random.Random) -> Board:
+    """Pre-place pieces of ``solution`` in random order until it is the only solution."""
+    puzzle = board.copy()
+    order = list(solution)
+    rng.shuffle(order)
+    for color, placement in order:
+        if count_solutions(puzzle, limit=2) == 1:
+            break
+        puzzle.place_piece(color, *placement)
+        puzzle.available.remove(color)
+    puzzle.history.clear()
+    return puzzle
+
+
+def make_unique_puzzle(seed: int, max_attempts: int = 5) -> Dict[str, Any] | None:
+    """Build and rate one unique-solution puzzle from ``seed``; None if every attempt failed."""
+    rng = random.Random(seed)
+    for _ in range(max_attempts):
+        board = Board(generate=False)
+        if not board.generate_puzzle(rng=rng):
+            continue
+        solver = KernelSolver(board)
+        if not solver.solve():
+            continue
+        puzzle = uniquify(board, solver.solution_steps, rng)
+        rating = rate_puzzle(puzzle)
+        if rating.solutions != 1:
+            continue
+        return {
+            "seed": seed,
+            "board": puzzle.canonical_key(),
+            "preplaced": 12 - len(puzzle.available),
+            "rating": asdict(rating),
+        }
+    return None
+
+
+def generate_rated_puzzles(count: int, out_path: str, workers: int | None = None, seed: int = 0) -> Dict[str, float]:
+    """Generate ``count`` rated puzzles across a process pool, appending JSONL to ``out_path``.
+
+    Each record is written and flushed as soon as a worker returns it, so an
+    interrupted run keeps everything produced so far.
+    """
+    written = failed = 0
+    start = time.perf_counter()
+    seeds = range(seed, seed + count * 4)
+    with multiprocessing.Pool(workers) as pool, open(out_path, "a") as out:
+        for record in pool.imap_unordered(make_unique_puzzle, seeds):
+            if record is None:
+                failed += 1
+                continue
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            written += 1
+            if written >= count:
+                pool.terminate()
+                break
+    elapsed = time.perf_counter() - start
+    return {
+        "written": written,
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "per_hour": round(written * 3600 / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate unique-solution puzzles with difficulty ratings.")
+    parser.add_argument("--count", type=int, required=True)
+    parser.add_argument("--output", required=True, help="JSONL file to append puzzles to")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="first seed; seeds are consecutive")
+    args = parser.parse_args(argv)
+    stats = generate_rated_puzzles(args.count, args.output, workers=args.workers, seed=args.seed)
+    print(json.dumps(stats), file=sys.stderr)
+    return 0 if stats["written"] >= args.count else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,407 @@
+"""Memory-mapped columnar store of batch solve results.
+
+A store is a directory of segments, one per writer, so any number of
+processes can append at once without locks. A segment is a directory with
+one raw little-endian file per column of ``COLUMNS``; each result adds one
+fixed-width value to every file. Readers map the files with
+``numpy.memmap`` and parse nothing. A writer killed mid-append can leave
+its columns at unequal lengths, so a segment holds as many rows as its
+shortest column.
+
+``build_index`` sorts every key stored so far into ``index/``, which
+``lookup`` binary-searches. Rows appended later are scanned directly, so
+writers never have to touch the index.
+
+Writing needs only the standard library; reading needs numpy and raises
+ImportError on use when it is missing.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+from batch.corpus import decode_layout, encode_layout
+from game_logic import PIECE_CODES, PIECE_COLOR
+from solver.bt_solver import Placement
+
+Step = Tuple[PIECE_COLOR, Placement]
+
+FORMAT_VERSION = 1
+SEGMENT_PREFIX = "seg-"
+INDEX_DIR = "index"
+MAX_STEPS = 12
+STATUSES = ("solved", "exhausted", "unsolvable", "limit", "cancelled")
+# Engine codes are part of the file format: only ever append to this tuple.
+ENGINE_NAMES = ("backtracking", "iterative", "kernel", "portfolio", "auto")
+OTHER_ENGINE = 255
+# (name, struct format, numpy dtype) of every column, in file order.
+COLUMNS: Tuple[Tuple[str, str, object], ...] = (
+    ("key", "30s", "S30"),  # batch.corpus.encode_layout of the board
+    ("status", "B", "u1"),  # index into STATUSES
+    ("pieces", "B", "u1"),  # pieces left to place on the board
+    ("engine", "B", "u1"),  # index into ENGINE_NAMES
+    ("steps", "B", "u1"),  # steps in the solution
+    ("solution", f"{MAX_STEPS}H", ("<u2", (MAX_STEPS,))),  # packed steps, 0 past the last
+    ("nodes", "Q", "<u8"),
+    ("placements", "Q", "<u8"),
+    ("forced", "I", "<u4"),
+    ("seconds", "f", "<f4"),
+)
+_STRUCTS = {name: struct.Struct("<" + fmt) for name, fmt, _ in COLUMNS}
+_CODE_COLOR: Dict[int, PIECE_COLOR] = {code: color for color, code in PIECE_CODES.items() if code}
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("reading a result store needs numpy (pip install numpy)")
+
+
+def pack_step(color: PIECE_COLOR, placement: Placement) -> int:
+    """Pack a step into 15 bits: piece code, row, column, quarter turns, flips."""
+    row, col, rotation, flip_h, flip_v = placement
+    return (PIECE_CODES[color] | row << 4 | col << 7 | (rotation // 90) << 11
+            | int(flip_h) << 13 | int(flip_v) << 14)
+
+
+def unpack_step(value: int) -> Step:
+    """Inverse of ``pack_step``."""
+    placement = (value >> 4 & 7, value >> 7 & 15, (value >> 11 & 3) * 90, bool(value >> 13 & 1),
+                 bool(value >> 14 & 1))
+    return _CODE_COLOR[value & 15], placement
+
+
+@dataclass(frozen=True)
+class SolveResult:
+    """One board's solve, as stored in a row of the result store."""
+
+    key: str
+    status: str
+    engine: str
+    nodes: int = 0
+    placements: int = 0
+    forced: int = 0
+    seconds: float = 0.0
+    solution: Tuple[Step, ...] = ()
+
+    @property
+    def pieces(self) -> int:
+        return len(self.key.partition(":")[2])
+
+
+class ResultWriter:
+    """Append results to a fresh segment of the store at ``path``.
+
+    Each writer owns its segment, so writers in different processes never
+    share a file. Rows are buffered and written every ``flush_every``
+    results; call ``flush`` (or ``close``) to make them visible.
+    """
+
+    def __init__(self, path: str, flush_every: int = 1024):
+        os.makedirs(path, exist_ok=True)
+        _write_meta(path)
+        self.segment = os.path.join(path, f"{SEGMENT_PREFIX}{time.time_ns():016x}-{os.getpid()}")
+        os.makedirs(self.segment)
+        self.flush_every = flush_every
+        self.rows = 0
+        self._pending = 0
+        self._buffers = {name: bytearray() for name, _, _ in COLUMNS}
+        self._handles = {name: open(os.path.join(self.segment, f"{name}.col"), "ab") for name, _, _ in COLUMNS}
+
+    def append(self, result: SolveResult) -> None:
+        if result.status not in STATUSES:
+            raise ValueError(f"unknown status {result.status!r}; expected one of {', '.join(STATUSES)}")
+        packed = [pack_step(color, placement) for color, placement in result.solution]
+        values = {
+            "key": (encode_layout(result.key),),
+            "status": (STATUSES.index(result.status),),
+            "pieces": (result.pieces,),
+            "engine": (ENGINE_NAMES.index(result.engine) if result.engine in ENGINE_NAMES else OTHER_ENGINE,),
+            "steps": (len(packed),),
+            "solution": packed + [0] * (MAX_STEPS - len(packed)),
+            "nodes": (result.nodes,),
+            "placements": (result.placements,),
+            "forced": (result.forced,),
+            "seconds": (result.seconds,),
+        }
+        for name, buffer in self._buffers.items():
+            buffer += _STRUCTS[name].pack(*values[name])
+        self.rows += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        for name, buffer in self._buffers.items():
+            self._handles[name].write(buffer)
+            self._handles[name].flush()
+            buffer.clear()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        for handle in self._handles.values():
+            handle.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+def _write_meta(path: str) -> None:
+    meta_path = os.path.join(path, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as handle:
+            version = json.load(handle).get("version")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"result store {path} has format {version}, expected {FORMAT_VERSION}")
+        return
+    meta = {"version": FORMAT_VERSION, "columns": [[name, fmt] for name, fmt, _ in COLUMNS],
+            "statuses": list(STATUSES), "engines": list(ENGINE_NAMES)}
+    temp = f"{meta_path}.{os.getpid()}.tmp"
+    with open(temp, "w") as handle:
+        json.dump(meta, handle, indent=2)
+    os.replace(temp, meta_path)
+
+
+def _dtype(name: str):
+    return np.dtype(dict((column, dtype) for column, _, dtype in COLUMNS)[name])
+
+
+class ResultStore:
+    """Read-only view of a result store; ``refresh`` picks up rows appended since.
+
+    ``column`` returns a whole column as a NumPy array (a memory map when
+    the store has a single segment). ``mask`` selects rows by column value,
+    and ``aggregate``/``percentile`` summarise a column over the selection,
+    e.g. ``store.percentile("nodes", 99, pieces=2)``.
+    """
+
+    def __init__(self, path: str):
+        _require_numpy()
+        if not os.path.isdir(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.segments: List[Tuple[str, int]] = []
+        self.refresh()
+
+    def refresh(self) -> None:
+        segments = []
+        for name in sorted(os.listdir(self.path)):
+            if name.startswith(SEGMENT_PREFIX):
+                segments.append((name, self._segment_rows(name)))
+        self.segments = segments
+
+    def _segment_rows(self, segment: str) -> int:
+        rows = None
+        for name, _, _ in COLUMNS:
+            try:
+                size = os.path.getsize(os.path.join(self.path, segment, f"{name}.col"))
+            except OSError:
+                return 0
+            count = size // _dtype(name).itemsize
+            rows = count if rows is None else min(rows, count)
+        return rows or 0
+
+    def __len__(self) -> int:
+        return sum(rows for _, rows in self.segments)
+
+    def segment_column(self, segment: str, name: str, rows: int | None = None) -> "np.ndarray":
+        """Memory map of the first ``rows`` values of one segment's column."""
+        if rows is None:
+            rows = dict(self.segments)[segment]
+        dtype = _dtype(name)
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, segment, f"{name}.col"), dtype=dtype, mode="r", shape=(rows,))
+
+    def column(self, name: str) -> "np.ndarray":
+        parts = [self.segment_column(segment, name, rows) for segment, rows in self.segments if rows]
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=_dtype(name))
+
+    def mask(self, **filters) -> "np.ndarray":
+        """Rows whose columns equal ``filters``; status and engine may be given by name."""
+        selected = np.ones(len(self), dtype=bool)
+        for name, value in filters.items():
+            if name == "status" and isinstance(value, str):
+                value = STATUSES.index(value)
+            elif name == "engine" and isinstance(value, str):
+                value = ENGINE_NAMES.index(value)
+            selected &= self.column(name) == value
+        return selected
+
+    def aggregate(self, column: str = "nodes", by: str | None = "pieces",
+                  percentiles: Sequence[float] = (50, 90, 99), **filters) -> Dict[object, Dict[str, float]]:
+        """Count, mean, max and ``percentiles`` of ``column`` per value of ``by``.
+
+        Rows are first narrowed by ``filters`` as in ``mask``. Groups of
+        status and engine are labelled by name; without ``by`` the single
+        group is labelled ``"all"``.
+        """
+        selected = self.mask(**filters)
+        values = self.column(column)[selected]
+        if by is None:
+            groups = {"all": values}
+        else:
+            keys = self.column(by)[selected]
+            groups = {_label(by, key): values[keys == key] for key in np.unique(keys)}
+        summary: Dict[object, Dict[str, float]] = {}
+        for label, group in groups.items():
+            if not len(group):
+                continue
+            row = {"count": int(len(group)), "mean": float(group.mean()), "max": float(group.max())}
+            for q, value in zip(percentiles, np.percentile(group, percentiles)):
+                row[f"p{q:g}"] = float(value)
+            summary[label] = row
+        return summary
+
+    def percentile(self, column: str, q: float, **filters) -> float:
+        values = self.column(column)[self.mask(**filters)]
+        return float(np.percentile(values, q)) if len(values) else float("nan")
+
+    def result(self, segment: str, row: int) -> SolveResult:
+        values = {name: self.segment_column(segment, name, row + 1)[row] for name, _, _ in COLUMNS}
+        engine = int(values["engine"])
+        steps = int(values["steps"])
+        return SolveResult(
+            key=decode_layout(bytes(values["key"]).ljust(30, b"\0")),
+            status=STATUSES[int(values["status"])],
+            engine=ENGINE_NAMES[engine] if engine < len(ENGINE_NAMES) else "other",
+            nodes=int(values["nodes"]),
+            placements=int(values["placements"]),
+            forced=int(values["forced"]),
+            seconds=float(values["seconds"]),
+            solution=tuple(unpack_step(int(value)) for value in values["solution"][:steps]),
+        )
+
+    def __iter__(self) -> Iterator[SolveResult]:
+        for segment, rows in self.segments:
+            for row in range(rows):
+                yield self.result(segment, row)
+
+    # --- Sorted key index ---
+    def build_index(self) -> int:
+        """Sort every stored key into ``index/``; return the number of rows indexed.
+
+        Equal keys keep their store order, so the last of a run is the
+        newest result for that board.
+        """
+        self.refresh()
+        keys = self.column("key")
+        segment_ids = np.concatenate([np.full(rows, number, dtype="<u2")
+                                      for number, (_, rows) in enumerate(self.segments)] or [np.empty(0, "<u2")])
+        rows = np.concatenate([np.arange(rows, dtype="<u8") for _, rows in self.segments] or [np.empty(0, "<u8")])
+        order = np.argsort(keys, kind="stable")
+        directory = os.path.join(self.path, INDEX_DIR)
+        os.makedirs(directory, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        for name, values in (("keys", keys[order]), ("segment", segment_ids[order]), ("row", rows[order])):
+            values.tofile(os.path.join(directory, f"{name}.bin{suffix}"))
+            os.replace(os.path.join(directory, f"{name}.bin{suffix}"), os.path.join(directory, f"{name}.bin"))
+        manifest = {"version": FORMAT_VERSION, "segments": [[name, count] for name, count in self.segments]}
+        with open(os.path.join(directory, f"manifest.json{suffix}"), "w") as handle:
+            json.dump(manifest, handle)
+        os.replace(os.path.join(directory, f"manifest.json{suffix}"), os.path.join(directory, "manifest.json"))
+        return len(keys)
+
+    def _load_index(self):
+        directory = os.path.join(self.path, INDEX_DIR)
+        try:
+            with open(os.path.join(directory, "manifest.json")) as handle:
+                manifest = json.load(handle)
+        except (OSError, ValueError):
+            return [], None
+        segments = [(name, count) for name, count in manifest["segments"]]
+        total = sum(count for _, count in segments)
+        if not total:
+            return segments, None
+        arrays = {name: np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode="r", shape=(total,))
+                  for name, dtype in (("keys", _dtype("key")), ("segment", "<u2"), ("row", "<u8"))}
+        return segments, arrays
+
+    def lookup(self, key: str) -> SolveResult | None:
+        """Newest result stored for the board ``key``, or None.
+
+        Rows appended since the last ``build_index`` are newer than every
+        indexed row and are scanned first.
+        """
+        self.refresh()
+        needle = np.frombuffer(encode_layout(key), dtype=_dtype("key"))[0]
+        indexed_segments, index = self._load_index()
+        indexed = dict(indexed_segments)
+        for segment, rows in reversed(self.segments):
+            start = indexed.get(segment, 0)
+            if rows <= start:
+                continue
+            hits = np.flatnonzero(self.segment_column(segment, "key", rows)[start:] == needle)
+            if len(hits):
+                return self.result(segment, start + int(hits[-1]))
+        if index is None:
+            return None
+        keys = index["keys"]
+        high = int(np.searchsorted(keys, needle, side="right"))
+        if not high or keys[high - 1] != needle:
+            return None
+        segment = indexed_segments[int(index["segment"][high - 1])][0]
+        return self.result(segment, int(index["row"][high - 1]))
+
+
+def _label(column: str, value) -> object:
+    if column == "status":
+        return STATUSES[int(value)]
+    if column == "engine":
+        return ENGINE_NAMES[int(value)] if int(value) < len(ENGINE_NAMES) else "other"
+    return value.item() if hasattr(value, "item") else value
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Index and query a batch result store.")
+    parser.add_argument("store", help="result store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("index", help="sort every stored key for fast lookup")
+    lookup = commands.add_parser("lookup", help="print the newest result for one board")
+    lookup.add_argument("key", help="board as printed by Board.canonical_key")
+    stats = commands.add_parser("stats", help="summarise a column per group")
+    numeric = [name for name, _, _ in COLUMNS if name not in ("key", "solution")]
+    stats.add_argument("--column", default="nodes", choices=numeric)
+    stats.add_argument("--by", default="pieces", help="column to group by ('none' for a single group)")
+    stats.add_argument("--status", choices=STATUSES, help="only rows with this status")
+    stats.add_argument("--pieces", type=int, help="only boards with this many pieces left")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    store = ResultStore(args.store)
+    if args.command == "index":
+        print(json.dumps({"indexed": store.build_index()}))
+    elif args.command == "lookup":
+        result = store.lookup(args.key)
+        if result is None:
+            print(f"no result for {args.key}", file=sys.stderr)
+            return 1
+        steps = [[color, list(placement)] for color, placement in result.solution]
+        print(json.dumps({**asdict(result), "solution": steps}))
+    else:
+        filters = {name: value for name, value in (("status", args.status), ("pieces", args.pieces)) if value is not None}
+        by = None if args.by == "none" else args.by
+        for group, row in store.aggregate(args.column, by=by, **filters).items():
+            print(json.dumps({"group": group, **row}))
+    print(f"{len(store)} rows, {time.perf_counter() - start:.3f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
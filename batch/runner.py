@@ -0,0 +1,214 @@
+"""Solve every layout of a corpus across a process pool into a result store.
+
+By default layouts stream straight from the corpus to the workers. With
+``schedule="cost"`` (or any ``routes``) every layout is first given a
+``solver.estimate`` search-cost estimate, in parallel. Layouts are then
+solved most expensive first, in chunks of roughly equal predicted cost, so
+no worker is left with a long board at the end. ``routes`` sends each
+board to an engine by predicted node count.
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import json
+import multiprocessing
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from batch.corpus import read_corpus
+from batch.results import STATUSES, ResultStore, ResultWriter, SolveResult
+from game_logic.board import Board
+from solver.engines import ENGINES, create_engine
+from solver.estimate import TreeEstimate, estimate_tree
+from solver.tables import get_tables
+
+SCHEDULES = ("stream", "cost")
+# (most predicted first-solution nodes, engine): the first route a board fits decides its engine.
+Route = Tuple[float, str]
+# (board key, engine, predicted seconds)
+PlannedBoard = Tuple[str, str, float]
+
+
+def solve_key(key: str, engine: str = "auto", node_limit: int | None = None) -> SolveResult:
+    """Solve the board ``key`` once (no cache) and describe how it went."""
+    solver = create_engine(engine, Board.from_canonical_key(key), node_limit=node_limit)
+    start = time.perf_counter()
+    solved = solver.solve()
+    seconds = time.perf_counter() - start
+    stats = solver.stats()
+    if solved:
+        status = "solved"
+    elif stats.unsolvable_reason:
+        status = "unsolvable"
+    elif stats.limit_reached:
+        status = "limit"
+    elif stats.cancelled:
+        status = "cancelled"
+    else:
+        status = "exhausted"
+    return SolveResult(key, status, stats.engine, stats.nodes, stats.placements, stats.forced, seconds,
+                       tuple(solver.solution_steps) if solved else ())
+
+
+# Per-process state of the pool workers: each appends to its own segment.
+_writer: ResultWriter | None = None
+_options: Dict[str, object] = {}
+
+
+def _init_worker(store: str | None, node_limit: int | None, estimate_budget: float) -> None:
+    global _writer
+    get_tables()  # from the on-disk table cache, once per worker
+    _writer = ResultWriter(store) if store is not None else None
+    _options.update(node_limit=node_limit, estimate_budget=estimate_budget)
+
+
+def _solve_chunk(boards: List[Tuple[str, str]]) -> Dict[str, int]:
+    """Solve ``(key, engine)`` pairs into this worker's segment; flushed before returning."""
+    counts: Dict[str, int] = collections.Counter()
+    for key, engine in boards:
+        result = solve_key(key, engine, _options["node_limit"])
+        _writer.append(result)
+        counts[result.status] += 1
+    _writer.flush()
+    return counts
+
+
+def _estimate_chunk(keys: List[str]) -> List[Tuple[str, TreeEstimate]]:
+    budget = _options["estimate_budget"]
+    return [(key, estimate_tree(Board.from_canonical_key(key), time_budget=budget)) for key in keys]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk: List = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def route_engine(estimate: TreeEstimate, routes: Sequence[Route], default: str) -> str:
+    """Engine of the first route (by ascending node bound) covering the board's predicted cost."""
+    for max_nodes, engine in sorted(routes):
+        if estimate.first_solution_nodes <= max_nodes:
+            return engine
+    return default
+
+
+def plan_by_cost(estimates: Iterable[Tuple[str, TreeEstimate]], engine: str = "auto",
+                 routes: Sequence[Route] = ()) -> List[PlannedBoard]:
+    """Boards with their routed engine and predicted seconds, most expensive first."""
+    planned = [(key, route_engine(estimate, routes, engine), estimate.first_solution_seconds)
+               for key, estimate in estimates]
+    planned.sort(key=lambda item: -item[2])
+    return planned
+
+
+def cost_chunks(planned: Sequence[PlannedBoard], shards: int, limit: int) -> Iterator[List[Tuple[str, str]]]:
+    """Split ``planned`` (in order) into chunks of about 1/``shards`` of the predicted cost.
+
+    A chunk holds at most ``limit`` boards, so a long run of near-free
+    boards is still spread over the workers.
+    """
+    target = sum(item[2] for item in planned) / max(1, shards)
+    chunk: List[Tuple[str, str]] = []
+    cost = 0.0
+    for key, engine, seconds in planned:
+        chunk.append((key, engine))
+        cost += seconds
+        if len(chunk) >= limit or cost >= target:
+            yield chunk
+            chunk, cost = [], 0.0
+    if chunk:
+        yield chunk
+
+
+def solve_corpus(
+    corpus_path: str,
+    store_path: str,
+    engine: str = "auto",
+    workers: int | None = None,
+    chunk: int = 256,
+    node_limit: int | None = None,
+    index: bool = True,
+    schedule: str = "stream",
+    routes: Sequence[Route] = (),
+    estimate_budget: float = 0.005,
+) -> Dict[str, float]:
+    """Solve every layout in ``corpus_path`` and append the results to ``store_path``.
+
+    Layouts reach the workers in chunks of at most ``chunk``; every worker
+    process writes its own store segment, so the parent never handles
+    results. With ``index`` the store's key index is rebuilt at the end.
+    ``schedule`` and ``routes`` are described in the module docstring; they
+    read the whole corpus key list into memory first.
+    """
+    if schedule not in SCHEDULES:
+        raise ValueError(f"unknown schedule {schedule!r}; expected one of {', '.join(SCHEDULES)}")
+    for name in [engine] + [route_engine for _, route_engine in routes]:
+        if name not in ENGINES:
+            raise ValueError(f"unknown solver engine {name!r}; known: {sorted(ENGINES)}")
+    workers = workers or multiprocessing.cpu_count()
+    counts: Dict[str, int] = collections.Counter()
+    stats: Dict[str, float] = {}
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(store_path, node_limit, estimate_budget)) as pool:
+        if schedule == "cost" or routes:
+            estimates: List[Tuple[str, TreeEstimate]] = []
+            for part in pool.imap(_estimate_chunk, _chunks(read_corpus(corpus_path), chunk)):
+                estimates.extend(part)
+            planned = plan_by_cost(estimates, engine, routes)
+            stats["estimate_seconds"] = round(time.perf_counter() - start, 3)
+            stats["predicted_seconds"] = round(sum(item[2] for item in planned), 3)
+            tasks = cost_chunks(planned, workers * 4, chunk)
+        else:
+            tasks = _chunks(((key, engine) for key in read_corpus(corpus_path)), chunk)
+        for chunk_counts in pool.imap_unordered(_solve_chunk, tasks):
+            counts.update(chunk_counts)
+    if index:
+        ResultStore(store_path).build_index()
+    elapsed = time.perf_counter() - start
+    boards = sum(counts.values())
+    return {
+        "boards": boards,
+        **{status: counts[status] for status in STATUSES},
+        **stats,
+        "seconds": round(elapsed, 3),
+        "per_second": round(boards / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def _parse_route(text: str) -> Route:
+    nodes, _, engine = text.partition(":")
+    return float(nodes), engine
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Solve every layout of a corpus into a result store.")
+    parser.add_argument("corpus", help="JSONL or binary corpus file")
+    parser.add_argument("store", help="result store directory (created if missing)")
+    parser.add_argument("--engine", default="auto", choices=sorted(ENGINES))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk", type=int, default=256, help="layouts per worker task")
+    parser.add_argument("--node-limit", type=int, default=None)
+    parser.add_argument("--no-index", action="store_true", help="skip rebuilding the key index")
+    parser.add_argument("--schedule", choices=SCHEDULES, default="stream",
+                        help="'cost' solves the layouts predicted slowest first")
+    parser.add_argument("--route", type=_parse_route, action="append", default=[], metavar="NODES:ENGINE",
+                        help="use ENGINE on boards predicted to need at most NODES nodes (repeatable)")
+    parser.add_argument("--estimate-budget", type=float, default=0.005, help="seconds of probing per layout")
+    args = parser.parse_args(argv)
+    stats = solve_corpus(args.corpus, args.store, engine=args.engine, workers=args.workers, chunk=args.chunk,
+                         node_limit=args.node_limit, index=not args.no_index, schedule=args.schedule,
+                         routes=args.route, estimate_budget=args.estimate_budget)
+    print(json.dumps(stats), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
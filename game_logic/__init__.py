@@ -1,5 +1,5 @@
 """Game logic package: board state and piece constants."""
-from .board import Board
+from .board import Board, BoardSnapshot
 from .constants import (
     NB_ROWS,
     NB_COLS,
@@ -10,6 +10,7 @@ from .constants import (
 
 __all__ = [
     "Board",
+    "BoardSnapshot",
     "NB_ROWS",
     "NB_COLS",
     "PIECE_DIMENSIONS",
@@ -1,38 +1,106 @@
 import random
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import Iterable, List, Tuple
 from game_logic.constants import *
 
+_HEX_DIGITS = bytes.maketrans(bytes(range(16)), b"0123456789abcdef")
+
+
+@dataclass(frozen=True, slots=True)
+class BoardSnapshot:
+    """Immutable copy of a board's state.
+
+    Cheap to take (a 55-byte ``bytes`` plus two short tuples), safe to share
+    between threads and small to pickle for worker processes.
+    """
+
+    cells: bytes
+    available: Tuple[PIECE_COLOR, ...]
+    history: Tuple[Tuple[PIECE_COLOR, Tuple[Tuple[int, int], ...]], ...] = ()
+
+    def canonical_key(self) -> str:
+        """Same key as ``Board.canonical_key`` for the board this was taken from."""
+        return _canonical_key(self.cells, self.available)
+
+
+def _canonical_key(cells: bytes | bytearray, available: Iterable[PIECE_COLOR]) -> str:
+    pieces = "".join(sorted(format(PIECE_CODES[color], "x") for color in available if color != "empty"))
+    return f"{cells.translate(_HEX_DIGITS).decode()}:{pieces}"
+
+
 class Board:
-    """Board backed by a 2D list of ints (piece codes). 0 = empty.
+    """Board backed by a row-major ``bytearray`` of piece codes. 0 = empty.
 
     Supports rotation (0,90,180,270 clockwise) and optional horizontal / vertical flips.
     Placement signature:
         place_piece(color, origin_row, origin_col, rotation=0, flip_h=False, flip_v=False)
     """
 
-    def __init__(self):
+    __slots__ = ("nb_rows", "nb_cols", "cells", "available", "history")
+
+    def __init__(self, generate: bool = True):
         self.nb_rows = NB_ROWS
         self.nb_cols = NB_COLS
-        self.grid: list[list[int]] = [
-            [PIECE_CODES["empty"] for _ in range(self.nb_cols)] for _ in range(self.nb_rows)
-        ]
-        self.available = [c for c in PIECE_COLOR.__args__ if c != "empty"]
-        self.history: List[Tuple[PIECE_COLOR, List[Tuple[int, int]]]] = []
+        self.cells = bytearray(self.nb_rows * self.nb_cols)
+        self.available: List[PIECE_COLOR] = [c for c in PIECE_COLOR.__args__ if c != "empty"]
+        self.history: List[Tuple[PIECE_COLOR, Tuple[Tuple[int, int], ...]]] = []
         # Automatically generate initial puzzle layout
-        self.generate_puzzle()
+        if generate:
+            self.generate_puzzle()
+
+    @classmethod
+    def from_snapshot(cls, snapshot: BoardSnapshot) -> "Board":
+        board = cls(generate=False)
+        board.restore(snapshot)
+        return board
+
+    @classmethod
+    def from_canonical_key(cls, key: str) -> "Board":
+        """Rebuild a board (without history) from ``canonical_key`` output."""
+        cells_hex, _, pieces_hex = key.partition(":")
+        board = cls(generate=False)
+        if len(cells_hex) != len(board.cells):
+            raise ValueError(f"expected {len(board.cells)} cells, got {len(cells_hex)}")
+        board.cells[:] = bytes(int(digit, 16) for digit in cells_hex)
+        codes = {int(digit, 16) for digit in pieces_hex}
+        board.available = [color for color in board.available if PIECE_CODES[color] in codes]
+        return board
+
+    def snapshot(self) -> BoardSnapshot:
+        return BoardSnapshot(bytes(self.cells), tuple(self.available), tuple(self.history))
+
+    def restore(self, snapshot: BoardSnapshot) -> None:
+        self.cells[:] = snapshot.cells
+        self.available = list(snapshot.available)
+        self.history = list(snapshot.history)
+
+    def copy(self) -> "Board":
+        return Board.from_snapshot(self.snapshot())
+
+    @property
+    def grid(self) -> list[list[int]]:
+        """Rows of piece codes, as a fresh nested list (read-only view of ``cells``)."""
+        cols = self.nb_cols
+        return [list(self.cells[r * cols:(r + 1) * cols]) for r in range(self.nb_rows)]
 
     def clear(self):
-        for r in range(self.nb_rows):
-            for c in range(self.nb_cols):
-                self.grid[r][c] = PIECE_CODES["empty"]
+        self.cells[:] = bytes(len(self.cells))
         self.available = [c for c in PIECE_COLOR.__args__ if c != "empty"]
         self.history.clear()
 
     def get(self, row: int, col: int) -> int:
         if 0 <= row < self.nb_rows and 0 <= col < self.nb_cols:
-            return self.grid[row][col]
+            return self.cells[row * self.nb_cols + col]
         return PIECE_CODES["empty"]
 
+    def canonical_key(self) -> str:
+        """Return a stable key for the grid contents plus the available pieces.
+
+        One hex digit per cell (row-major), then the sorted codes of the
+        available pieces. Placement history and list order do not matter.
+        """
+        return _canonical_key(self.cells, self.available)
+
     def transform_piece(self, color: PIECE_COLOR, rotation: int = 0, flip_h: bool = False, flip_v: bool = False) -> tuple[tuple[int, int], ...]:
         if rotation not in (0, 90, 180, 270):
             raise ValueError("rotation must be 0, 90, 180, or 270")
@@ -71,7 +139,7 @@ class Board:
             c = origin_col + dc
             if not (0 <= r < self.nb_rows and 0 <= c < self.nb_cols):
                 return False
-            cell = self.grid[r][c]
+            cell = self.cells[r * self.nb_cols + c]
             if cell not in (PIECE_CODES["empty"], code):
                 return False
         return True
@@ -86,29 +154,25 @@ class Board:
         for dr, dc in offsets:
             r = origin_row + dr
             c = origin_col + dc
-            self.grid[r][c] = code
+            self.cells[r * self.nb_cols + c] = code
             cells.append((r, c))
-        self.history.append((color, cells))
+        self.history.append((color, tuple(cells)))
         return True
 
     def remove_piece(self, color: PIECE_COLOR):
         code = PIECE_CODES.get(color)
         if code is None:
             return
-        for r in range(self.nb_rows):
-            for c in range(self.nb_cols):
-                if self.grid[r][c] == code:
-                    self.grid[r][c] = PIECE_CODES["empty"]
+        for i, cell in enumerate(self.cells):
+            if cell == code:
+                self.cells[i] = PIECE_CODES["empty"]
 
     def undo_last_piece(self) -> PIECE_COLOR | None:
         if not self.history:
             return None
-        color, _cells = self.history.pop()
-        code = PIECE_CODES[color]
-        for r in range(self.nb_rows):
-            for c in range(self.nb_cols):
-                if self.grid[r][c] == code:
-                    self.grid[r][c] = PIECE_CODES["empty"]
+        color, cells = self.history.pop()
+        for r, c in cells:
+            self.cells[r * self.nb_cols + c] = PIECE_CODES["empty"]
         if color not in self.available:
             self.available.append(color)
         return color
@@ -119,7 +183,7 @@ class Board:
         regions = []
         for r in range(self.nb_rows):
             for c in range(self.nb_cols):
-                if self.grid[r][c] != PIECE_CODES["empty"] or (r, c) in visited:
+                if self.cells[r * self.nb_cols + c] != PIECE_CODES["empty"] or (r, c) in visited:
                     continue
                 stack = [(r, c)]
                 comp = set()
@@ -131,7 +195,7 @@ class Board:
                     comp.add((cr, cc))
                     for nr, nc in ((cr-1, cc), (cr+1, cc), (cr, cc-1), (cr, cc+1)):
                         if 0 <= nr < self.nb_rows and 0 <= nc < self.nb_cols:
-                            if self.grid[nr][nc] == PIECE_CODES["empty"] and (nr, nc) not in visited:
+                            if self.cells[nr * self.nb_cols + nc] == PIECE_CODES["empty"] and (nr, nc) not in visited:
                                 stack.append((nr, nc))
                 regions.append(comp)
         return regions
@@ -148,35 +212,45 @@ class Board:
                     return False
         return True
 
-    def generate_puzzle(self, max_total_attempts: int = 100, piece_attempts: int = 200) -> None:
-        """Generate initial puzzle by placing two random distinct pieces."""
-        for _ in range(max_total_attempts):
-            # Reset board each global attempt
-            self.clear()
-            chosen = random.sample(self.available, 2)
-            success = True
-            for color in chosen:
-                placed = False
-                for _ in range(piece_attempts):
-                    rotation = random.choice([0, 90, 180, 270])
-                    flip_h = random.choice([False, True])
-                    flip_v = random.choice([False, True])
-                    origin_row = random.randint(0, self.nb_rows - 1)
-                    origin_col = random.randint(0, self.nb_cols - 1)
-                    if self.can_place_piece(color, origin_row, origin_col, rotation, flip_h, flip_v):
-                        self.place_piece(color, origin_row, origin_col, rotation, flip_h, flip_v)
-                        placed = True
-                        self.available.remove(color)
-                        break
-                if not placed:
-                    success = False
+    def try_random_layout(self, rng: random.Random | None = None, piece_attempts: int = 200) -> bool:
+        """Make one attempt at a starting layout of two random distinct pieces.
+
+        The board is cleared first. Returns False, leaving whatever partial
+        layout the attempt produced, when a piece found no spot within
+        ``piece_attempts`` tries or the layout leaves an unfillable gap.
+        """
+        rand = rng if rng is not None else random
+        self.clear()
+        chosen = rand.sample(self.available, 2)
+        for color in chosen:
+            for _ in range(piece_attempts):
+                rotation = rand.choice([0, 90, 180, 270])
+                flip_h = rand.choice([False, True])
+                flip_v = rand.choice([False, True])
+                origin_row = rand.randint(0, self.nb_rows - 1)
+                origin_col = rand.randint(0, self.nb_cols - 1)
+                if self.place_piece(color, origin_row, origin_col, rotation, flip_h, flip_v):
+                    self.available.remove(color)
                     break
-            if not success:
-                continue
-            if self.initial_layout_valid():
-                self.history.clear()
-                return  # successful generation
+            else:
+                return False
+        if not self.initial_layout_valid():
+            return False
+        self.history.clear()
+        return True
+
+    def generate_puzzle(self, max_total_attempts: int = 100, piece_attempts: int = 200,
+                        rng: random.Random | None = None) -> bool:
+        """Generate initial puzzle by placing two random distinct pieces.
+
+        Pass ``rng`` for reproducible layouts; the module-level generator is used otherwise.
+        Returns False, with the board cleared, if no attempt produced a valid layout.
+        """
+        for _ in range(max_total_attempts):
+            if self.try_random_layout(rng, piece_attempts):
+                return True
         self.clear()
+        return False
 
     # Debug helper
     def __str__(self) -> str:
@@ -187,7 +261,7 @@ class Board:
         for r in range(self.nb_rows):
             row_str = []
             for c in range(self.nb_cols):
-                val = self.grid[r][c]
+                val = self.cells[r * self.nb_cols + c]
                 row_str.append('.' if val == PIECE_CODES["empty"] else str(val))
             lines.append(' '.join(row_str))
         return '\n'.join(lines)
@@ -1,18 +1,37 @@
+import os
+import sqlite3
+import time
 import tkinter as tk
 from game_logic.board import Board
 from gui.main_menu import MainMenu
 from gui.game_view import GameView
-from solver.bt_solver import BTSolver
+from solver.cache import SolveCache, default_cache_path
+from solver.engines import SolverEngine, create_engine
+from solver.profiling import MODES, default_profile_dir
 
 class AppGUI:
     """Container/manager for all application views (menus & game screens)."""
 
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, profile_mode: str | None = None, record_trace: bool = False):
         self.root = root
         self.root.title("IQ Puzzler AI Solver")
         self.root.geometry("1080x720")
         self.board = Board()
-        self.solver = BTSolver(self.board)
+        self.solve_cache = self._open_solve_cache()
+        # "auto" picks the exact-cover kernel for every board (see DEFAULT_RULES in
+        # solver.engines), so BTSolver's propagation and value ordering never run here.
+        self.solver: SolverEngine = create_engine("auto", self.board, cache=self.solve_cache)
+        # With record_trace (or IQ_PUZZLER_TRACE=1), auto-solve runs record their search
+        # here for the Replay Search button; otherwise solves pay no trace I/O.
+        self.record_trace = record_trace or os.environ.get("IQ_PUZZLER_TRACE") == "1"
+        self.trace_path = os.path.join(os.path.dirname(default_cache_path()), "last_solve.iqtrace")
+        # "sampling" or "cprofile" to profile every solve (see solver.profiling). An
+        # unrecognised IQ_PUZZLER_PROFILE value leaves profiling off.
+        if profile_mode is not None and profile_mode not in MODES:
+            raise ValueError(f"unknown profiling mode {profile_mode!r}; expected one of {', '.join(MODES)}")
+        env_mode = os.environ.get("IQ_PUZZLER_PROFILE")
+        self.profile_mode = profile_mode or (env_mode if env_mode in MODES else None)
+        self.profile_dir = default_profile_dir()
 
         self._container = tk.Frame(root)
         self._container.pack(fill="both", expand=True)
@@ -20,8 +39,20 @@ class AppGUI:
         self._container.grid_columnconfigure(0, weight=1)
 
         self.frames: dict[str, tk.Frame] = {}
+        # Seconds from a screen switch until Tk is idle again, per screen name.
+        self.screen_timings: dict[str, list[float]] = {}
+        start = time.perf_counter()
         self.show_menu()
         self.show("MainMenu")
+        self._measure_ready("MainMenu", start)
+
+    @staticmethod
+    def _open_solve_cache() -> SolveCache | None:
+        # The cache is an optimisation only; run uncached if the file is unusable.
+        try:
+            return SolveCache(default_cache_path())
+        except (OSError, sqlite3.Error):
+            return None
 
     def show_menu(self):
         frame = MainMenu(self._container, self)
@@ -32,15 +63,42 @@ class AppGUI:
         frame = self.frames[name]
         frame.tkraise()
 
+    def _leave_game_views(self, keep: str | None = None) -> None:
+        # The game views share self.board: stop any solve or animation before another view shows it.
+        for name, frame in self.frames.items():
+            if name != keep and isinstance(frame, GameView):
+                frame.stop_solve()
+
     def back_to_menu(self):
+        start = time.perf_counter()
+        self._leave_game_views()
         self.show("MainMenu")
+        self._measure_ready("MainMenu", start)
 
     def start_game(self, mode: str):
-        """Create or recreate a GameView with the given mode ('human'|'auto')."""
-        old = self.frames.get("GameView")
-        if old is not None:
-            old.destroy()
-        gv = GameView(self._container, self, mode=mode)
-        self.frames["GameView"] = gv
-        gv.grid(row=0, column=0, sticky="nsew")
-        self.show("GameView")
+        """Show the GameView for ``mode`` ('human'|'auto').
+
+        One view per mode is built on first use and then kept; later switches
+        only reset it to the current board.
+        """
+        start = time.perf_counter()
+        name = f"GameView:{mode}"
+        self._leave_game_views(keep=name)
+        gv = self.frames.get(name)
+        if gv is None:
+            gv = GameView(self._container, self, mode=mode)
+            self.frames[name] = gv
+            gv.grid(row=0, column=0, sticky="nsew")
+        else:
+            gv.reset()
+        self.show(name)
+        self._measure_ready(name, start)
+
+    def _measure_ready(self, name: str, start: float) -> None:
+        # after_idle fires once the switch's pending redraws and geometry work are done.
+        self.root.after_idle(lambda: self.screen_timings.setdefault(name, []).append(time.perf_counter() - start))
+
+    def time_to_interactive(self, name: str) -> float | None:
+        """Most recent switch time for screen ``name`` (e.g. ``"GameView:auto"``), if measured."""
+        timings = self.screen_timings.get(name)
+        return timings[-1] if timings else None
@@ -1,17 +1,29 @@
+import contextlib
 import tkinter as tk
 import random
 import threading
 import time
-from typing import Any, cast
+from typing import cast
 from gui.components.styled_button import make_primary_button
 from game_logic.constants import PIECE_CODES, PIECE_COLOR
-from game_logic.board import Board
+from game_logic.board import Board, BoardSnapshot
+from solver.anytime import AnytimeSolver
 from solver.bt_solver import Placement
+from solver.engines import CANCEL, SolveStats, SolverEngine
+from solver.hints import HintEngine
+from solver.monitor import SolvabilityMonitor
+from solver.profiling import ProfileRun
+from solver.trace import TraceReader, TraceReplay, TraceWriter
 
 class GameView(tk.Frame):
     BG_COLOR = "#121212"
     FG_COLOR = "#f0f0f0"
     PIECE_HOVER_COLOR = "#a12525"
+    HINT_OUTLINE_COLOR = "#ffffff"
+    # Time spent looking for a best partial tiling, alongside the solve.
+    PARTIAL_BUDGET_S = 0.2
+    # A solve still running after this long is cancelled and the best partial shown.
+    SOLVE_BUDGET_S = 5.0
 
     COLOR_PALETTE = {
         "yellow": "#f8e71c",
@@ -47,23 +59,100 @@ class GameView(tk.Frame):
         self.flip_h = False
         self.flip_v = False
         self._solving = False
+        # Bumped by every solve and by stop_solve, so results of an abandoned solve are dropped.
+        self._solve_generation = 0
+        self._solve_thread: threading.Thread | None = None
+        self._animation_job: str | None = None
         self.solve_btn: tk.Button | None = None
         self.status_var = tk.StringVar(value="Ready" if mode == "auto" else "")
-        self._pre_solve_state: dict[str, Any] | None = None
+        self._pre_solve_state: BoardSnapshot | None = None
         self._solution_queue: list[tuple[PIECE_COLOR, Placement]] = []
         self._animation_delay_ms = 250
         self._solve_start_time: float | None = None
         self._solve_elapsed: float | None = None
         self._timer_job: str | None = None
-        self._solver_stats: dict[str, int] = {}
+        self._solver_stats: SolveStats | None = None
+        # (cells covered, empty cells, pieces placed) when a failed solve fell back to a partial tiling.
+        self._partial_result: tuple[int, int, int] | None = None
+        # Summary file of the last solve's profile, when profiling is on.
+        self._profile_path: str | None = None
+        self._hint_job: str | None = None
+        self.replay_btn: tk.Button | None = None
+        self._replay: TraceReplay | None = None
+        self._replay_job: str | None = None
+        self._replay_return_state: BoardSnapshot | None = None
+        self._replay_speed = tk.DoubleVar(value=2.0)  # log10 of events per second
+        self.hints: HintEngine | None = None
+        self.monitor: SolvabilityMonitor | None = None
+        if mode == "human":
+            self.hints = HintEngine(cache=app.solve_cache)
+            self.monitor = SolvabilityMonitor(cache=app.solve_cache)
 
         # Widgets containers
         self.board_cells: list[list[tk.Label]] = []
         self.piece_frame: tk.Frame | None = None
+        # Piece-row thumbnails, built once per cell size and re-packed as pieces come and go.
+        self._thumbnails: dict[PIECE_COLOR, tk.Frame] = {}
+        self._thumbnail_size = 0
+        self._shown_thumbnails: list[PIECE_COLOR] | None = None
+        self._no_pieces_label: tk.Label | None = None
         self._reverse_codes = {v: k for k, v in PIECE_CODES.items()}
         self.build_layout()
         self.render_piece_preview()
         self.refresh_board()
+        self._board_changed()
+
+    def reset(self):
+        """Bring a reused view back to its freshly built state for the current board."""
+        self.stop_solve()
+        self.stop_trace_replay()
+        self._select_next_available_piece()
+        self._solver_stats = None
+        self._solve_elapsed = None
+        self._partial_result = None
+        self._profile_path = None
+        self._update_status("Ready" if self.mode == "auto" else "")
+        if self.replay_btn is not None:
+            self.replay_btn.configure(state=tk.DISABLED)
+        self.refresh_board()
+        self.render_available_pieces()
+        self._board_changed()
+
+    def stop_solve(self):
+        """Cancel a running solve or solution animation and put the board back as it was before it.
+
+        The app's views share one board, so a view being left must not keep changing it.
+        """
+        if not self._solving:
+            return
+        self._solve_generation += 1
+        solver = self.app.solver
+        if self._solve_thread is not None and self._solve_thread.is_alive() and CANCEL in solver.capabilities:
+            solver.cancel()
+        if self._animation_job is not None:
+            self.after_cancel(self._animation_job)
+            self._animation_job = None
+        self._solution_queue = []
+        self._stop_timer()
+        self._restore_board(self._pre_solve_state)
+        self._pre_solve_state = None
+        self._solving = False
+        if self.solve_btn is not None:
+            self.solve_btn.configure(state=tk.NORMAL)
+        self.enable_board_inputs()
+        self.refresh_board()
+        self.render_available_pieces()
+        self._select_next_available_piece()
+        self._update_status("Ready" if self.mode == "auto" else "")
+
+    def destroy(self):
+        self.stop_solve()
+        self.stop_trace_replay()
+        if self.hints is not None:
+            self.hints.shutdown()
+        if self.monitor is not None:
+            self.monitor.cancel()
+        super().destroy()
 
     def build_layout(self):
         # Layout: three rows (title, board, available pieces)
@@ -186,9 +275,41 @@ class GameView(tk.Frame):
                 pady=8,
             )
             self.solve_btn.grid(row=0, column=2, padx=4, pady=6, sticky="nsew")
+        if self.mode == "auto" and self.app.record_trace:
+            self.replay_btn = make_primary_button(
+                sidebar_bottom,
+                text="Replay Search",
+                command=self.toggle_trace_replay,
+                font=self.small_font,
+                padx=12,
+                pady=8,
+            )
+            self.replay_btn.grid(row=2, column=0, padx=4, pady=6, sticky="nsew")
+            self.replay_btn.configure(state=tk.DISABLED)
+            tk.Scale(
+                sidebar_bottom,
+                variable=self._replay_speed,
+                from_=0.0,
+                to=6.0,
+                resolution=0.5,
+                orient=tk.HORIZONTAL,
+                label="Replay speed (10^x events/s)",
+                showvalue=False,
+                fg=self.FG_COLOR,
+                bg=self.BG_COLOR,
+                highlightthickness=0,
+                font=self.small_font,
+            ).grid(row=2, column=1, columnspan=2, padx=4, pady=6, sticky="ew")
         else:
-            filler = tk.Frame(sidebar_bottom, bg=self.BG_COLOR)
-            filler.grid(row=0, column=2, sticky="nsew")
+            hint_btn = make_primary_button(
+                sidebar_bottom,
+                text="Hint",
+                command=self.show_hint,
+                font=self.small_font,
+                padx=12,
+                pady=8,
+            )
+            hint_btn.grid(row=0, column=2, padx=4, pady=6, sticky="nsew")
         self.status_label = tk.Label(
             sidebar_bottom,
             textvariable=self.status_var,
@@ -232,7 +353,7 @@ class GameView(tk.Frame):
     def refresh_board(self):
         for r in range(self.board.nb_rows):
             for c in range(self.board.nb_cols):
-                code = self.board.grid[r][c]
+                code = self.board.get(r, c)
                 cell = self.board_cells[r][c]
                 cell.configure(bg=self.color_for_code(code))
 
@@ -312,19 +433,32 @@ class GameView(tk.Frame):
     def render_available_pieces(self):
         if self.pieces_container is None:
             return
-        for child in list(self.pieces_container.winfo_children()):
-            child.destroy()
         avail = [c for c in self.board.available if c != "empty"]
-        if not avail:
-            tk.Label(self.pieces_container, text="None", fg=self.FG_COLOR, bg=self.BG_COLOR, font=self.small_font).pack(side=tk.LEFT)
-            return
         # Compute mini cell size based on container height
         self.pieces_container.update_idletasks()
         container_h = max(self.pieces_container.winfo_height(), 50)
         # leave margin for padding; target rows <= max piece height (<=4)
         cell = max(8, (container_h - 10) // 4)
+        if cell != self._thumbnail_size:
+            for frame in self._thumbnails.values():
+                frame.destroy()
+            self._thumbnails.clear()
+            self._thumbnail_size = cell
+            self._shown_thumbnails = None
+        if avail == self._shown_thumbnails:
+            return
+        for child in self.pieces_container.pack_slaves():
+            child.pack_forget()
+        self._shown_thumbnails = avail
+        if not avail:
+            if self._no_pieces_label is None:
+                self._no_pieces_label = tk.Label(self.pieces_container, text="None", fg=self.FG_COLOR, bg=self.BG_COLOR, font=self.small_font)
+            self._no_pieces_label.pack(side=tk.LEFT)
+            return
         for color in avail:
-            mini = self.render_available_piece(color, cell)
+            mini = self._thumbnails.get(color)
+            if mini is None:
+                mini = self._thumbnails[color] = self.render_available_piece(color, cell)
             mini.pack(side=tk.LEFT, padx=4)
 
     def render_available_piece(self, color: PIECE_COLOR, cell_size: int) -> tk.Frame:
@@ -358,7 +492,7 @@ class GameView(tk.Frame):
         self.refresh_control_labels()
 
     def handle_board_click(self, row: int, col: int):
-        if self._solving:
+        if self._solving or self._replay is not None:
             return
         if self.selected_piece is None:
             return
@@ -375,6 +509,7 @@ class GameView(tk.Frame):
         self.refresh_board()
         self.render_available_pieces()
         self._select_next_available_piece()
+        self._board_changed()
 
     def _select_next_available_piece(self):
         next_piece = None
@@ -393,6 +528,7 @@ class GameView(tk.Frame):
     def take_back_piece(self):
         if self._solving:
             return
+        self.stop_trace_replay()
         color = self.board.undo_last_piece()
         if color is None:
             return
@@ -404,10 +540,14 @@ class GameView(tk.Frame):
         self.render_available_pieces()
         self.render_piece_preview()
         self.refresh_control_labels()
+        self._board_changed()
 
     def new_board(self):
         if self._solving:
             return
+        self.stop_trace_replay()
+        if self.replay_btn is not None:
+            self.replay_btn.configure(state=tk.DISABLED)
         self.board.generate_puzzle()
         self.selected_piece = cast(PIECE_COLOR, self.board.available[0]) if self.board.available else None
         self.rotation = 0
@@ -417,19 +557,80 @@ class GameView(tk.Frame):
         self.render_available_pieces()
         self.render_piece_preview()
         self.refresh_control_labels()
+        self._board_changed()
+
+    # --- Manual play assistance ---
+    def _board_changed(self):
+        self._clear_hint_highlight()
+        if self.hints is not None:
+            self.hints.update(self.board)
+        if self.monitor is not None:
+            reason = self.monitor.watch(
+                self.board,
+                lambda status, why: self.after(0, lambda: self._on_monitor_result(generation, status, why)),
+            )
+            # Assigned on the Tk thread before any forwarded result can run there.
+            generation = self.monitor.generation
+            self._update_status(f"⚠ Dead position: {reason}" if reason else "")
+
+    def _on_monitor_result(self, generation: int, status: str, reason: str | None):
+        if self.monitor is None or not self.monitor.is_current(generation):
+            return  # a verdict on a position the player has already left
+        if status == "dead":
+            self._update_status(f"⚠ Dead position: {reason}")
+        elif status == "alive":
+            self._update_status("Position still solvable")
+
+    def show_hint(self):
+        if self.hints is None or self._solving:
+            return
+        step = self.hints.hint()
+        if step is None:
+            state = self.hints.state
+            if state == "searching":
+                self._update_status("Thinking… ask again in a moment")
+            elif state == "dead":
+                self._update_status("No solution from this position")
+            elif state == "solved":
+                self._update_status("Board complete")
+            return
+        color, (row, col, rotation, flip_h, flip_v) = step
+        self.selected_piece = color
+        self.rotation = rotation
+        self.flip_h = flip_h
+        self.flip_v = flip_v
+        self.render_piece_preview()
+        self.refresh_control_labels()
+        self._clear_hint_highlight()
+        for dr, dc in self.board.transform_piece(color, rotation, flip_h, flip_v):
+            cell = self.board_cells[row + dr][col + dc]
+            cell.configure(highlightthickness=2, highlightbackground=self.HINT_OUTLINE_COLOR)
+        self._hint_job = self.after(1500, self._clear_hint_highlight)
+        self._update_status(f"Hint: {color.replace('_', ' ')} at row {row + 1}, column {col + 1}")
+
+    def _clear_hint_highlight(self):
+        if self._hint_job is not None:
+            self.after_cancel(self._hint_job)
+            self._hint_job = None
+        for row_cells in self.board_cells:
+            for cell in row_cells:
+                cell.configure(highlightthickness=0)
 
     # --- Solver controls ---
     def trigger_solve(self):
         if self._solving:
             return
-        solver = getattr(self.app, "solver", None)
-        if solver is None:
-            self._update_status("Solver unavailable")
+        if self._solve_thread is not None and self._solve_thread.is_alive():
+            # A stopped solve has not returned yet; the engine runs one solve at a time.
+            self._update_status("Stopping the previous solve… try again in a moment")
             return
+        self.stop_trace_replay()
+        solver = self.app.solver
         self._solving = True
         self._pre_solve_state = self._snapshot_board()
         self._solution_queue = []
-        self._solver_stats = {}
+        self._solver_stats = None
+        self._partial_result = None
         self._solve_start_time = time.perf_counter()
         self._solve_elapsed = None
         self._update_status("Solving...")
@@ -437,27 +638,69 @@ class GameView(tk.Frame):
             self.solve_btn.configure(state=tk.DISABLED)
         self.disable_board_inputs()
         self._start_timer()
-        thread = threading.Thread(target=self._solve_async, args=(solver,), daemon=True)
-        thread.start()
-
-    def _solve_async(self, solver):
-        success = solver.solve()
-        stats = {
-            "nodes": getattr(solver, "nodes_visited", 0),
-            "placements": getattr(solver, "placements_tested", 0),
-            "steps": len(getattr(solver, "solution_steps", [])),
-        }
+        self._solve_generation += 1
+        self._solve_thread = threading.Thread(target=self._solve_async, args=(solver, self._solve_generation),
+                                              daemon=True)
+        self._solve_thread.start()
+
+    def _solve_async(self, solver: SolverEngine, generation: int):
+        # The best partial tiling is searched on a copy of the board while the
+        # solve runs, so a failed or cancelled solve has one ready at once.
+        partial = AnytimeSolver(Board.from_snapshot(self.board.snapshot()), time_budget=self.PARTIAL_BUDGET_S)
+        partial_thread = threading.Thread(target=partial.solve, daemon=True)
+        partial_thread.start()
+        budget = None
+        if CANCEL in solver.capabilities:
+            budget = threading.Timer(self.SOLVE_BUDGET_S, solver.cancel)
+            budget.daemon = True
+            budget.start()
+        writer = self._open_trace_writer()
+        solver.trace = writer
+        try:
+            # Runs on the solver thread, so a profile leaves the Tk main loop out.
+            with self._profile_run(solver) as profile:
+                success = solver.solve()
+        finally:
+            if budget is not None:
+                budget.cancel()
+            solver.trace = None
+            if writer is not None:
+                writer.close()
+        # The table itself stays in the .top.txt file next to the raw profile.
+        profile_path = profile.paths.get("top") if profile is not None else None
+        stats = solver.stats()
+        steps = list(solver.solution_steps)
+        traced = writer is not None and writer.events > 0
         duration = None
         if self._solve_start_time is not None:
             duration = time.perf_counter() - self._solve_start_time
-        self.after(0, lambda: self._on_solver_finished(success, stats, duration))
-
-    def _on_solver_finished(self, success: bool, stats: dict[str, int], duration: float | None):
+        if success:
+            partial.cancel()
+            partial = None
+        else:
+            partial_thread.join()
+        self.after(0, lambda: self._on_solver_finished(generation, success, stats, steps, traced, duration, partial,
+                                                       profile_path))
+
+    def _on_solver_finished(self, generation: int, success: bool, stats: SolveStats,
+                            steps: list[tuple[PIECE_COLOR, Placement]], traced: bool, duration: float | None,
+                            partial: AnytimeSolver | None = None, profile_path: str | None = None):
+        if generation != self._solve_generation:
+            return  # stopped by stop_solve
         self._stop_timer()
+        self._profile_path = profile_path
+        if self.replay_btn is not None:
+            # Cache hits and engines without tracing leave nothing to replay.
+            self.replay_btn.configure(state=tk.NORMAL if traced else tk.DISABLED)
         self._solve_elapsed = duration
-        self._solver_stats = stats or {}
-        solver = getattr(self.app, "solver", None)
-        if not success or solver is None or not getattr(solver, "solution_steps", None):
+        self._solver_stats = stats
+        if not success and partial is not None and partial.solution_steps:
+            # The partial search may have tiled the board the solve ran out of time on.
+            if not partial.complete:
+                self._partial_result = (partial.cells_covered, partial.cells_total, partial.pieces_placed)
+            steps = partial.solution_steps
+            success = True
+        if not success or not steps:
             self._restore_board(self._pre_solve_state)
             self._pre_solve_state = None
             self._solving = False
@@ -469,14 +712,14 @@ class GameView(tk.Frame):
             self._select_next_available_piece()
             self._update_status(self._format_result_message(False))
             return
-        self._solution_queue = list(solver.solution_steps)
+        self._solution_queue = steps
+        # Kept until the animation ends, so stop_solve can take the placed pieces back.
         self._restore_board(self._pre_solve_state)
-        self._pre_solve_state = None
         self.refresh_board()
         self.render_available_pieces()
         self._select_next_available_piece()
         elapsed_txt = f"{self._solve_elapsed:.2f}s" if self._solve_elapsed is not None else ""
-        anim_msg = "Animating solution"
+        anim_msg = "No full solution, placing best partial" if self._partial_result else "Animating solution"
         if elapsed_txt:
             anim_msg += f" (found in {elapsed_txt})"
         self._update_status(anim_msg)
@@ -493,7 +736,9 @@ class GameView(tk.Frame):
             self.status_var.set(text)
 
     def _animate_solution_step(self):
+        self._animation_job = None
         if not self._solution_queue:
+            self._pre_solve_state = None
             self._solving = False
             if self.solve_btn is not None:
                 self.solve_btn.configure(state=tk.NORMAL)
@@ -501,7 +746,7 @@ class GameView(tk.Frame):
             self.refresh_board()
             self.render_available_pieces()
             self._select_next_available_piece()
-            self._update_status(self._format_result_message(True))
+            self._update_status(self._format_result_message(self._partial_result is None))
             return
         color, placement = self._solution_queue.pop(0)
         row, col, rotation, flip_h, flip_v = placement
@@ -512,27 +757,87 @@ class GameView(tk.Frame):
             pass
         self.refresh_board()
         self.render_available_pieces()
-        self.after(self._animation_delay_ms, self._animate_solution_step)
+        self._animation_job = self.after(self._animation_delay_ms, self._animate_solution_step)
+
+    def _profile_run(self, solver: SolverEngine):
+        mode = getattr(self.app, "profile_mode", None)
+        if not mode:
+            return contextlib.nullcontext()
+        return ProfileRun(self.app.profile_dir, label=f"gui-{solver.name}", mode=mode)
+
+    # --- Search trace replay ---
+    def _open_trace_writer(self) -> TraceWriter | None:
+        if not self.app.record_trace:
+            return None
+        try:
+            return TraceWriter(self.app.trace_path, self.board)
+        except OSError:
+            return None
 
-    def _snapshot_board(self) -> dict[str, Any]:
-        return {
-            "grid": [row[:] for row in self.board.grid],
-            "available": list(self.board.available),
-            "history": [(color, list(cells)) for color, cells in self.board.history],
-        }
+    def toggle_trace_replay(self):
+        if self._replay is not None:
+            self.stop_trace_replay()
+            return
+        if self._solving:
+            return
+        try:
+            reader = TraceReader(self.app.trace_path)
+        except (OSError, ValueError):
+            self._update_status("No trace to replay")
+            return
+        self._replay_return_state = self._snapshot_board()
+        self._replay = TraceReplay(reader)
+        if self.solve_btn is not None:
+            self.solve_btn.configure(state=tk.DISABLED)
+        if self.replay_btn is not None:
+            self.replay_btn.configure(text="Stop Replay")
+        self.disable_board_inputs()
+        self._replay_tick()
+
+    def _replay_tick(self):
+        replay = self._replay
+        if replay is None:
+            return
+        interval_ms = 40
+        step = max(1, round(10 ** self._replay_speed.get() * interval_ms / 1000))
+        board = replay.step(step)
+        self.board.restore(board.snapshot())
+        self.refresh_board()
+        total = len(replay.reader)
+        if replay.position >= total:
+            self._update_status(f"Replay finished ({total} events)")
+            self.stop_trace_replay(restore=False)
+            return
+        event = replay.reader[replay.position]
+        self._update_status(f"Replay {replay.position}/{total}\n{event.name} {event.piece} at depth {event.depth}")
+        self._replay_job = self.after(interval_ms, self._replay_tick)
+
+    def stop_trace_replay(self, restore: bool = True):
+        if self._replay_job is not None:
+            self.after_cancel(self._replay_job)
+            self._replay_job = None
+        if self._replay is None:
+            return
+        self._replay.reader.close()
+        self._replay = None
+        if restore:
+            self._restore_board(self._replay_return_state)
+        self._replay_return_state = None
+        self.refresh_board()
+        self.render_available_pieces()
+        if self.solve_btn is not None:
+            self.solve_btn.configure(state=tk.NORMAL)
+        if self.replay_btn is not None:
+            self.replay_btn.configure(text="Replay Search")
+        self.enable_board_inputs()
+
+    def _snapshot_board(self) -> BoardSnapshot:
+        return self.board.snapshot()
 
-    def _restore_board(self, state: dict[str, Any] | None) -> None:
-        if not state:
+    def _restore_board(self, state: BoardSnapshot | None) -> None:
+        if state is None:
             return
-        grid = state.get("grid")
-        if grid:
-            self.board.grid = [row[:] for row in grid]
-        available = state.get("available")
-        if available is not None:
-            self.board.available = list(available)
-        history = state.get("history")
-        if history is not None:
-            self.board.history = [(color, list(cells)) for color, cells in history]
+        self.board.restore(state)
 
     def _start_timer(self):
         if self._timer_job is not None:
@@ -558,15 +863,29 @@ class GameView(tk.Frame):
         stats_lines: list[str] = []
         if self._solve_elapsed is not None:
             stats_lines.append(f"• Time: {self._solve_elapsed:.2f}s")
-        nodes = self._solver_stats.get("nodes")
-        if nodes:
-            stats_lines.append(f"• Nodes: {nodes}")
-        placements = self._solver_stats.get("placements")
-        if placements:
-            stats_lines.append(f"• Placements: {placements}")
-        steps = self._solver_stats.get("steps")
-        if steps:
-            stats_lines.append(f"• Moves: {steps}")
+        stats = self._solver_stats
+        if stats is not None:
+            if stats.nodes:
+                stats_lines.append(f"• Nodes: {stats.nodes}")
+            if stats.placements:
+                stats_lines.append(f"• Placements: {stats.placements}")
+            if stats.forced:
+                stats_lines.append(f"• Forced moves: {stats.forced}")
+            if stats.steps:
+                stats_lines.append(f"• Moves: {stats.steps}")
+            if stats.cached:
+                stats_lines.append("• From cache")
+            else:
+                stats_lines.append(f"• Engine: {stats.engine}")
+            if stats.unsolvable_reason:
+                stats_lines.append(f"• Proof: {stats.unsolvable_reason}")
+            if stats.cancelled:
+                stats_lines.append(f"• Stopped at the {self.SOLVE_BUDGET_S:g}s limit")
+        if not success and self._partial_result is not None:
+            covered, total, pieces = self._partial_result
+            stats_lines.append(f"• Best partial: {covered}/{total} cells, {pieces} pieces")
+        if self._profile_path is not None:
+            stats_lines.append(f"• Profile: {self._profile_path}")
         if stats_lines:
             lines.extend(stats_lines)
         return "\n".join(lines)
@@ -1,6 +1,10 @@
+import os
 import tkinter as tk
 from gui.components.styled_button import make_primary_button
 
+LOGO_PATH = os.path.join(os.path.dirname(__file__), "assets", "iq_puzzler_logo.png")
+
+
 class MainMenu(tk.Frame):
     BG_COLOR = "#121212"
     FG_COLOR = "#f0f0f0"
@@ -21,9 +25,8 @@ class MainMenu(tk.Frame):
         # Logo / title area
         self.top_frame = tk.Frame(self, bg=self.BG_COLOR)
         self.top_frame.grid(row=0, column=0, sticky="nsew")
-        path = "gui/assets/iq_puzzler_logo.png"
         try:
-            logo_img = tk.PhotoImage(file=path)
+            logo_img = tk.PhotoImage(file=LOGO_PATH)
             tk.Label(self.top_frame, image=logo_img, bg=self.BG_COLOR).pack(expand=True)
             # Keep reference to avoid GC
             self.logo_img = logo_img
@@ -1,10 +1,18 @@
+import argparse
 import tkinter as tk
 from gui.app_gui import AppGUI
+from solver.profiling import MODES
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IQ Puzzler AI Solver")
+    parser.add_argument("--profile", choices=MODES, default=None,
+                        help="profile every solve; results go to a profiles folder next to the solve cache")
+    parser.add_argument("--trace", action="store_true",
+                        help="record each auto solve's search so it can be replayed")
+    args = parser.parse_args(argv)
     root = tk.Tk()
-    app = AppGUI(root)
+    app = AppGUI(root, profile_mode=args.profile, record_trace=args.trace)
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
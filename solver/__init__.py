@@ -1,4 +1,28 @@
 """Solver package """
-from .bt_solver import BTSolver
+from .anytime import AnytimeSolver
+from .bt_solver import BTSolver, SolverConfig
+from .cache import SolveCache
+from .engines import EngineSelector, SolverEngine, SolveStats, create_engine
+from .estimate import TreeEstimate, TreeEstimator, estimate_tree
+from .kernel import KernelSolver
+from .portfolio import PortfolioSolver
+from .value_order import VALUE_ORDERS, ValueOrderer, register_value_order
 
-__all__ = ["BTSolver"]
\ No newline at end of file
+__all__ = [
+    "AnytimeSolver",
+    "BTSolver",
+    "SolverConfig",
+    "SolveCache",
+    "KernelSolver",
+    "PortfolioSolver",
+    "SolverEngine",
+    "SolveStats",
+    "EngineSelector",
+    "create_engine",
+    "TreeEstimate",
+    "TreeEstimator",
+    "estimate_tree",
+    "VALUE_ORDERS",
+    "ValueOrderer",
+    "register_value_order",
+]
@@ -0,0 +1,212 @@
+"""Anytime search for the best partial tiling within a time budget."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, List, Sequence, Tuple
+
+from game_logic import NB_COLS, NB_ROWS, PIECE_COLOR
+from game_logic.board import Board
+from solver.bt_solver import Placement, SearchInterrupted
+from solver.invariants import get_checker
+from solver.kernel import SearchKernel
+from solver.tables import PlacementTables, cell_bit, get_tables
+
+Step = Tuple[PIECE_COLOR, Placement]
+# (seconds since start, cells covered, pieces placed) each time the best partial improves.
+Improvement = Tuple[float, int, int]
+
+
+def _neighbour_masks(tables: PlacementTables) -> List[int]:
+    """In-board 4-neighbours of each cell bit."""
+    masks = [0] * (NB_ROWS * NB_COLS)
+    for row in range(NB_ROWS):
+        for col in range(NB_COLS):
+            mask = 0
+            for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                r, c = row + dr, col + dc
+                if 0 <= r < NB_ROWS and 0 <= c < NB_COLS:
+                    mask |= 1 << cell_bit(r, c)
+            masks[cell_bit(row, col)] = mask
+    return masks
+
+
+class AnytimeSolver:
+    """Best partial tiling (most cells covered, then most pieces placed) within ``time_budget``.
+
+    The first ``exact_share`` of the budget goes to the exact-cover kernel,
+    so a solvable board is usually solved outright. The rest runs
+    limited-discrepancy restarts over piece placements: pieces are placed
+    largest first, each level ranks its legal placements by how snugly they
+    sit against walls and pieces (penalising cells they cut off) and may
+    also skip the piece. Taking the choice ranked ``i`` at a level costs
+    ``i`` discrepancies (skipping ranks last); restart ``k`` explores every
+    path costing at most ``k``, over the ``width`` best-ranked placements
+    per level. Branches that cannot beat the best partial are cut.
+
+    ``solve`` returns True only for a complete tiling; either way
+    ``solution_steps`` holds the best steps found, and ``improvements``
+    records when each better partial turned up. ``on_improvement`` is called
+    with the new steps from the solving thread.
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        time_budget: float = 0.2,
+        exact_share: float = 0.5,
+        width: int = 6,
+        on_improvement: Callable[[List[Step]], None] | None = None,
+    ):
+        self.board = board
+        self.time_budget = time_budget
+        self.exact_share = exact_share
+        self.width = width
+        self.on_improvement = on_improvement
+        self.tables = get_tables()
+        self.solution_steps: List[Step] = []
+        self.complete = False
+        self.cells_total = 0
+        self.cells_covered = 0
+        self.pieces_placed = 0
+        self.nodes_visited = 0
+        self.discrepancies = -1
+        self.improvements: List[Improvement] = []
+        self._cancel_event = threading.Event()
+        self._start = 0.0
+        self._deadline = 0.0
+        tables = self.tables
+        self._cell_neighbours = _neighbour_masks(tables)
+        self._by_piece: List[List[int]] = [[] for _ in tables.colors]
+        for pid in range(len(tables.masks)):
+            self._by_piece[tables.piece_of[pid]].append(pid)
+        self._border: List[int] = []
+        self._walls: List[int] = []
+        for mask in tables.masks:
+            border = walls = 0
+            bits = mask
+            while bits:
+                low = bits & -bits
+                bit = low.bit_length() - 1
+                border |= self._cell_neighbours[bit]
+                walls += 4 - self._cell_neighbours[bit].bit_count()
+                bits ^= low
+            self._border.append(border & ~mask)
+            self._walls.append(walls)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def solve(self) -> bool:
+        tables = self.tables
+        self._cancel_event.clear()
+        self._start = time.perf_counter()
+        self._deadline = self._start + self.time_budget
+        self.solution_steps = []
+        self.improvements = []
+        self.complete = False
+        self.nodes_visited = 0
+        self.discrepancies = -1
+        occ = tables.occupancy(self.board)
+        self.cells_total = (tables.full_mask & ~occ).bit_count()
+        self.cells_covered = self.pieces_placed = 0
+        remaining = [tables.colors.index(color) for color in self.board.available if color != "empty"]
+        if get_checker().check(self.board) is None and self._exact(self._start + self.time_budget * self.exact_share):
+            return True
+        order = sorted(remaining, key=lambda index: (-tables.sizes[index], tables.colors[index]))
+        self._partial(order, occ)
+        return self.complete
+
+    # --- Phase 1: exact search ---
+    def _exact(self, deadline: float) -> bool:
+        kernel = SearchKernel(self.tables)
+        kernel.load(self.board)
+        status = "paused"
+        while status == "paused" and time.perf_counter() < deadline and not self._cancel_event.is_set():
+            status = kernel.run(max_nodes=500)
+        self.nodes_visited += kernel.nodes
+        if status != "solved":
+            return False
+        steps = kernel.solution_steps()
+        self._record(steps, self.cells_total)
+        return True
+
+    # --- Phase 2: limited-discrepancy restarts ---
+    def _partial(self, order: Sequence[int], occ: int) -> None:
+        sizes = self.tables.sizes
+        # Area still placeable from each level down, for the bound.
+        suffix = [0] * (len(order) + 1)
+        for index in range(len(order) - 1, -1, -1):
+            suffix[index] = suffix[index + 1] + sizes[order[index]]
+        steps: List[int] = []
+        for k in range(len(order) * (self.width + 1) + 1):
+            try:
+                self._descend(order, suffix, 0, occ, 0, steps, k)
+            except SearchInterrupted:
+                return
+            self.discrepancies = k
+            if self.complete:
+                return
+
+    def _descend(self, order: Sequence[int], suffix: Sequence[int], level: int, occ: int, covered: int,
+                 steps: List[int], allowance: int) -> None:
+        self.nodes_visited += 1
+        if self.nodes_visited & 127 == 0 and (time.perf_counter() >= self._deadline or self._cancel_event.is_set()):
+            raise SearchInterrupted()
+        if (covered, len(steps)) > (self.cells_covered, self.pieces_placed):
+            tables = self.tables
+            self._record([(tables.colors[tables.piece_of[p]], tables.placements[p]) for p in steps], covered)
+        if level == len(order):
+            return
+        if (covered + suffix[level], len(steps) + len(order) - level) <= (self.cells_covered, self.pieces_placed):
+            return
+        size = self.tables.sizes[order[level]]
+        ranked = self._ranked(order[level], occ)
+        for rank, pid in enumerate(ranked):
+            if rank > allowance:
+                return
+            steps.append(pid)
+            self._descend(order, suffix, level + 1, occ | self.tables.masks[pid], covered + size, steps,
+                          allowance - rank)
+            steps.pop()
+        # Skipping the piece ranks after its placements, and is free when none fits.
+        if len(ranked) <= allowance:
+            self._descend(order, suffix, level + 1, occ, covered, steps, allowance - len(ranked))
+
+    def _ranked(self, piece: int, occ: int) -> List[int]:
+        """The ``width`` best legal placements of ``piece``, snuggest first."""
+        masks = self.tables.masks
+        full = self.tables.full_mask
+        neighbours = self._cell_neighbours
+        scored = []
+        for pid in self._by_piece[piece]:
+            mask = masks[pid]
+            if mask & occ:
+                continue
+            after = occ | mask
+            border = self._border[pid]
+            contact = (border & occ).bit_count() + self._walls[pid]
+            isolated = 0
+            open_cells = border & full & ~after
+            while open_cells:
+                low = open_cells & -open_cells
+                if not neighbours[low.bit_length() - 1] & ~after:
+                    isolated += 1
+                open_cells ^= low
+            scored.append((contact - 4 * isolated, -pid))
+        scored.sort(reverse=True)
+        return [-pid for _, pid in scored[: self.width]]
+
+    def _record(self, steps: List[Step], covered: int) -> None:
+        self.solution_steps = steps
+        self.cells_covered = covered
+        self.pieces_placed = len(steps)
+        self.complete = covered == self.cells_total and len(steps) == len(
+            [color for color in self.board.available if color != "empty"])
+        self.improvements.append((self.elapsed, covered, len(steps)))
+        if self.on_improvement is not None:
+            self.on_improvement(list(steps))
@@ -1,14 +1,72 @@
 """Backtracking solver scaffolding for the IQ Puzzler board."""
 from __future__ import annotations
 
-import copy
-from typing import Dict, Iterable, List, Sequence, Tuple
+import random
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
 
 from game_logic.board import Board
-from game_logic import PIECE_COLOR, PIECE_DIMENSIONS
+from game_logic import PIECE_CODES, PIECE_COLOR, PIECE_DIMENSIONS
+from solver.invariants import get_checker
+from solver.tables import unique_orientations
+from solver.value_order import ValueOrderer
+
+if TYPE_CHECKING:
+    from solver.cache import SolveCache
+    from solver.trace import TraceWriter
 
 Placement = Tuple[int, int, int, bool, bool]
 
+# Distinct orientations per piece with their bounding box, in enumeration order.
+_ORIENTATIONS = {
+    color: tuple(
+        (rotation, flip_h, flip_v, offsets, max(r for r, _ in offsets) + 1, max(c for _, c in offsets) + 1)
+        for rotation, flip_h, flip_v, offsets in unique_orientations(color)
+    )
+    for color in PIECE_DIMENSIONS
+    if color != "empty"
+}
+# Cell offsets of each (piece, rotation, flip_h, flip_v) BTSolver can produce.
+_OFFSETS = {
+    (color, rotation, flip_h, flip_v): offsets
+    for color, orientations in _ORIENTATIONS.items()
+    for rotation, flip_h, flip_v, offsets, _height, _width in orientations
+}
+
+
+class SearchInterrupted(Exception):
+    """Raised inside the search to unwind it when a solve is cancelled."""
+
+
+@dataclass(frozen=True)
+class SolverConfig:
+    """Branching knobs of BTSolver.
+
+    variable_order: initial piece order, ``"size"`` (largest first),
+        ``"small"`` (smallest first) or ``"name"``; it also breaks MRV ties.
+    mrv: pick the piece with the fewest legal placements at each node.
+    value_order: placement order within a domain, a name registered in
+        solver.value_order: ``"fixed"`` (enumeration order), ``"walls"``,
+        ``"regions"``, ``"lcv"`` or ``"combined"``.
+    value_seed: when set, shuffle each domain with an RNG seeded from this
+        value and the board state, so the order is random but reproducible.
+        With a value order, the shuffle only breaks its ties.
+    invariants: reject boards that fail a coloring or counting invariant
+        (see solver.invariants) before searching.
+    propagate: before each branching decision, place every forced piece
+        (a piece with one legal placement, or the only placement covering
+        some empty cell) and fail early on a piece or cell with none.
+    """
+
+    name: str = "default"
+    variable_order: str = "size"
+    mrv: bool = True
+    value_order: str = "fixed"
+    value_seed: int | None = None
+    invariants: bool = True
+    propagate: bool = True
+
 
 class BTSolver:
     """Generate-and-test solver following the CSP template.
@@ -17,8 +75,22 @@ class BTSolver:
     A (assignment) == mapping piece -> placement tuple.
     """
 
-    def __init__(self, board: Board):
+    def __init__(
+        self,
+        board: Board,
+        cache: SolveCache | None = None,
+        node_limit: int | None = None,
+        config: SolverConfig | None = None,
+        trace: TraceWriter | None = None,
+    ):
         self.board = board
+        self.cache = cache
+        self.node_limit = node_limit
+        self.config = config or SolverConfig()
+        self._value_orderer = ValueOrderer(self.config.value_order) if self.config.value_order != "fixed" else None
+        # Optional recorder of every try/prune/commit/backtrack (see solver.trace).
+        self.trace = trace
+        self.from_cache = False
         self.variables: List[PIECE_COLOR] = []
         self.assignment: Dict[PIECE_COLOR, Placement] = {}
         self.piece: PIECE_COLOR | None = None
@@ -26,21 +98,65 @@ class BTSolver:
         self.solution_steps: List[tuple[PIECE_COLOR, Placement]] = []
         self.nodes_visited = 0
         self.placements_tested = 0
+        self.forced_moves = 0
+        self.cancelled = False
+        self.limit_reached = False
+        # Why the invariant check rejected the board, when it did.
+        self.unsolvable_reason: str | None = None
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """Ask a running ``solve`` (possibly on another thread) to stop early."""
+        self._cancel_event.set()
 
     def solve(self) -> bool:
-        """Return True when a complete tiling is found; False otherwise."""
-        original_board = self.board
-        working_board = copy.deepcopy(original_board)
-        self.board = working_board
-        self.variables = self._ordered_variables()
+        """Return True when a complete tiling is found; False otherwise.
+
+        With a cache attached, a known layout is answered without searching and
+        every fresh result is stored for next time. A cancelled solve, or one
+        that hits ``node_limit``, returns False with ``cancelled`` or
+        ``limit_reached`` set and is not cached. A board that fails an
+        invariant returns False at once with ``unsolvable_reason`` set.
+        """
+        self._cancel_event.clear()
+        self.cancelled = False
+        self.limit_reached = False
         self.assignment.clear()
         self.solution_steps.clear()
         self.nodes_visited = 0
         self.placements_tested = 0
+        self.forced_moves = 0
+        self.from_cache = False
+        self.unsolvable_reason = None
+        if self.config.invariants:
+            self.unsolvable_reason = get_checker().check(self.board)
+            if self.unsolvable_reason is not None:
+                return False
+        key: str | None = None
+        if self.cache is not None:
+            key = self.board.canonical_key()
+            cached = self.cache.get(key)
+            if cached is not None:
+                solved, steps = cached
+                self.solution_steps = steps
+                self.from_cache = True
+                return solved
+        original_board = self.board
+        working_board = original_board.copy()
+        self.board = working_board
+        self.variables = self._ordered_variables()
         try:
-            return self._backtrack(self.variables, self.assignment, [])
+            solved = self._backtrack(self.variables, self.assignment, [])
+        except SearchInterrupted:
+            self.cancelled = self._cancel_event.is_set()
+            self.limit_reached = not self.cancelled
+            self.solution_steps = []
+            return False
         finally:
             self.board = original_board
+        if self.cache is not None and key is not None:
+            self.cache.put(key, solved, self.solution_steps)
+        return solved
 
     def _backtrack(
         self,
@@ -48,16 +164,35 @@ class BTSolver:
         assignment: Dict[PIECE_COLOR, Placement],
         path: List[tuple[PIECE_COLOR, Placement]],
     ) -> bool:
+        if self._cancel_event.is_set():
+            raise SearchInterrupted
+        if self.node_limit is not None and self.nodes_visited >= self.node_limit:
+            raise SearchInterrupted
         self.nodes_visited += 1
+        trace = self.trace
+        mark = len(path)
+        domains = self._propagate(path)
+        if domains is None:
+            self._unwind(path, mark)
+            return False
+        if len(path) > mark:
+            remaining = [p for p in remaining if p in self.board.available]
+        depth = len(path)
         if not remaining:
             self.solution_steps = list(path)
+            if trace is not None:
+                trace.solved(depth)
             return True
-        piece = self._select_variable(remaining)
-        for placement in self._domain_for(piece):
+        piece = self._select_variable(remaining, domains)
+        for placement in self._value_order(piece, domains.get(piece)):
             self.placements_tested += 1
+            if trace is not None:
+                trace.tried(depth, piece, placement)
             if self._consistent(piece, placement):
                 self._commit(piece, placement)
                 assignment[piece] = placement
+                if trace is not None:
+                    trace.committed(depth, piece, placement)
 
                 next_vars: List[PIECE_COLOR] = [p for p in remaining if p != piece]
                 path.append((piece, placement))
@@ -66,20 +201,109 @@ class BTSolver:
                 path.pop()
                 assignment.pop(piece, None)
                 self._undo(piece)
+                if trace is not None:
+                    trace.backtracked(depth, piece, placement)
+            elif trace is not None:
+                trace.pruned(depth, piece, placement)
+        self._unwind(path, mark)
         return False
 
+    def _propagate(self, path: List[tuple[PIECE_COLOR, Placement]]) -> Dict[PIECE_COLOR, List[Placement]] | None:
+        """Commit forced placements until none is left; None on a contradiction.
+
+        Each forced placement is appended to ``path``, which doubles as the
+        undo trail: ``_unwind(path, mark)`` takes back everything past
+        ``mark``, forced or chosen. Otherwise returns the domains of the
+        remaining pieces from the last pass, which found nothing forced, so
+        variable selection and value ordering need not rebuild them (empty
+        when propagation is off).
+        """
+        if not self.config.propagate:
+            return {}
+        board = self.board
+        cells = board.cells
+        cols = board.nb_cols
+        while True:
+            remaining = [p for p in board.available if p != "empty"]
+            if not remaining:
+                return {}
+            forced: tuple[PIECE_COLOR, Placement] | None = None
+            cover = [0] * len(cells)
+            owner: List[tuple[PIECE_COLOR, Placement] | None] = [None] * len(cells)
+            domains: Dict[PIECE_COLOR, List[Placement]] = {}
+            for piece in remaining:
+                domain = self._domain_for(piece)
+                if not domain:
+                    return None
+                domains[piece] = domain
+                if len(domain) == 1 and forced is None:
+                    forced = (piece, domain[0])
+                for placement in domain:
+                    row, col, rotation, flip_h, flip_v = placement
+                    for dr, dc in _OFFSETS[piece, rotation, flip_h, flip_v]:
+                        index = (row + dr) * cols + col + dc
+                        cover[index] += 1
+                        owner[index] = (piece, placement)
+            if forced is None:
+                for index, cell in enumerate(cells):
+                    if cell:
+                        continue
+                    if not cover[index]:
+                        return None
+                    if cover[index] == 1:
+                        forced = owner[index]
+                        break
+            if forced is None:
+                return domains
+            piece, placement = forced
+            self.placements_tested += 1
+            trace = self.trace
+            if trace is not None:
+                trace.tried(len(path), piece, placement)
+            if not self._consistent(piece, placement):
+                if trace is not None:
+                    trace.pruned(len(path), piece, placement)
+                return None
+            if trace is not None:
+                trace.committed(len(path), piece, placement)
+            self._commit(piece, placement)
+            self.assignment[piece] = placement
+            path.append(forced)
+            self.forced_moves += 1
+
+    def _unwind(self, path: List[tuple[PIECE_COLOR, Placement]], mark: int) -> None:
+        """Undo the placements in ``path`` beyond index ``mark``, newest first."""
+        while len(path) > mark:
+            piece, placement = path.pop()
+            self.assignment.pop(piece, None)
+            self._undo(piece)
+            if self.trace is not None:
+                self.trace.backtracked(len(path), piece, placement)
+
     def _ordered_variables(self) -> List[PIECE_COLOR]:
+        order = self.config.variable_order
+        if order == "name":
+            return sorted(self.board.available)
+        sign = 1 if order == "small" else -1
         return sorted(
             self.board.available,
-            key=lambda color: (-self._piece_sizes.get(color, 0), color),
+            key=lambda color: (sign * self._piece_sizes.get(color, 0), color),
         )
 
-    def _select_variable(self, variables: Sequence[PIECE_COLOR]) -> PIECE_COLOR:
+    def _select_variable(
+        self,
+        variables: Sequence[PIECE_COLOR],
+        domains: Dict[PIECE_COLOR, List[Placement]] | None = None,
+    ) -> PIECE_COLOR:
+        """MRV choice among ``variables``; ``domains`` holds any already computed."""
         best_piece = variables[0]
+        if not self.config.mrv:
+            return best_piece
+        known = domains or {}
         best_count: int | None = None
         for piece in variables:
-            placements = list(self._domain_for(piece))
-            count = len(placements)
+            domain = known.get(piece)
+            count = len(self._domain_for(piece) if domain is None else domain)
             if count == 0:
                 return piece
             if best_count is None or count < best_count:
@@ -87,23 +311,33 @@ class BTSolver:
                 best_count = count
         return best_piece
 
-    def _domain_for(self, piece: PIECE_COLOR) -> Iterable[Placement]:
+    def _domain_for(self, piece: PIECE_COLOR) -> List[Placement]:
+        board = self.board
+        if piece not in board.available:
+            return []
+        cells = board.cells
+        cols = board.nb_cols
+        code = PIECE_CODES[piece]
         placements: List[Placement] = []
-        seen_orientations: set[tuple[tuple[int, int], ...]] = set()
-        for rotation in (0, 90, 180, 270):
-            for flip_h in (False, True):
-                for flip_v in (False, True):
-                    try:
-                        offsets = self.board.transform_piece(piece, rotation, flip_h, flip_v)
-                    except ValueError:
-                        continue
-                    if offsets in seen_orientations:
-                        continue
-                    seen_orientations.add(offsets)
-                    for row in range(self.board.nb_rows):
-                        for col in range(self.board.nb_cols):
-                            if self.board.can_place_piece(piece, row, col, rotation, flip_h, flip_v):
-                                placements.append((row, col, rotation, flip_h, flip_v))
+        for rotation, flip_h, flip_v, offsets, height, width in _ORIENTATIONS[piece]:
+            for row in range(board.nb_rows - height + 1):
+                for col in range(cols - width + 1):
+                    for dr, dc in offsets:
+                        cell = cells[(row + dr) * cols + col + dc]
+                        if cell and cell != code:
+                            break
+                    else:
+                        placements.append((row, col, rotation, flip_h, flip_v))
+        return placements
+
+    def _value_order(self, piece: PIECE_COLOR, domain: Sequence[Placement] | None = None) -> List[Placement]:
+        """Domain of ``piece`` (``domain`` when already computed) in the order the search should try it."""
+        placements = list(self._domain_for(piece) if domain is None else domain)
+        if self.config.value_seed is not None:
+            rng = random.Random(f"{self.config.value_seed}:{self.board.canonical_key()}:{piece}")
+            rng.shuffle(placements)
+        if self._value_orderer is not None:
+            placements = self._value_orderer.order(self.board, piece, placements)
         return placements
 
     def _consistent(self, piece: PIECE_COLOR, placement: Placement) -> bool:
@@ -0,0 +1,116 @@
+"""Persistent solve-result cache backed by a local SQLite file."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, List, Tuple
+
+from game_logic import NB_COLS, NB_ROWS, PIECE_COLOR, PIECE_DIMENSIONS
+
+if TYPE_CHECKING:
+    # Type-only: solver.tables imports this module, and bt_solver imports solver.tables.
+    from solver.bt_solver import Placement
+
+CachedResult = Tuple[bool, List[Tuple[PIECE_COLOR, "Placement"]]]
+
+
+def piece_set_version() -> str:
+    """Fingerprint of the board geometry and piece shapes.
+
+    Cached results are only valid for the piece set that produced them, so the
+    cache drops every entry when this value changes.
+    """
+    payload = repr((NB_ROWS, NB_COLS, sorted(PIECE_DIMENSIONS.items()))).encode()
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def default_cache_path() -> str:
+    """Location of the shared cache file (override with ``IQ_PUZZLER_CACHE_DIR``)."""
+    base = os.environ.get("IQ_PUZZLER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "iq_puzzler")
+    return os.path.join(base, "solve_cache.sqlite3")
+
+
+class SolveCache:
+    """Size-bounded LRU store of solve results keyed by ``Board.canonical_key``.
+
+    An entry records either the solution steps or that the layout is unsolvable.
+    The connection is shared between threads behind a lock so the GUI solver
+    thread and the main thread can both use one instance.
+    """
+
+    def __init__(self, path: str = ":memory:", max_entries: int = 50_000):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.version = piece_set_version()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS solves ("
+            " key TEXT PRIMARY KEY,"
+            " solved INTEGER NOT NULL,"
+            " steps TEXT NOT NULL,"
+            " last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS solves_last_used ON solves (last_used)")
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or row[0] != self.version:
+            self._conn.execute("DELETE FROM solves")
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (self.version,))
+        self._conn.commit()
+        self._tick = self._conn.execute("SELECT COALESCE(MAX(last_used), 0) FROM solves").fetchone()[0]
+
+    def get(self, key: str) -> CachedResult | None:
+        """Return ``(solved, steps)`` for ``key`` or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT solved, steps FROM solves WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._tick += 1
+            self._conn.execute("UPDATE solves SET last_used = ? WHERE key = ?", (self._tick, key))
+            self._conn.commit()
+        solved, steps_json = row
+        steps = [(color, (r, c, rot, bool(fh), bool(fv))) for color, r, c, rot, fh, fv in json.loads(steps_json)]
+        return bool(solved), steps
+
+    def put(self, key: str, solved: bool, steps: List[Tuple[PIECE_COLOR, Placement]]) -> None:
+        """Store a result, evicting the least recently used entries past the bound."""
+        payload = json.dumps([[color, *placement] for color, placement in steps])
+        with self._lock:
+            self._tick += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO solves (key, solved, steps, last_used) VALUES (?, ?, ?, ?)",
+                (key, int(solved), payload, self._tick),
+            )
+            excess = self._conn.execute("SELECT COUNT(*) FROM solves").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM solves WHERE key IN (SELECT key FROM solves ORDER BY last_used ASC LIMIT ?)",
+                    (excess,),
+                )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM solves")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM solves").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM solves WHERE key = ?", (key,)).fetchone() is not None
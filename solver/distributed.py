@@ -0,0 +1,459 @@
+"""Distributed work-stealing enumeration over TCP.
+
+A ``Coordinator`` owns one board and a queue of work units. Each unit is a
+subtree of the IterativeSolver search: the steps leading to it (``prefix``)
+plus a piece and the placements of that piece still to try (or the whole
+board for the first unit). Workers connect, take a unit, stream back
+solutions and a node count, then ask for more. When a worker goes idle and
+the queue is empty, the coordinator asks busy workers to ``split``; each
+splits its own search with ``IterativeSolver.donate`` and sends the
+donated half back as a new unit.
+
+The wire format is one JSON object per line. Worker to coordinator:
+``hello``, ``request``, ``solution``, ``donate``, ``finished``.
+Coordinator to worker: ``board``, ``work``, ``split``, ``done``.
+
+A worker that disconnects mid-unit loses nothing: the coordinator holds a
+unit's solutions until the unit and the one it was donated from are
+complete, so it can throw away everything reported from the dropped
+subtree, including units donated out of it, and requeue the whole unit.
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import json
+import select
+import socket
+import socketserver
+import sys
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Sequence, Tuple
+
+from game_logic import PIECE_COLOR
+from game_logic.board import Board
+from solver.bt_solver import Placement
+from solver.iterative import IterativeSolver
+
+Step = Tuple[PIECE_COLOR, Placement]
+
+
+def _encode_steps(steps: Sequence[Step]) -> List[list]:
+    return [[color, *placement] for color, placement in steps]
+
+
+def _decode_steps(data: Sequence[list]) -> List[Step]:
+    return [(color, (row, col, rotation, bool(flip_h), bool(flip_v))) for color, row, col, rotation, flip_h, flip_v in data]
+
+
+class _Channel:
+    """Line-delimited JSON over a socket; ``send`` is safe from several threads."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._buffer = bytearray()
+        self._send_lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        data = json.dumps(message, separators=(",", ":")).encode() + b"\n"
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def _pop_line(self) -> Dict[str, Any] | None:
+        end = self._buffer.find(b"\n")
+        if end < 0:
+            return None
+        line = bytes(self._buffer[:end])
+        del self._buffer[: end + 1]
+        return json.loads(line)
+
+    def recv(self) -> Dict[str, Any] | None:
+        """Next message, blocking; None once the peer has closed the connection."""
+        while True:
+            message = self._pop_line()
+            if message is not None:
+                return message
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                return None
+            self._buffer += chunk
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Messages that have already arrived, without blocking."""
+        messages: List[Dict[str, Any]] = []
+        while select.select([self.sock], [], [], 0)[0]:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                break
+            self._buffer += chunk
+        while (message := self._pop_line()) is not None:
+            messages.append(message)
+        return messages
+
+
+class _Unit:
+    """A work unit and what has been reported for it but not yet committed.
+
+    A unit commits once it is finished and its ``parent`` (the unit it was
+    donated from, None once that has committed) has committed; until then a
+    requeue of an ancestor would search its subtree again, so its results
+    are held back.
+    """
+
+    __slots__ = ("spec", "parent", "children", "solutions", "solution_count", "nodes", "finished", "void")
+
+    def __init__(self, spec: Dict[str, Any], parent: "_Unit | None"):
+        self.spec = spec
+        self.parent = parent
+        self.children: List[_Unit] = []
+        self.solutions: List[List[Step]] = []
+        self.solution_count = 0
+        self.nodes = 0
+        self.finished = False
+        self.void = False
+
+    @property
+    def id(self) -> int:
+        return self.spec["id"]
+
+
+class Coordinator:
+    """Hand out subtrees of one board's search to TCP workers and gather the results.
+
+    ``start`` begins listening in a background thread (``port=0`` picks a
+    free port, see ``address``); ``wait`` blocks until every unit has been
+    searched. With ``collect_solutions=False`` workers only report counts.
+    Solutions go to ``on_solution`` (called from connection threads) when
+    given, and are kept in ``solutions`` otherwise. Units whose worker
+    disconnected are searched again from scratch (``requeued_units``).
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        collect_solutions: bool = True,
+        on_solution: Callable[[List[Step]], None] | None = None,
+    ):
+        self.board_key = board.canonical_key()
+        self.collect_solutions = collect_solutions
+        self.on_solution = on_solution
+        self.solutions: List[List[Step]] = []
+        self.solution_count = 0
+        self.nodes_visited = 0
+        self.units_done = 0
+        self.steals = 0
+        self.requeued_units = 0
+        # Units neither committed nor void, by id; _outstanding counts them.
+        self._units: Dict[int, _Unit] = {}
+        self._pending: Deque[_Unit] = collections.deque()
+        self._next_id = 0
+        self._outstanding = 0
+        self._new_unit({"prefix": [], "piece": None, "placements": []}, None)
+        self._busy: Dict[_Channel, int] = {}
+        self._split_asked: set[_Channel] = set()
+        self._state = threading.Condition()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler_class(), bind_and_activate=True)
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    @property
+    def finished(self) -> bool:
+        with self._state:
+            return self._outstanding == 0
+
+    def start(self) -> "Coordinator":
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the search is complete; False if ``timeout`` ran out first."""
+        with self._state:
+            return self._state.wait_for(lambda: self._outstanding == 0, timeout)
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "Coordinator":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def _handler_class(self):
+        coordinator = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                coordinator._serve(_Channel(self.request))
+
+        return Handler
+
+    # --- Per-connection protocol ---
+    def _serve(self, channel: _Channel) -> None:
+        try:
+            hello = channel.recv()
+            if hello is None or hello.get("op") != "hello":
+                return
+            channel.send({"op": "board", "key": self.board_key, "solutions": self.collect_solutions})
+            while True:
+                message = channel.recv()
+                if message is None:
+                    return
+                op = message.get("op")
+                if op == "request":
+                    unit = self._next_unit(channel)
+                    channel.send({"op": "work", "unit": unit} if unit is not None else {"op": "done"})
+                    if unit is None:
+                        return
+                elif op == "solution":
+                    self._add_solution(channel, _decode_steps(message["steps"]))
+                elif op == "donate":
+                    self._add_units(channel, message["units"])
+                elif op == "finished":
+                    for steps in self._finish_unit(channel, message):
+                        self.on_solution(steps)
+        except (OSError, ValueError):
+            return
+        finally:
+            self._drop(channel)
+
+    def _new_unit(self, spec: Dict[str, Any], parent: _Unit | None) -> _Unit:
+        """Queue a unit; call with ``_state`` held."""
+        unit = _Unit({**spec, "id": self._next_id}, parent)
+        self._next_id += 1
+        if parent is not None:
+            parent.children.append(unit)
+        self._units[unit.id] = unit
+        self._pending.append(unit)
+        self._outstanding += 1
+        return unit
+
+    def _running(self, channel: _Channel) -> _Unit | None:
+        """The live unit ``channel`` is searching, if any; call with ``_state`` held."""
+        uid = self._busy.get(channel)
+        return None if uid is None else self._units.get(uid)
+
+    def _next_unit(self, channel: _Channel) -> Dict[str, Any] | None:
+        with self._state:
+            while True:
+                while self._pending and self._pending[0].void:
+                    self._pending.popleft()
+                if self._pending:
+                    unit = self._pending.popleft()
+                    self._busy[channel] = unit.id
+                    return unit.spec
+                if self._outstanding == 0:
+                    return None
+                for busy, uid in list(self._busy.items()):
+                    if busy not in self._split_asked and uid in self._units:
+                        self._split_asked.add(busy)
+                        try:
+                            busy.send({"op": "split"})
+                        except OSError:
+                            continue
+                self._state.wait(0.05)
+
+    def _add_units(self, channel: _Channel, units: Sequence[Dict[str, Any]]) -> None:
+        with self._state:
+            self._split_asked.discard(channel)
+            parent = self._running(channel)
+            if parent is not None:
+                for unit in units:
+                    self._new_unit(unit, parent)
+                self.steals += len(units)
+            self._state.notify_all()
+
+    def _add_solution(self, channel: _Channel, steps: List[Step]) -> None:
+        with self._state:
+            unit = self._running(channel)
+            if unit is not None:
+                unit.solutions.append(steps)
+
+    def _finish_unit(self, channel: _Channel, message: Dict[str, Any]) -> List[List[Step]]:
+        """Record a finished unit; return the solutions to pass to ``on_solution``."""
+        with self._state:
+            unit = self._running(channel)
+            self._busy.pop(channel, None)
+            self._split_asked.discard(channel)
+            self._state.notify_all()
+            if unit is None:
+                return []
+            unit.finished = True
+            unit.nodes = message["nodes"]
+            unit.solution_count = len(unit.solutions) if self.collect_solutions else message["solutions"]
+            if unit.parent is not None:
+                return []
+            return self._commit(unit)
+
+    def _commit(self, unit: _Unit) -> List[List[Step]]:
+        """Commit ``unit`` and its finished descendants; call with ``_state`` held."""
+        emitted: List[List[Step]] = []
+        ready = [unit]
+        while ready:
+            unit = ready.pop()
+            del self._units[unit.id]
+            self._outstanding -= 1
+            self.units_done += 1
+            self.nodes_visited += unit.nodes
+            self.solution_count += unit.solution_count
+            if self.on_solution is None:
+                self.solutions.extend(unit.solutions)
+            else:
+                emitted.extend(unit.solutions)
+            unit.solutions = []
+            for child in unit.children:
+                # Nothing above the child can be requeued any more.
+                child.parent = None
+                if child.finished:
+                    ready.append(child)
+            unit.children = []
+        return emitted
+
+    def _drop(self, channel: _Channel) -> None:
+        with self._state:
+            self._split_asked.discard(channel)
+            unit = self._running(channel)
+            self._busy.pop(channel, None)
+            if unit is None:
+                return
+            # Void the unit and every unit donated out of it, then search it all again.
+            doomed = [unit]
+            while doomed:
+                lost = doomed.pop()
+                lost.void = True
+                del self._units[lost.id]
+                self._outstanding -= 1
+                doomed.extend(lost.children)
+            if unit.parent is not None:
+                unit.parent.children.remove(unit)
+            spec = {key: value for key, value in unit.spec.items() if key != "id"}
+            self._new_unit(spec, unit.parent)
+            self.requeued_units += 1
+            self._state.notify_all()
+
+
+def run_worker(host: str, port: int, batch_nodes: int = 200) -> Dict[str, int]:
+    """Connect to a coordinator and search units until it says ``done``.
+
+    Between batches of ``batch_nodes`` nodes the worker answers ``split``
+    requests by donating half of its shallowest untried range.
+    """
+    stats = {"units": 0, "nodes": 0, "solutions": 0, "donated": 0}
+    with socket.create_connection((host, port)) as sock:
+        channel = _Channel(sock)
+        channel.send({"op": "hello"})
+        greeting = channel.recv()
+        if greeting is None:
+            return stats
+        root = Board.from_canonical_key(greeting["key"])
+        stream = greeting["solutions"]
+        while True:
+            channel.send({"op": "request"})
+            message = channel.recv()
+            while message is not None and message.get("op") == "split":
+                # A stale split request sent while this worker was between units.
+                channel.send({"op": "donate", "units": []})
+                message = channel.recv()
+            if message is None or message.get("op") != "work":
+                return stats
+            unit = message["unit"]
+            prefix = _decode_steps(unit["prefix"])
+            board = root.copy()
+            for color, placement in prefix:
+                board.place_piece(color, *placement)
+                board.available.remove(color)
+            solver = IterativeSolver(board)
+            if unit["piece"] is None:
+                solver.start()
+            else:
+                solver.start_subtree(unit["piece"], [tuple(p) for p in unit["placements"]])
+
+            def emit(steps: List[Step]) -> None:
+                if stream:
+                    channel.send({"op": "solution", "steps": _encode_steps(prefix + steps)})
+
+            while solver.run(max_nodes=batch_nodes, on_solution=emit) != "exhausted":
+                for request in channel.poll():
+                    if request.get("op") != "split":
+                        continue
+                    donated = solver.donate()
+                    units = []
+                    if donated is not None:
+                        sub_prefix, piece, placements = donated
+                        units.append({
+                            "prefix": _encode_steps(prefix + sub_prefix),
+                            "piece": piece,
+                            "placements": [list(p) for p in placements],
+                        })
+                        stats["donated"] += 1
+                    channel.send({"op": "donate", "units": units})
+            channel.send({"op": "finished", "id": unit["id"], "nodes": solver.nodes_visited,
+                          "solutions": solver.solutions_found})
+            stats["units"] += 1
+            stats["nodes"] += solver.nodes_visited
+            stats["solutions"] += solver.solutions_found
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run a work-stealing coordinator for one board, or a worker for one."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    coordinate = commands.add_parser("coordinator", help="serve a board's search to workers")
+    coordinate.add_argument("board", help="board as printed by Board.canonical_key")
+    coordinate.add_argument("--host", default="127.0.0.1",
+                            help="interface to listen on; the protocol is unauthenticated, so only "
+                                 "pass 0.0.0.0 on a trusted network")
+    coordinate.add_argument("--port", type=int, default=5555)
+    coordinate.add_argument("--output", help="JSONL file receiving one solution per line (default: count only)")
+    work = commands.add_parser("worker", help="search units for a coordinator")
+    work.add_argument("--host", default="127.0.0.1")
+    work.add_argument("--port", type=int, default=5555)
+    work.add_argument("--batch", type=int, default=200, help="nodes between split checks")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        print(json.dumps(run_worker(args.host, args.port, batch_nodes=args.batch)), file=sys.stderr)
+        return 0
+
+    out = open(args.output, "w") if args.output else None
+    lock = threading.Lock()
+
+    def write_solution(steps: List[Step]) -> None:
+        with lock:
+            out.write(json.dumps(_encode_steps(steps)) + "\n")
+
+    coordinator = Coordinator(
+        Board.from_canonical_key(args.board),
+        host=args.host,
+        port=args.port,
+        collect_solutions=out is not None,
+        on_solution=write_solution if out is not None else None,
+    )
+    start = time.perf_counter()
+    with coordinator:
+        print(f"listening on {coordinator.address[0]}:{coordinator.address[1]}", file=sys.stderr)
+        coordinator.wait()
+    if out is not None:
+        out.close()
+    print(json.dumps({
+        "solutions": coordinator.solution_count,
+        "nodes": coordinator.nodes_visited,
+        "units": coordinator.units_done,
+        "steals": coordinator.steals,
+        "requeued_units": coordinator.requeued_units,
+        "seconds": round(time.perf_counter() - start, 3),
+    }), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,499 @@
+"""Solver engine interface, registry and automatic engine selection."""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Callable, ClassVar, Dict, FrozenSet, Iterable, List, Sequence, Tuple, Type
+
+from game_logic import PIECE_COLOR
+from game_logic.board import Board
+from solver.bt_solver import BTSolver, Placement, SolverConfig
+from solver.cache import SolveCache, default_cache_path
+from solver.iterative import IterativeSolver
+from solver.kernel import KernelSolver
+from solver.portfolio import PortfolioSolver
+from solver.trace import TraceWriter
+
+Step = Tuple[PIECE_COLOR, Placement]
+SolutionCallback = Callable[[List[Step]], None]
+
+# Capability names an engine may declare.
+SOLVE = "solve"
+ENUMERATE = "enumerate"
+COUNT = "count"
+CANCEL = "cancel"
+CACHE = "cache"
+NODE_LIMIT = "node_limit"
+TRACE = "trace"
+PARALLEL = "parallel"
+
+
+@dataclass(frozen=True)
+class SolveStats:
+    """What the last ``solve``/``enumerate``/``count`` call did."""
+
+    engine: str
+    nodes: int = 0
+    placements: int = 0
+    steps: int = 0
+    cached: bool = False
+    cancelled: bool = False
+    limit_reached: bool = False
+    # Set when an invariant proved the board unsolvable without a search.
+    unsolvable_reason: str | None = None
+    # Placements made by forced-move propagation rather than branching.
+    forced: int = 0
+
+
+class SolverEngine(ABC):
+    """Common contract for every solver the application can run.
+
+    ``solve`` leaves a tiling in ``solution_steps``. ``enumerate`` and
+    ``count`` visit every tiling (up to ``limit``) and are only available
+    when the engine lists them in ``capabilities``. ``trace`` may be set to a
+    TraceWriter before a solve; engines without the ``trace`` capability
+    ignore it. ``cancel`` may be called from another thread.
+    """
+
+    name: ClassVar[str]
+    capabilities: ClassVar[FrozenSet[str]]
+
+    def __init__(self, board: Board, cache: SolveCache | None = None, node_limit: int | None = None):
+        self.board = board
+        self.cache = cache
+        self.node_limit = node_limit
+        self.trace: TraceWriter | None = None
+        self.solution_steps: List[Step] = []
+
+    @abstractmethod
+    def solve(self) -> bool:
+        ...
+
+    @abstractmethod
+    def stats(self) -> SolveStats:
+        ...
+
+    def cancel(self) -> None:
+        raise NotImplementedError(f"{self.name} cannot be cancelled")
+
+    def enumerate(self, on_solution: SolutionCallback, limit: int | None = None) -> int:
+        raise NotImplementedError(f"{self.name} cannot enumerate solutions")
+
+    def count(self, limit: int | None = None) -> int:
+        if ENUMERATE not in self.capabilities:
+            raise NotImplementedError(f"{self.name} cannot count solutions")
+        return self.enumerate(lambda _steps: None, limit)
+
+
+ENGINES: Dict[str, Type[SolverEngine]] = {}
+
+
+def register_engine(cls: Type[SolverEngine]) -> Type[SolverEngine]:
+    """Class decorator adding an engine to the registry under ``cls.name``."""
+    ENGINES[cls.name] = cls
+    return cls
+
+
+def create_engine(name: str, board: Board, cache: SolveCache | None = None,
+                  node_limit: int | None = None) -> SolverEngine:
+    try:
+        engine_cls = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"unknown solver engine {name!r}; known: {sorted(ENGINES)}") from None
+    return engine_cls(board, cache=cache, node_limit=node_limit)
+
+
+def engines_with(*capabilities: str) -> List[str]:
+    """Names of the registered engines declaring every one of ``capabilities``."""
+    return [name for name, cls in ENGINES.items() if cls.capabilities.issuperset(capabilities)]
+
+
+# --- Built-in engines ---
+@register_engine
+class BacktrackingEngine(SolverEngine):
+    """The recursive CSP search (BTSolver), trying placements in the ``combined`` value order."""
+
+    name = "backtracking"
+    capabilities = frozenset({SOLVE, CANCEL, CACHE, NODE_LIMIT, TRACE})
+    config = SolverConfig(name="backtracking", value_order="combined")
+
+    def __init__(self, board: Board, cache: SolveCache | None = None, node_limit: int | None = None):
+        super().__init__(board, cache, node_limit)
+        self._solver = BTSolver(board, cache=cache, node_limit=node_limit, config=self.config)
+
+    def solve(self) -> bool:
+        self._solver.trace = self.trace
+        try:
+            solved = self._solver.solve()
+        finally:
+            self._solver.trace = None
+        self.solution_steps = self._solver.solution_steps
+        return solved
+
+    def cancel(self) -> None:
+        self._solver.cancel()
+
+    def stats(self) -> SolveStats:
+        solver = self._solver
+        return SolveStats(self.name, solver.nodes_visited, solver.placements_tested, len(solver.solution_steps),
+                          solver.from_cache, solver.cancelled, solver.limit_reached,
+                          solver.unsolvable_reason, solver.forced_moves)
+
+
+@register_engine
+class IterativeEngine(SolverEngine):
+    """The explicit-stack search; same tree as BTSolver, but it can enumerate."""
+
+    name = "iterative"
+    capabilities = frozenset({SOLVE, ENUMERATE, COUNT, CANCEL, CACHE, NODE_LIMIT})
+
+    def __init__(self, board: Board, cache: SolveCache | None = None, node_limit: int | None = None):
+        super().__init__(board, cache, node_limit)
+        self._solver = IterativeSolver(board, cache=cache, node_limit=node_limit)
+
+    def solve(self) -> bool:
+        solved = self._solver.solve()
+        self.solution_steps = self._solver.solution_steps
+        return solved
+
+    def enumerate(self, on_solution: SolutionCallback, limit: int | None = None) -> int:
+        solver = IterativeSolver(self.board, node_limit=self.node_limit)
+        self._solver = solver
+        while (status := solver.run()) == "solved":
+            on_solution(list(solver.solution_steps))
+            if limit is not None and solver.solutions_found >= limit:
+                break
+        solver.cancelled = status == "paused" and solver.pause_requested
+        solver.limit_reached = status == "paused" and not solver.pause_requested
+        return solver.solutions_found
+
+    def cancel(self) -> None:
+        self._solver.cancel()
+
+    def stats(self) -> SolveStats:
+        solver = self._solver
+        return SolveStats(self.name, solver.nodes_visited, solver.placements_tested, len(solver.solution_steps),
+                          solver.from_cache, solver.cancelled, solver.limit_reached,
+                          solver.unsolvable_reason, solver.forced_moves)
+
+
+@register_engine
+class KernelEngine(SolverEngine):
+    """The bitmask exact-cover kernel; fastest on most boards."""
+
+    name = "kernel"
+    capabilities = frozenset({SOLVE, ENUMERATE, COUNT, CANCEL, CACHE, NODE_LIMIT, TRACE})
+
+    def __init__(self, board: Board, cache: SolveCache | None = None, node_limit: int | None = None):
+        super().__init__(board, cache, node_limit)
+        self._solver = KernelSolver(board, cache=cache, node_limit=node_limit)
+
+    def solve(self) -> bool:
+        self._solver.trace = self.trace
+        try:
+            solved = self._solver.solve()
+        finally:
+            self._solver.trace = None
+        self.solution_steps = self._solver.solution_steps
+        return solved
+
+    def enumerate(self, on_solution: SolutionCallback, limit: int | None = None) -> int:
+        return self._solver.enumerate(on_solution, limit)
+
+    def count(self, limit: int | None = None) -> int:
+        return self._solver.count(limit)
+
+    def cancel(self) -> None:
+        self._solver.cancel()
+
+    def stats(self) -> SolveStats:
+        solver = self._solver
+        return SolveStats(self.name, solver.nodes_visited, solver.placements_tested, len(solver.solution_steps),
+                          solver.from_cache, solver.cancelled, solver.limit_reached,
+                          solver.unsolvable_reason)
+
+
+@register_engine
+class PortfolioEngine(SolverEngine):
+    """Several BTSolver configurations raced in separate processes.
+
+    Races are logged to ``default_portfolio_log_path()``, so the
+    configurations that win most often run first when not all of them fit.
+    """
+
+    name = "portfolio"
+    capabilities = frozenset({SOLVE, CANCEL, CACHE, NODE_LIMIT, PARALLEL})
+
+    def __init__(self, board: Board, cache: SolveCache | None = None, node_limit: int | None = None):
+        super().__init__(board, cache, node_limit)
+        self._solver = PortfolioSolver(board, cache=cache, node_limit=node_limit,
+                                       log_path=default_portfolio_log_path())
+
+    def solve(self) -> bool:
+        solved = self._solver.solve()
+        self.solution_steps = self._solver.solution_steps
+        return solved
+
+    def cancel(self) -> None:
+        self._solver.cancel()
+
+    def stats(self) -> SolveStats:
+        solver = self._solver
+        return SolveStats(self.name, solver.nodes_visited, solver.placements_tested, len(solver.solution_steps),
+                          solver.from_cache, solver.cancelled, solver.limit_reached,
+                          solver.unsolvable_reason, solver.forced_moves)
+
+
+# --- Automatic selection ---
+@dataclass(frozen=True)
+class BoardFeatures:
+    """Cheap descriptors of a board used to pick an engine.
+
+    Only the number of pieces left: the empty area follows from which pieces
+    they are, and the calibration found nothing else worth keying on.
+    """
+
+    pieces_left: int
+
+    @classmethod
+    def of(cls, board: Board) -> "BoardFeatures":
+        return cls(pieces_left=len(board.available))
+
+
+@dataclass(frozen=True)
+class SelectionRule:
+    """Use ``engine`` on boards with at most ``max_pieces`` pieces left to place."""
+
+    max_pieces: int
+    engine: str
+
+
+# From ``python -m solver.engines calibrate --boards 10`` over 1-12 pieces
+# left: the kernel had the lowest median time at every piece count, by 2-4x
+# with one or two pieces left and by 8-60x from four pieces up.
+#
+# "auto" therefore never runs BTSolver, and with it neither forced-move
+# propagation (``SolverConfig.propagate``) nor value ordering
+# (``SolverConfig.value_order``); the GUI solves through "auto". Those
+# options serve the "backtracking", "iterative" and "portfolio" engines and
+# the batch tools, which can select them by name.
+DEFAULT_RULES: Tuple[SelectionRule, ...] = (
+    SelectionRule(max_pieces=12, engine="kernel"),
+)
+
+
+def default_rules_path() -> str:
+    return os.path.join(os.path.dirname(default_cache_path()), "engine_rules.json")
+
+
+def default_portfolio_log_path() -> str:
+    return os.path.join(os.path.dirname(default_cache_path()), "portfolio_races.jsonl")
+
+
+class EngineSelector:
+    """Pick the engine expected to be fastest for a board.
+
+    Rules key only on the number of pieces left (see ``BoardFeatures``).
+    They are checked in order of ``max_pieces``; the first one covering the
+    board's remaining piece count wins, provided its engine has the required
+    capabilities. Rules come from ``calibrate`` over benchmark records, or
+    from a JSON file written by ``save``.
+    """
+
+    def __init__(self, rules: Sequence[SelectionRule] = DEFAULT_RULES, fallback: str = "kernel"):
+        self.rules = sorted(rules, key=lambda rule: rule.max_pieces)
+        self.fallback = fallback
+
+    def select(self, board: Board, needs: Iterable[str] = (SOLVE,)) -> str:
+        features = BoardFeatures.of(board)
+        needed = frozenset(needs)
+        for rule in self.rules:
+            if features.pieces_left <= rule.max_pieces and rule.engine in ENGINES:
+                if ENGINES[rule.engine].capabilities >= needed:
+                    return rule.engine
+        if ENGINES[self.fallback].capabilities >= needed:
+            return self.fallback
+        candidates = engines_with(*needed)
+        if not candidates:
+            raise ValueError(f"no registered engine supports {sorted(needed)}")
+        return candidates[0]
+
+    @classmethod
+    def calibrate(cls, records: Iterable[Dict[str, object]], fallback: str = "kernel") -> "EngineSelector":
+        """Build rules from ``benchmark`` records.
+
+        For each piece count the engine with the lowest median time wins; a
+        run that hit its node limit counts as slower than any finished run.
+        Neighbouring piece counts with the same winner collapse into one rule.
+        """
+        times: Dict[int, Dict[str, List[float]]] = {}
+        for record in records:
+            seconds = float(record["seconds"]) if record["completed"] else float("inf")
+            times.setdefault(int(record["pieces_left"]), {}).setdefault(str(record["engine"]), []).append(seconds)
+        rules: List[SelectionRule] = []
+        for pieces in sorted(times):
+            best = min(times[pieces].items(), key=lambda item: (statistics.median(item[1]), item[0]))[0]
+            if rules and rules[-1].engine == best:
+                rules[-1] = SelectionRule(pieces, best)
+            else:
+                rules.append(SelectionRule(pieces, best))
+        return cls(rules or DEFAULT_RULES, fallback)
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as handle:
+            json.dump({"fallback": self.fallback, "rules": [asdict(rule) for rule in self.rules]}, handle, indent=2)
+
+    @classmethod
+    def load(cls, path: str | None = None) -> "EngineSelector":
+        """Rules from ``path`` (default: next to the solve cache), or the built-in ones."""
+        try:
+            with open(path or default_rules_path()) as handle:
+                data = json.load(handle)
+            return cls([SelectionRule(**rule) for rule in data["rules"]], data.get("fallback", "kernel"))
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls()
+
+
+@register_engine
+class AutoEngine(SolverEngine):
+    """Delegate each call to the engine an EngineSelector picks for the board.
+
+    ``trace`` is handed to the chosen engine, which records it if it can.
+    """
+
+    name = "auto"
+    capabilities = frozenset({SOLVE, ENUMERATE, COUNT, CANCEL, CACHE, NODE_LIMIT, TRACE})
+
+    def __init__(self, board: Board, cache: SolveCache | None = None, node_limit: int | None = None,
+                 selector: EngineSelector | None = None):
+        super().__init__(board, cache, node_limit)
+        self.selector = selector or EngineSelector.load()
+        self._engine: SolverEngine | None = None
+        self._cancelled = False
+
+    def _pick(self, *needs: str) -> SolverEngine:
+        name = self.selector.select(self.board, needs or (SOLVE,))
+        self._engine = create_engine(name, self.board, cache=self.cache, node_limit=self.node_limit)
+        self._engine.trace = self.trace
+        if self._cancelled:
+            self._engine.cancel()
+        return self._engine
+
+    def solve(self) -> bool:
+        self._cancelled = False
+        engine = self._pick(SOLVE)
+        solved = engine.solve()
+        self.solution_steps = engine.solution_steps
+        return solved
+
+    def enumerate(self, on_solution: SolutionCallback, limit: int | None = None) -> int:
+        self._cancelled = False
+        return self._pick(ENUMERATE).enumerate(on_solution, limit)
+
+    def count(self, limit: int | None = None) -> int:
+        self._cancelled = False
+        return self._pick(COUNT).count(limit)
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        if self._engine is not None and CANCEL in self._engine.capabilities:
+            self._engine.cancel()
+
+    def stats(self) -> SolveStats:
+        if self._engine is None:
+            return SolveStats(self.name)
+        return self._engine.stats()
+
+
+# --- Benchmarks ---
+def benchmark_boards(tilings: int, seed: int = 0) -> List[Board]:
+    """Boards with every remaining-piece count, 1 to 12, cut from ``tilings`` random solved layouts.
+
+    Pieces come off each tiling in the reverse of the order they went on,
+    so the two pieces of the random starting layout are the last to go.
+    """
+    rng = random.Random(seed)
+    pieces = Board(generate=False).available
+    boards: List[Board] = []
+    made = 0
+    while made < tilings:
+        start = Board(generate=False)
+        if not start.generate_puzzle(rng=rng):
+            continue
+        solver = KernelSolver(start)
+        if not solver.solve():
+            continue
+        tiling = start.copy()
+        for color, placement in solver.solution_steps:
+            tiling.place_piece(color, *placement)
+        order = [color for color in pieces if color not in start.available]
+        order += [color for color, _ in solver.solution_steps]
+        for pieces_left in range(1, len(order) + 1):
+            board = tiling.copy()
+            removed = order[len(order) - pieces_left:]
+            for color in removed:
+                board.remove_piece(color)
+            board.available = [color for color in pieces if color in removed]
+            board.history.clear()
+            boards.append(board)
+        made += 1
+    return boards
+
+
+def benchmark(boards: Iterable[Board], engine_names: Sequence[str], node_limit: int = 20_000) -> List[Dict[str, object]]:
+    """Time each engine's ``solve`` on each board (no cache)."""
+    records: List[Dict[str, object]] = []
+    for board in boards:
+        features = BoardFeatures.of(board)
+        for name in engine_names:
+            engine = create_engine(name, board, node_limit=node_limit)
+            start = time.perf_counter()
+            engine.solve()
+            seconds = time.perf_counter() - start
+            stats = engine.stats()
+            records.append({
+                "engine": name,
+                "pieces_left": features.pieces_left,
+                "seconds": round(seconds, 6),
+                "nodes": stats.nodes,
+                "completed": not stats.limit_reached,
+            })
+    return records
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Benchmark the engines and write calibrated selection rules."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    calibrate = commands.add_parser("calibrate")
+    calibrate.add_argument("--boards", type=int, default=10, help="random tilings to cut benchmark boards from")
+    calibrate.add_argument("--engines", default="backtracking,iterative,kernel")
+    calibrate.add_argument("--node-limit", type=int, default=20_000)
+    calibrate.add_argument("--records", help="also write the raw benchmark records (JSONL) here")
+    calibrate.add_argument("--output", default=None, help="rules file (default: next to the solve cache)")
+    calibrate.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    records = benchmark(benchmark_boards(args.boards, args.seed), args.engines.split(","), args.node_limit)
+    if args.records:
+        with open(args.records, "w") as handle:
+            for record in records:
+                handle.write(json.dumps(record) + "\n")
+    selector = EngineSelector.calibrate(records)
+    output = args.output or default_rules_path()
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    selector.save(output)
+    for rule in selector.rules:
+        print(f"<= {rule.max_pieces:2d} pieces left: {rule.engine}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,268 @@
+"""Knuth-style estimates of BTSolver's search-tree size and time, from random probes."""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import math
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Sequence, Tuple
+
+from game_logic.board import Board
+from solver.bt_solver import BTSolver, SolverConfig
+from solver.invariants import get_checker
+from solver.tables import PlacementTables, get_tables
+
+# Two-sided 95% quantile of the normal distribution.
+_Z95 = 1.96
+
+
+@dataclass(frozen=True)
+class TreeEstimate:
+    """Predicted size and cost of BTSolver's search on one board.
+
+    ``nodes`` and ``placements`` estimate the whole tree, which is what a
+    search exploring every branch pays (an unsolvable board, or counting).
+    ``nodes_low``/``nodes_high`` bound the mean with a normal-approximation
+    95% interval over the probes. The estimates are unbiased but
+    heavy-tailed, so a few probes can miss rare deep subtrees. ``solutions``
+    estimates the number of tilings. ``first_solution_nodes`` divides the
+    tree among them, a rough guide to how soon a depth-first search finds
+    one. Seconds use ``seconds_per_placement``, measured once per process
+    on this machine.
+    """
+
+    nodes: float
+    nodes_low: float
+    nodes_high: float
+    placements: float
+    solutions: float
+    probes: int
+    seconds_per_placement: float
+    elapsed: float
+    unsolvable_reason: str | None = None
+
+    @property
+    def seconds(self) -> float:
+        return self.placements * self.seconds_per_placement
+
+    @property
+    def seconds_low(self) -> float:
+        return self.seconds * self.nodes_low / self.nodes if self.nodes else 0.0
+
+    @property
+    def seconds_high(self) -> float:
+        return self.seconds * self.nodes_high / self.nodes if self.nodes else 0.0
+
+    @property
+    def first_solution_nodes(self) -> float:
+        return self.nodes / (1 + self.solutions)
+
+    @property
+    def first_solution_seconds(self) -> float:
+        return self.seconds / (1 + self.solutions)
+
+
+class TreeEstimator:
+    """Random root-to-leaf probes through BTSolver's search tree for ``board``.
+
+    Each probe follows BTSolver's rules on placement bitmasks. At every node
+    it propagates forced placements (when ``config.propagate``), picks a
+    piece by ``config.variable_order`` and MRV, and keeps the placements that
+    pass the solver's consistency check: no empty region smaller than the
+    smallest piece still to place, counting the piece being placed. It then
+    descends into one kept placement at random. With branching factors
+    ``d1, d2, ...`` along the path, ``1 + d1 + d1*d2 + ...`` is an unbiased
+    estimate of the tree's node count (Knuth, 1975). Averaging probes
+    tightens it. Placements tested and solutions reached are weighted the
+    same way.
+    """
+
+    def __init__(self, board: Board, config: SolverConfig | None = None, tables: PlacementTables | None = None):
+        self.board = board
+        self.config = config or SolverConfig()
+        self.tables = tables or get_tables()
+        self._checker = get_checker()
+        self._by_piece, self._near = _placement_index(self.tables, self._checker)
+        order = BTSolver(board, config=self.config)._ordered_variables()
+        self._order = [self.tables.colors.index(color) for color in order if color != "empty"]
+        self._occ = self.tables.occupancy(board)
+
+    def estimate(self, probes: int = 64, time_budget: float | None = 0.005, seed: int | None = 0) -> TreeEstimate:
+        """Average up to ``probes`` probes, stopping early once ``time_budget`` seconds have passed.
+
+        At least two probes always run, so the interval has a width.
+        """
+        rate = seconds_per_placement()
+        start = time.perf_counter()
+        if self.config.invariants:
+            reason = self._checker.check(self.board)
+            if reason is not None:
+                return TreeEstimate(0.0, 0.0, 0.0, 0.0, 0.0, 0, rate, time.perf_counter() - start, reason)
+        rng = random.Random(seed)
+        samples: List[Tuple[float, float, float]] = []
+        while len(samples) < max(probes, 2):
+            samples.append(self._probe(rng))
+            if len(samples) >= 2 and time_budget is not None and time.perf_counter() - start >= time_budget:
+                break
+        count = len(samples)
+        nodes = sum(sample[0] for sample in samples) / count
+        spread = math.sqrt(sum((sample[0] - nodes) ** 2 for sample in samples) / (count - 1))
+        margin = _Z95 * spread / math.sqrt(count)
+        return TreeEstimate(
+            nodes=nodes,
+            nodes_low=max(1.0, nodes - margin),
+            nodes_high=nodes + margin,
+            placements=sum(sample[1] for sample in samples) / count,
+            solutions=sum(sample[2] for sample in samples) / count,
+            probes=count,
+            seconds_per_placement=rate,
+            elapsed=time.perf_counter() - start,
+        )
+
+    def _probe(self, rng: random.Random) -> Tuple[float, float, float]:
+        """One random descent: (nodes, placements tested, solutions), each weighted."""
+        masks = self.tables.masks
+        sizes = self.tables.sizes
+        full = self.tables.full_mask
+        near = self._near
+        occ = self._occ
+        left = list(self._order)
+        weight = nodes = 1.0
+        placements = 0.0
+        while True:
+            occ, left, domains, tested = self._propagate(occ, left)
+            placements += weight * tested
+            if domains is None:
+                return nodes, placements, 0.0
+            if not left:
+                return nodes, placements, weight
+            piece, domain = domains[0]
+            if self.config.mrv:
+                for candidate in domains:
+                    if len(candidate[1]) < len(domain):
+                        piece, domain = candidate
+            placements += weight * len(domain)
+            smallest = min(sizes[index] for index in left)
+            free = full & ~occ
+            if any(region.bit_count() < smallest for region in self._checker.regions(free)):
+                return nodes, placements, 0.0
+            children = [pid for pid in domain
+                        if not self._checker.small_region_near(free & ~masks[pid], near[pid], smallest)]
+            if not children:
+                return nodes, placements, 0.0
+            weight *= len(children)
+            nodes += weight
+            occ |= masks[rng.choice(children)]
+            left = [index for index in left if index != piece]
+
+    def _domains(self, occ: int, left: Sequence[int]) -> List[Tuple[int, List[int]]]:
+        masks = self.tables.masks
+        return [(piece, [pid for pid in self._by_piece[piece] if not masks[pid] & occ]) for piece in left]
+
+    def _consistent(self, occ: int, pid: int, left: Sequence[int]) -> bool:
+        """BTSolver._consistent: placing ``pid`` (its piece still in ``left``) leaves no too-small region."""
+        smallest = min(self.tables.sizes[index] for index in left)
+        free = self.tables.full_mask & ~(occ | self.tables.masks[pid])
+        return all(region.bit_count() >= smallest for region in self._checker.regions(free))
+
+    def _propagate(self, occ: int, left: List[int]):
+        """Apply forced placements; return (occ, left, domains, tested).
+
+        ``domains`` lists each remaining piece's placements at the returned
+        occupancy, or is None after a contradiction.
+        """
+        masks = self.tables.masks
+        full = self.tables.full_mask
+        tested = 0
+        while True:
+            domains = self._domains(occ, left)
+            if not self.config.propagate or not left:
+                return occ, left, domains, tested
+            forced = None
+            once = twice = 0
+            for piece, domain in domains:
+                if not domain:
+                    return occ, left, None, tested
+                if len(domain) == 1 and forced is None:
+                    forced = (piece, domain[0])
+                for pid in domain:
+                    twice |= once & masks[pid]
+                    once |= masks[pid]
+            if forced is None:
+                free = full & ~occ
+                if free & ~once:
+                    return occ, left, None, tested
+                single = free & once & ~twice
+                if single:
+                    low = single & -single
+                    forced = next((piece, pid) for piece, domain in domains for pid in domain if masks[pid] & low)
+            if forced is None:
+                return occ, left, domains, tested
+            piece, pid = forced
+            tested += 1
+            if not self._consistent(occ, pid, left):
+                return occ, left, None, tested
+            occ |= masks[pid]
+            left = [index for index in left if index != piece]
+
+
+@functools.lru_cache(maxsize=None)
+def _placement_index(tables: PlacementTables, checker) -> Tuple[Tuple[Tuple[int, ...], ...], Tuple[int, ...]]:
+    """Placement ids of each piece, and the cells around each placement."""
+    by_piece: List[List[int]] = [[] for _ in tables.colors]
+    for pid in range(len(tables.masks)):
+        by_piece[tables.piece_of[pid]].append(pid)
+    near = tuple(checker.neighbours(mask) for mask in tables.masks)
+    return tuple(tuple(ids) for ids in by_piece), near
+
+
+_SECONDS_PER_PLACEMENT: float | None = None
+
+
+def seconds_per_placement() -> float:
+    """BTSolver's time per placement tested, timed once per process on a short search."""
+    global _SECONDS_PER_PLACEMENT
+    if _SECONDS_PER_PLACEMENT is None:
+        board = Board(generate=False)
+        board.clear()
+        solver = BTSolver(board, node_limit=12)
+        start = time.perf_counter()
+        solver.solve()
+        elapsed = time.perf_counter() - start
+        _SECONDS_PER_PLACEMENT = elapsed / max(1, solver.placements_tested)
+    return _SECONDS_PER_PLACEMENT
+
+
+def estimate_tree(board: Board, probes: int = 64, time_budget: float | None = 0.005, seed: int | None = 0,
+                  config: SolverConfig | None = None) -> TreeEstimate:
+    """Shortcut for ``TreeEstimator(board, config).estimate(probes, time_budget, seed)``."""
+    return TreeEstimator(board, config).estimate(probes, time_budget, seed)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Estimate a board's search cost, optionally checking it against a real solve."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("board", help="board as printed by Board.canonical_key")
+    parser.add_argument("--probes", type=int, default=64)
+    parser.add_argument("--budget", type=float, default=0.005, help="seconds to spend probing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="also run BTSolver and report the real cost")
+    args = parser.parse_args(argv)
+    board = Board.from_canonical_key(args.board)
+    estimate = estimate_tree(board, probes=args.probes, time_budget=args.budget, seed=args.seed)
+    record = {**asdict(estimate), "seconds": estimate.seconds, "first_solution_nodes": estimate.first_solution_nodes}
+    if args.check:
+        solver = BTSolver(board)
+        start = time.perf_counter()
+        record["solved"] = solver.solve()
+        record["actual_seconds"] = time.perf_counter() - start
+        record["actual_nodes"] = solver.nodes_visited
+    print(json.dumps(record))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+"""Background hint engine for manual play."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from game_logic import PIECE_COLOR
+from game_logic.board import Board, BoardSnapshot
+from solver.bt_solver import Placement
+from solver.cache import SolveCache
+from solver.engines import SolverEngine, create_engine
+
+Step = Tuple[PIECE_COLOR, Placement]
+
+
+class HintEngine:
+    """Keep a solution for the player's current board ready in the background.
+
+    Call ``update`` whenever the board changes and ``hint`` when the player
+    asks. Solutions are remembered per board key, so taking a move back is
+    answered from memory. When the player's move is one of the steps of the
+    current plan the rest of that plan is still a valid solution, so it is
+    reused without searching again.
+
+    ``state`` is one of ``"idle"``, ``"searching"``, ``"ready"``, ``"dead"``
+    (no solution extends the board) or ``"solved"`` (nothing left to place).
+
+    Searches run on ``engine`` (see ``solver.engines``); the default, "auto",
+    is what the GUI solves with and settles a board in milliseconds.
+    """
+
+    def __init__(self, cache: SolveCache | None = None, memo_size: int = 256, engine: str = "auto"):
+        self.cache = cache
+        self.engine = engine
+        self.memo_size = memo_size
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._board: BoardSnapshot | None = None
+        self._key: str | None = None
+        self._plan: List[Step] | None = None
+        self._searching = False
+        self._solver: SolverEngine | None = None
+        self._memo: OrderedDict[str, List[Step] | None] = OrderedDict()
+
+    @property
+    def state(self) -> str:
+        with self._cond:
+            return self._state_locked()
+
+    def _state_locked(self) -> str:
+        if self._key is None:
+            return "idle"
+        if self._searching:
+            return "searching"
+        if self._plan is None:
+            return "dead"
+        return "ready" if self._plan else "solved"
+
+    def update(self, board: Board) -> None:
+        """Track a new board position, starting a search only when needed."""
+        snapshot = board.snapshot()
+        key = snapshot.canonical_key()
+        with self._cond:
+            if key == self._key:
+                return
+            self._generation += 1
+            if self._solver is not None:
+                self._solver.cancel()
+                self._solver = None
+            plan = self._known_plan(snapshot, key)
+            self._board = snapshot
+            self._key = key
+            if plan is not False:
+                self._plan = plan
+                self._searching = False
+                self._remember(key, plan)
+                self._cond.notify_all()
+                return
+            self._plan = None
+            self._searching = True
+            solver = create_engine(self.engine, Board.from_snapshot(snapshot), cache=self.cache)
+            self._solver = solver
+            generation = self._generation
+        thread = threading.Thread(target=self._search, args=(solver, key, generation), daemon=True)
+        thread.start()
+
+    def hint(self, timeout: float = 0.05) -> Step | None:
+        """Return the next placement of a solution, waiting at most ``timeout`` seconds.
+
+        None means no hint is available yet (still searching), the position is
+        dead, or the board is complete; ``state`` tells which.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: not self._searching, timeout)
+            if self._searching or not self._plan:
+                return None
+            return self._plan[0]
+
+    def shutdown(self) -> None:
+        """Cancel any running search and forget the current board."""
+        with self._cond:
+            self._generation += 1
+            if self._solver is not None:
+                self._solver.cancel()
+                self._solver = None
+            self._board = None
+            self._key = None
+            self._plan = None
+            self._searching = False
+            self._cond.notify_all()
+
+    def _known_plan(self, board: BoardSnapshot, key: str) -> List[Step] | None | bool:
+        """Answer from memory or from the previous plan; False when a search is needed."""
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+        if not board.available:
+            return []
+        if self._board is None or not self._plan:
+            return False
+        for index, (color, placement) in enumerate(self._plan):
+            advanced = Board.from_snapshot(self._board)
+            if not advanced.place_piece(color, *placement):
+                continue
+            advanced.available.remove(color)
+            if advanced.canonical_key() == key:
+                return self._plan[:index] + self._plan[index + 1:]
+        return False
+
+    def _remember(self, key: str, plan: List[Step] | None) -> None:
+        self._memo[key] = plan
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def _search(self, solver: SolverEngine, key: str, generation: int) -> None:
+        with self._cond:
+            if generation != self._generation:
+                return
+        solved = solver.solve()
+        with self._cond:
+            if generation != self._generation or solver.stats().cancelled:
+                return
+            plan = list(solver.solution_steps) if solved else None
+            self._plan = plan
+            self._searching = False
+            self._solver = None
+            self._remember(key, plan)
+            self._cond.notify_all()
@@ -0,0 +1,214 @@
+"""Pre-search unsolvability proofs from counting and coloring invariants."""
+from __future__ import annotations
+
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+
+from game_logic import NB_COLS, NB_ROWS, PIECE_COLOR
+from game_logic.board import Board
+from solver.tables import PlacementTables, cell_bit, get_tables
+
+# Two-colorings of the board: a cell is "dark" when the function returns 0.
+COLORINGS: Tuple[Tuple[str, object], ...] = (
+    ("checkerboard", lambda row, col: (row + col) % 2),
+    ("row stripe", lambda row, col: row % 2),
+    ("column stripe", lambda row, col: col % 2),
+)
+
+
+class InvariantChecker:
+    """Necessary conditions for a board to be tileable by its remaining pieces.
+
+    Everything that depends only on the pieces is computed once from the
+    placement tables: each piece's placement masks, and for every coloring
+    the dark-minus-light counts its placements can take. ``check`` then
+    needs a handful of bit operations plus small memoised set lookups. It
+    returns why the board cannot be solved, or None when no invariant is
+    violated (which does not mean the board is solvable).
+
+    Checks, cheapest first: empty area against piece area; each empty
+    region against the piece sizes, alone and as an exact partition of all
+    remaining pieces; pieces with no legal placement and empty cells no
+    placement can cover; checkerboard and stripe colour balance.
+    """
+
+    def __init__(self, tables: PlacementTables | None = None):
+        self.tables = tables or get_tables()
+        tables = self.tables
+        self.full_mask = tables.full_mask
+        self.sizes: Dict[PIECE_COLOR, int] = dict(zip(tables.colors, tables.sizes))
+        self._bit: Dict[PIECE_COLOR, int] = {color: 1 << index for index, color in enumerate(tables.colors)}
+        masks: Dict[PIECE_COLOR, List[int]] = {color: [] for color in tables.colors}
+        for pid, mask in enumerate(tables.masks):
+            masks[tables.colors[tables.piece_of[pid]]].append(mask)
+        self.masks: Dict[PIECE_COLOR, Tuple[int, ...]] = {color: tuple(m) for color, m in masks.items()}
+        self.colorings: List[Tuple[str, int, Dict[PIECE_COLOR, FrozenSet[int]]]] = []
+        for name, color_of in COLORINGS:
+            dark = 0
+            for row in range(NB_ROWS):
+                for col in range(NB_COLS):
+                    if color_of(row, col) == 0:
+                        dark |= 1 << cell_bit(row, col)
+            values = {
+                color: frozenset(2 * (mask & dark).bit_count() - self.sizes[color] for mask in self.masks[color])
+                for color in tables.colors
+            }
+            self.colorings.append((name, dark, values))
+        self._not_top = self._not_bottom = 0
+        for col in range(NB_COLS):
+            for row in range(NB_ROWS):
+                if row:
+                    self._not_top |= 1 << cell_bit(row, col)
+                if row < NB_ROWS - 1:
+                    self._not_bottom |= 1 << cell_bit(row, col)
+        self._balances: Dict[Tuple[int, FrozenSet[PIECE_COLOR]], FrozenSet[int]] = {}
+        self._partitions: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], bool] = {}
+
+    def regions(self, free: int) -> List[int]:
+        """Split the ``free`` cell mask into 4-connected region masks."""
+        regions: List[int] = []
+        shift = NB_ROWS
+        while free:
+            region = free & -free
+            while True:
+                grown = (region | (region & self._not_bottom) << 1 | (region & self._not_top) >> 1
+                         | region << shift | region >> shift) & free
+                if grown == region:
+                    break
+                region = grown
+            regions.append(region)
+            free &= ~region
+        return regions
+
+    def neighbours(self, mask: int) -> int:
+        """Cells 4-adjacent to ``mask`` and not in it."""
+        grown = (mask & self._not_bottom) << 1 | (mask & self._not_top) >> 1 | mask << NB_ROWS | mask >> NB_ROWS
+        return grown & self.full_mask & ~mask
+
+    def small_region_near(self, free: int, near: int, smallest: int) -> bool:
+        """Whether a region of ``free`` touching ``near`` has fewer than ``smallest`` cells.
+
+        Each region is only grown until it reaches ``smallest`` cells, so
+        this is much cheaper than ``regions`` after a local change.
+        """
+        seeds = near & free
+        shift = NB_ROWS
+        while seeds:
+            region = seeds & -seeds
+            while region.bit_count() < smallest:
+                grown = (region | (region & self._not_bottom) << 1 | (region & self._not_top) >> 1
+                         | region << shift | region >> shift) & free
+                if grown == region:
+                    return True
+                region = grown
+            seeds &= ~region
+        return False
+
+    def check(self, board: Board) -> str | None:
+        """Return why ``board`` cannot be completed, or None if no invariant rules it out."""
+        occ = self.tables.occupancy(board)
+        free = self.full_mask & ~occ
+        remaining = [color for color in board.available if color != "empty"]
+        empty_cells = free.bit_count()
+        area = sum(self.sizes[color] for color in remaining)
+        if empty_cells != area:
+            return f"{empty_cells} empty cells but pieces cover {area}"
+        if not remaining:
+            return None
+
+        reason = self._region_reason(free, remaining)
+        if reason is not None:
+            return reason
+
+        coverable = 0
+        for color in remaining:
+            fits = 0
+            for mask in self.masks[color]:
+                if not mask & occ:
+                    fits |= mask
+            if not fits:
+                return f"{color} has no legal placement"
+            coverable |= fits
+        if free & ~coverable:
+            return "an empty cell cannot be covered by any remaining piece"
+
+        pieces = frozenset(remaining)
+        for index, (name, dark, _values) in enumerate(self.colorings):
+            balance = 2 * (free & dark).bit_count() - empty_cells
+            if balance not in self._reachable_balances(index, pieces):
+                return f"{name} coloring cannot be balanced"
+        return None
+
+    # --- Region sizes ---
+    def _region_reason(self, free: int, remaining: Sequence[PIECE_COLOR]) -> str | None:
+        sizes = sorted(self.sizes[color] for color in remaining)
+        smallest = sizes[0]
+        reachable = self.tables.size_sums[sum(self._bit[color] for color in remaining)]
+        region_sizes = []
+        for region in self.regions(free):
+            size = region.bit_count()
+            if size < smallest:
+                return f"isolated gap of {size} cells"
+            if not reachable >> size & 1:
+                return f"no piece combination fills a {size}-cell region"
+            region_sizes.append(size)
+        if len(region_sizes) > 1:
+            distinct = tuple(sorted(set(sizes)))
+            counts = tuple(sizes.count(size) for size in distinct)
+            if not self._partition(tuple(sorted(region_sizes, reverse=True)), distinct, counts):
+                return f"regions of {sorted(region_sizes)} cells cannot be filled together"
+        return None
+
+    def _partition(self, regions: Tuple[int, ...], sizes: Tuple[int, ...], counts: Tuple[int, ...]) -> bool:
+        """Whether pieces with ``counts`` of each of ``sizes`` fill every region exactly."""
+        if not regions:
+            return not any(counts)
+        key = (regions, sizes + counts)
+        cached = self._partitions.get(key)
+        if cached is not None:
+            return cached
+        result = any(
+            self._partition(regions[1:], sizes, tuple(c - u for c, u in zip(counts, used)))
+            for used in self._fillings(regions[0], sizes, counts, 0)
+        )
+        self._partitions[key] = result
+        return result
+
+    def _fillings(self, target: int, sizes: Tuple[int, ...], counts: Tuple[int, ...], index: int):
+        if index == len(sizes):
+            if target == 0:
+                yield ()
+            return
+        for used in range(min(counts[index], target // sizes[index]) + 1):
+            for rest in self._fillings(target - used * sizes[index], sizes, counts, index + 1):
+                yield (used,) + rest
+
+    # --- Colorings ---
+    def _reachable_balances(self, index: int, pieces: FrozenSet[PIECE_COLOR]) -> FrozenSet[int]:
+        """Dark-minus-light totals the ``pieces`` can make under coloring ``index``."""
+        key = (index, pieces)
+        cached = self._balances.get(key)
+        if cached is not None:
+            return cached
+        values = self.colorings[index][2]
+        sums = {0}
+        for color in sorted(pieces):
+            sums = {total + value for total in sums for value in values[color]}
+        result = frozenset(sums)
+        self._balances[key] = result
+        return result
+
+
+_CHECKER: InvariantChecker | None = None
+
+
+def get_checker() -> InvariantChecker:
+    """Process-wide checker, built on first use."""
+    global _CHECKER
+    if _CHECKER is None:
+        _CHECKER = InvariantChecker()
+    return _CHECKER
+
+
+def unsolvable_reason(board: Board) -> str | None:
+    """Shortcut for ``get_checker().check(board)``."""
+    return get_checker().check(board)
@@ -0,0 +1,378 @@
+"""Iterative explicit-stack solver with pause, resume and checkpointing."""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import struct
+import sys
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from game_logic import NB_COLS, NB_ROWS, PIECE_CODES, PIECE_COLOR
+from game_logic.board import Board, BoardSnapshot
+from solver.bt_solver import BTSolver, Placement, SearchInterrupted, SolverConfig
+from solver.cache import SolveCache, piece_set_version
+
+SolutionCallback = Callable[[List[Tuple[PIECE_COLOR, Placement]]], None]
+
+CHECKPOINT_MAGIC = b"IQCK"
+CHECKPOINT_FORMAT = 1
+_FRAME = struct.Struct("<BHHB")
+
+
+class Frame:
+    """One level of the search: the piece being placed and how far its domain was tried.
+
+    ``mark`` is the path length before this level's placement; everything past
+    it (the placement and the moves it forced) is undone on backtrack.
+    """
+
+    __slots__ = ("piece", "domain", "pos", "end", "placed", "children", "mark")
+
+    def __init__(self, piece: PIECE_COLOR, domain: List[Placement], end: int | None = None, mark: int = 0):
+        self.piece = piece
+        self.domain = domain
+        self.pos = 0
+        self.end = len(domain) if end is None else min(end, len(domain))
+        self.placed = False
+        self.children = 0
+        self.mark = mark
+
+
+class IterativeSolver(BTSolver):
+    """BTSolver with its recursion replaced by an explicit stack of frames.
+
+    Variable and value order are BTSolver's, so ``solve`` explores the same
+    tree. Because the whole search state is the stack, a search can be
+    stepped with ``run(max_nodes=...)``, stopped from another thread with
+    ``pause``, written to a checkpoint and resumed later, possibly in another
+    process. Each frame is (piece, next domain index, domain end, placed);
+    domains are recomputed on resume since they depend only on the board.
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        cache: SolveCache | None = None,
+        node_limit: int | None = None,
+        config: SolverConfig | None = None,
+    ):
+        super().__init__(board, cache=cache, node_limit=node_limit, config=config)
+        self.stack: List[Frame] = []
+        self.path: List[Tuple[PIECE_COLOR, Placement]] = []
+        self.solutions_found = 0
+        self.output_offset = 0
+        self.started = False
+        self._complete_at_root = False
+        self._root: BoardSnapshot | None = None
+        self._work: Board | None = None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.started and not self.stack
+
+    @property
+    def pause_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def pause(self) -> None:
+        """Ask a running ``run`` to return at the next node with its state intact."""
+        self._cancel_event.set()
+
+    def frames(self) -> List[Tuple[PIECE_COLOR, int, int, bool]]:
+        """Inspectable copy of the stack as (piece, next index, end, placed)."""
+        return [(f.piece, f.pos, f.end, f.placed) for f in self.stack]
+
+    # --- Search driving ---
+    def start(self) -> None:
+        """Reset counters and open the root frame over a private copy of the board."""
+        self._root = self.board.snapshot()
+        self._work = Board.from_snapshot(self._root)
+        self.nodes_visited = 0
+        self.placements_tested = 0
+        self.forced_moves = 0
+        self.solutions_found = 0
+        self.output_offset = 0
+        self.solution_steps = []
+        self.assignment.clear()
+        self._with_work_board(self._open_root)
+
+    def start_subtree(self, piece: PIECE_COLOR, placements: Sequence[Placement]) -> None:
+        """Like ``start``, but the root frame only tries ``placements`` of ``piece``."""
+        self.start()
+        self._complete_at_root = False
+        self.stack = [Frame(piece, list(placements), mark=len(self.path))]
+
+    def donate(self) -> Tuple[List[Tuple[PIECE_COLOR, Placement]], PIECE_COLOR, List[Placement]] | None:
+        """Give away half of the untried placements of the shallowest open frame.
+
+        Returns ``(prefix, piece, placements)``: the steps leading to that
+        frame and the placements of ``piece`` this search will no longer try,
+        or None when nothing is left to split. Call between ``run`` calls.
+        """
+        for frame in self.stack:
+            untried = frame.end - frame.pos
+            if untried <= 0:
+                continue
+            middle = frame.pos + untried // 2
+            donated = frame.domain[middle:frame.end]
+            frame.end = middle
+            return list(self.path[:frame.mark]), frame.piece, donated
+        return None
+
+    def run(self, max_nodes: int | None = None, on_solution: SolutionCallback | None = None) -> str:
+        """Continue the search; return ``"solved"``, ``"exhausted"`` or ``"paused"``.
+
+        Without ``on_solution`` the search stops at the next solution (left in
+        ``solution_steps``). With it, every solution is passed to the callback
+        and the search continues until the tree is exhausted. ``max_nodes``
+        bounds the work done by this call.
+        """
+        if not self.started:
+            self.start()
+        self._cancel_event.clear()
+        return self._with_work_board(lambda: self._drive(max_nodes, on_solution))
+
+    def _with_work_board(self, action: Callable[[], object]):
+        original = self.board
+        self.board = self._work
+        try:
+            return action()
+        finally:
+            self.board = original
+
+    def _backtrack(self, remaining, assignment, path) -> bool:
+        # Entry point used by BTSolver.solve, which already swapped in a working board.
+        self._work = self.board
+        self._root = self.board.snapshot()
+        self.solutions_found = 0
+        self._open_root()
+        status = self._drive(None, None)
+        if status == "paused":
+            raise SearchInterrupted
+        return status == "solved"
+
+    def _open_root(self) -> None:
+        self.variables = self._ordered_variables()
+        self.stack = []
+        self.path = []
+        self.started = True
+        self.nodes_visited += 1
+        self._complete_at_root = False
+        domains = self._propagate(self.path)
+        if domains is None:
+            self._unwind(self.path, 0)
+            return
+        remaining = self._remaining()
+        # A board with nothing left to place is its own (single) solution.
+        self._complete_at_root = not remaining
+        if remaining:
+            self._push(remaining, domains=domains)
+
+    def _remaining(self) -> List[PIECE_COLOR]:
+        return [piece for piece in self.variables if piece in self.board.available]
+
+    def _push(
+        self,
+        remaining: Sequence[PIECE_COLOR],
+        end: int | None = None,
+        domains: Dict[PIECE_COLOR, List[Placement]] | None = None,
+    ) -> Frame:
+        """Open a frame for the next piece; ``domains`` are those ``_propagate`` returned."""
+        domains = domains or {}
+        piece = self._select_variable(remaining, domains)
+        frame = Frame(piece, self._value_order(piece, domains.get(piece)), end, mark=len(self.path))
+        self.stack.append(frame)
+        return frame
+
+    def _record_solution(self, on_solution: SolutionCallback | None) -> None:
+        self.solutions_found += 1
+        self.solution_steps = list(self.path)
+        if on_solution is not None:
+            on_solution(self.solution_steps)
+
+    def _drive(self, max_nodes: int | None, on_solution: SolutionCallback | None) -> str:
+        budget_end = None if max_nodes is None else self.nodes_visited + max_nodes
+        if self._complete_at_root:
+            self._complete_at_root = False
+            self._record_solution(on_solution)
+            return "solved" if on_solution is None else "exhausted"
+        stack = self.stack
+        while stack:
+            if self._cancel_event.is_set():
+                return "paused"
+            if budget_end is not None and self.nodes_visited >= budget_end:
+                return "paused"
+            if self.node_limit is not None and self.nodes_visited >= self.node_limit:
+                return "paused"
+            frame = stack[-1]
+            if frame.placed:
+                self._unwind(self.path, frame.mark)
+                frame.placed = False
+            while frame.pos < frame.end:
+                placement = frame.domain[frame.pos]
+                frame.pos += 1
+                self.placements_tested += 1
+                if not self._consistent(frame.piece, placement):
+                    continue
+                self._commit(frame.piece, placement)
+                self.assignment[frame.piece] = placement
+                self.path.append((frame.piece, placement))
+                frame.placed = True
+                frame.children += 1
+                self.nodes_visited += 1
+                domains = self._propagate(self.path)
+                if domains is None:
+                    self._unwind(self.path, frame.mark)
+                    frame.placed = False
+                    continue
+                remaining = self._remaining()
+                if remaining:
+                    self._push(remaining, domains=domains)
+                    break
+                self._record_solution(on_solution)
+                if on_solution is None:
+                    return "solved"
+                break
+            else:
+                self._frame_closed(stack.pop())
+        return "exhausted"
+
+    def _frame_closed(self, frame: Frame) -> None:
+        """Hook for instrumentation: ``frame`` was fully explored and popped."""
+
+    # --- Checkpoints ---
+    def save_checkpoint(self, path: str) -> None:
+        """Write the search state to ``path`` atomically (write + rename)."""
+        if self._root is None:
+            raise ValueError("search has not been started")
+        mask = 0
+        for color in self._root.available:
+            mask |= 1 << PIECE_CODES[color]
+        header = _header_struct(len(self._root.cells)).pack(
+            CHECKPOINT_MAGIC,
+            CHECKPOINT_FORMAT,
+            piece_set_version().encode(),
+            self._root.cells,
+            mask,
+            self.nodes_visited,
+            self.placements_tested,
+            self.solutions_found,
+            self.output_offset,
+            len(self.stack),
+        )
+        frames = b"".join(_FRAME.pack(PIECE_CODES[f.piece], f.pos, f.end, f.placed) for f in self.stack)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.write(header + frames)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_checkpoint(
+        cls, path: str, cache: SolveCache | None = None, config: SolverConfig | None = None
+    ) -> "IterativeSolver":
+        """Rebuild a solver from ``save_checkpoint`` output, ready to ``run``.
+
+        ``config`` must be the one the checkpointed search used.
+        """
+        with open(path, "rb") as handle:
+            data = handle.read()
+        header = _header_struct(NB_ROWS * NB_COLS)
+        if len(data) < header.size or data[:4] != CHECKPOINT_MAGIC:
+            raise ValueError(f"{path} is not a solver checkpoint")
+        (_magic, fmt, version, cells, mask, nodes, placements, solutions, offset, depth) = header.unpack_from(data)
+        if fmt != CHECKPOINT_FORMAT:
+            raise ValueError(f"unsupported checkpoint format {fmt}")
+        if version.decode() != piece_set_version():
+            raise ValueError("checkpoint was written for a different piece set")
+        board = Board(generate=False)
+        board.cells[:] = cells
+        board.available = [color for color in board.available if mask >> PIECE_CODES[color] & 1]
+        solver = cls(board, cache=cache, config=config)
+        solver._root = board.snapshot()
+        solver._work = Board.from_snapshot(solver._root)
+        solver._with_work_board(lambda: solver._replay(data, header.size, depth))
+        solver.nodes_visited = nodes
+        solver.placements_tested = placements
+        solver.solutions_found = solutions
+        solver.output_offset = offset
+        return solver
+
+    def _replay(self, data: bytes, offset: int, depth: int) -> None:
+        self.variables = self._ordered_variables()
+        self.stack = []
+        self.path = []
+        self.started = True
+        # Forced moves are not stored: they follow from the board and are re-derived.
+        domains = self._propagate(self.path) if depth else {}
+        if domains is None:
+            raise ValueError("checkpoint does not match this solver's branching order")
+        for _ in range(depth):
+            code, pos, end, placed = _FRAME.unpack_from(data, offset)
+            offset += _FRAME.size
+            frame = self._push(self._remaining(), domains=domains)
+            if PIECE_CODES[frame.piece] != code:
+                raise ValueError("checkpoint does not match this solver's branching order")
+            frame.pos, frame.end, frame.placed = pos, end, bool(placed)
+            if frame.placed:
+                placement = frame.domain[pos - 1]
+                self._commit(frame.piece, placement)
+                self.assignment[frame.piece] = placement
+                self.path.append((frame.piece, placement))
+                domains = self._propagate(self.path) or {}
+
+
+def _header_struct(cell_count: int) -> struct.Struct:
+    return struct.Struct(f"<4sH16s{cell_count}sH4QB")
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Enumerate every solution of a board, checkpointing so preemption loses little work."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("board", nargs="?", help="board as printed by Board.canonical_key (omit with --resume)")
+    parser.add_argument("--output", required=True, help="JSONL file that receives one solution per line")
+    parser.add_argument("--checkpoint", required=True, help="checkpoint file, rewritten every --every nodes")
+    parser.add_argument("--every", type=int, default=50_000, help="nodes between checkpoints")
+    parser.add_argument("--resume", action="store_true", help="continue from --checkpoint")
+    args = parser.parse_args(argv)
+
+    if args.resume:
+        solver = IterativeSolver.load_checkpoint(args.checkpoint)
+        out = open(args.output, "r+b" if os.path.exists(args.output) else "w+b")
+        out.truncate(solver.output_offset)
+        out.seek(solver.output_offset)
+    else:
+        if not args.board:
+            parser.error("a board key is required unless --resume is given")
+        solver = IterativeSolver(Board.from_canonical_key(args.board))
+        solver.start()
+        out = open(args.output, "wb")
+
+    def write_solution(steps):
+        out.write(json.dumps([[color, *placement] for color, placement in steps]).encode() + b"\n")
+
+    # Restored on return: processes forked later (pool workers) must still die on SIGTERM.
+    previous = signal.signal(signal.SIGTERM, lambda _sig, _frame: solver.pause())
+    try:
+        with out:
+            while True:
+                status = solver.run(max_nodes=args.every, on_solution=write_solution)
+                out.flush()
+                solver.output_offset = out.tell()
+                solver.save_checkpoint(args.checkpoint)
+                if status == "exhausted":
+                    break
+                if solver.pause_requested:
+                    print(f"paused after {solver.nodes_visited} nodes", file=sys.stderr)
+                    return 1
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    print(f"{solver.solutions_found} solutions, {solver.nodes_visited} nodes", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
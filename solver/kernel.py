@@ -0,0 +1,261 @@
+"""Allocation-free exact-cover search kernel."""
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING, Callable, List, Tuple
+
+from game_logic import PIECE_COLOR
+from game_logic.board import Board
+from solver.bt_solver import Placement
+from solver.cache import SolveCache
+from solver.invariants import get_checker
+from solver.tables import PlacementTables, get_tables
+
+if TYPE_CHECKING:
+    from solver.trace import TraceWriter
+
+
+class SearchKernel:
+    """Depth-first exact cover over precomputed placement masks.
+
+    Each level fills the lowest empty cell with one of the placements whose
+    lowest cell it is, so every tiling is produced exactly once. All state
+    lives in integers and in arrays allocated once per kernel: the occupancy
+    mask, a used-piece ``bytearray``, and per-depth cell, cursor and
+    placement arrays. The inner loop builds no lists, sets or tuples, so in
+    steady state a node allocates nothing beyond transient int objects.
+
+    ``run`` can be called repeatedly: it resumes where it stopped. Setting
+    ``trace`` records every try, prune, commit and backtrack.
+    """
+
+    def __init__(self, tables: PlacementTables | None = None):
+        self.tables = tables or get_tables()
+        depth_cap = len(self.tables.colors) + 1
+        self._used = bytearray(len(self.tables.colors))
+        self._cell = array("h", [0] * depth_cap)
+        self._cursor = array("H", [0] * depth_cap)
+        self._pid = array("h", [-1] * depth_cap)
+        self._depth = -1
+        self._occ = 0
+        self._left = 0
+        self.nodes = 0
+        self.placements_tested = 0
+        self.solutions = 0
+        self.cancelled = False
+        self.trace: TraceWriter | None = None
+
+    def load(self, board: Board) -> None:
+        """Start a fresh search for ``board`` (pre-placed cells and available pieces)."""
+        tables = self.tables
+        available = set(board.available)
+        for index, color in enumerate(tables.colors):
+            self._used[index] = 0 if color in available else 1
+        self._left = sum(1 for color in tables.colors if color in available)
+        self._occ = tables.occupancy(board)
+        self.nodes = 1
+        self.placements_tested = 0
+        self.solutions = 0
+        self.cancelled = False
+        for i in range(len(self._pid)):
+            self._pid[i] = -1
+            self._cursor[i] = 0
+        if self._occ == tables.full_mask or not self._left:
+            # Nothing to search: the root is a solution exactly when both are exhausted.
+            self._depth = -2 if self._occ == tables.full_mask and not self._left else -1
+            return
+        free = tables.full_mask & ~self._occ
+        self._depth = 0
+        self._cell[0] = (free & -free).bit_length() - 1
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    def run(self, max_nodes: int | None = None, max_solutions: int = 1,
+            on_solution: Callable[["SearchKernel"], None] | None = None) -> str:
+        """Search on; return ``"solved"``, ``"exhausted"`` or ``"paused"``.
+
+        Stops after ``max_solutions`` further solutions or ``max_nodes``
+        further nodes. ``on_solution`` receives the kernel itself, positioned
+        on the solution, so callers decide whether to materialise it.
+        """
+        if self._depth == -2:
+            self._depth = -1
+            self.solutions += 1
+            if on_solution is not None:
+                on_solution(self)
+            return "solved"
+        tables = self.tables
+        masks = tables.masks
+        piece_of = tables.piece_of
+        by_min_cell = tables.by_min_cell
+        full = tables.full_mask
+        colors = tables.colors
+        placements = tables.placements
+        trace = self.trace
+        used = self._used
+        cell = self._cell
+        cursor = self._cursor
+        pid = self._pid
+        depth = self._depth
+        occ = self._occ
+        left = self._left
+        nodes = self.nodes
+        tested = self.placements_tested
+        node_cap = -1 if max_nodes is None else nodes + max_nodes
+        found = 0
+        status = "exhausted"
+        while depth >= 0:
+            if nodes == node_cap or self.cancelled:
+                status = "paused"
+                break
+            placed = pid[depth]
+            if placed >= 0:
+                occ ^= masks[placed]
+                used[piece_of[placed]] = 0
+                left += 1
+                pid[depth] = -1
+                if trace is not None:
+                    trace.backtracked(depth, colors[piece_of[placed]], placements[placed])
+            candidates = by_min_cell[cell[depth]]
+            i = cursor[depth]
+            count = len(candidates)
+            descended = False
+            while i < count:
+                p = candidates[i]
+                i += 1
+                tested += 1
+                if trace is not None:
+                    trace.tried(depth, colors[piece_of[p]], placements[p])
+                if used[piece_of[p]] or occ & masks[p]:
+                    if trace is not None:
+                        trace.pruned(depth, colors[piece_of[p]], placements[p])
+                    continue
+                if trace is not None:
+                    trace.committed(depth, colors[piece_of[p]], placements[p])
+                occ |= masks[p]
+                used[piece_of[p]] = 1
+                left -= 1
+                pid[depth] = p
+                cursor[depth] = i
+                nodes += 1
+                descended = True
+                break
+            if not descended:
+                cursor[depth] = 0
+                depth -= 1
+                continue
+            if occ == full or not left:
+                if occ == full and not left:
+                    found += 1
+                    if trace is not None:
+                        trace.solved(depth + 1)
+                    if on_solution is not None:
+                        self._depth, self._occ, self._left = depth, occ, left
+                        on_solution(self)
+                    if found >= max_solutions:
+                        status = "solved"
+                        break
+                continue
+            free = full & ~occ
+            depth += 1
+            cell[depth] = (free & -free).bit_length() - 1
+            cursor[depth] = 0
+        self._depth = depth
+        self._occ = occ
+        self._left = left
+        self.nodes = nodes
+        self.placements_tested = tested
+        self.solutions += found
+        return status
+
+    def solution_steps(self) -> List[Tuple[PIECE_COLOR, Placement]]:
+        """Placements currently on the stack, as BTSolver-style steps."""
+        tables = self.tables
+        steps: List[Tuple[PIECE_COLOR, Placement]] = []
+        for depth in range(self._depth + 1):
+            placed = self._pid[depth]
+            if placed >= 0:
+                steps.append((tables.colors[tables.piece_of[placed]], tables.placements[placed]))
+        return steps
+
+
+class KernelSolver:
+    """Solver facade over SearchKernel with BTSolver's result attributes."""
+
+    def __init__(self, board: Board, cache: SolveCache | None = None, node_limit: int | None = None):
+        self.board = board
+        self.cache = cache
+        self.node_limit = node_limit
+        self.kernel = SearchKernel()
+        self.solution_steps: List[Tuple[PIECE_COLOR, Placement]] = []
+        self.nodes_visited = 0
+        self.placements_tested = 0
+        self.from_cache = False
+        self.cancelled = False
+        self.limit_reached = False
+        self.unsolvable_reason: str | None = None
+        self.trace: TraceWriter | None = None
+
+    def cancel(self) -> None:
+        self.kernel.cancel()
+
+    def _reject(self) -> bool:
+        """Run the invariant check; True (with ``unsolvable_reason`` set) if it fails."""
+        self.nodes_visited = 0
+        self.placements_tested = 0
+        self.unsolvable_reason = get_checker().check(self.board)
+        return self.unsolvable_reason is not None
+
+    def solve(self) -> bool:
+        self.solution_steps = []
+        self.from_cache = False
+        self.cancelled = False
+        self.limit_reached = False
+        if self._reject():
+            return False
+        key: str | None = None
+        if self.cache is not None:
+            key = self.board.canonical_key()
+            cached = self.cache.get(key)
+            if cached is not None:
+                solved, self.solution_steps = cached
+                self.from_cache = True
+                return solved
+        self.kernel.load(self.board)
+        self.kernel.trace = self.trace
+        try:
+            status = self.kernel.run(max_nodes=self.node_limit)
+        finally:
+            self.kernel.trace = None
+        self.nodes_visited = self.kernel.nodes
+        self.placements_tested = self.kernel.placements_tested
+        if status == "paused":
+            self.cancelled = self.kernel.cancelled
+            self.limit_reached = not self.cancelled
+            return False
+        solved = status == "solved"
+        if solved:
+            self.solution_steps = self.kernel.solution_steps()
+        if self.cache is not None and key is not None:
+            self.cache.put(key, solved, self.solution_steps)
+        return solved
+
+    def count(self, limit: int | None = None) -> int:
+        """Number of tilings of the board, stopping early at ``limit``."""
+        return self.enumerate(None, limit)
+
+    def enumerate(self, on_solution: Callable[[List[Tuple[PIECE_COLOR, Placement]]], None] | None,
+                  limit: int | None = None) -> int:
+        """Pass every tiling (up to ``limit``) to ``on_solution``; return how many were found."""
+        self.cancelled = self.limit_reached = False
+        if self._reject():
+            return 0
+        self.kernel.load(self.board)
+        callback = None if on_solution is None else (lambda kernel: on_solution(kernel.solution_steps()))
+        status = self.kernel.run(max_nodes=self.node_limit, max_solutions=limit or 1 << 62, on_solution=callback)
+        self.nodes_visited = self.kernel.nodes
+        self.placements_tested = self.kernel.placements_tested
+        self.cancelled = status == "paused" and self.kernel.cancelled
+        self.limit_reached = status == "paused" and not self.cancelled
+        return self.kernel.solutions
@@ -0,0 +1,176 @@
+"""Portfolio solver racing differently configured BTSolvers across processes."""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import queue
+import time
+from collections import Counter
+from typing import List, Sequence, Tuple
+
+from game_logic import PIECE_COLOR
+from game_logic.board import Board, BoardSnapshot
+from solver.bt_solver import BTSolver, Placement, SolverConfig
+from solver.cache import SolveCache
+
+DEFAULT_CONFIGS: Tuple[SolverConfig, ...] = (
+    SolverConfig(name="mrv-combined", value_order="combined"),
+    SolverConfig(name="mrv-size"),
+    SolverConfig(name="mrv-small", variable_order="small"),
+    SolverConfig(name="static-size", mrv=False),
+    SolverConfig(name="mrv-shuffle-1", value_seed=1),
+    SolverConfig(name="mrv-shuffle-2", value_seed=2),
+    SolverConfig(name="mrv-small-shuffle-3", variable_order="small", value_seed=3),
+)
+
+
+def rank_configs(configs: Sequence[SolverConfig], log_path: str | None) -> List[SolverConfig]:
+    """Order ``configs`` by how often each won in the race log, most wins first.
+
+    Configurations that never won keep their given order after the winners.
+    """
+    wins: Counter[str] = Counter()
+    if log_path and os.path.exists(log_path):
+        with open(log_path) as handle:
+            for line in handle:
+                try:
+                    wins[json.loads(line)["winner"]] += 1
+                except (ValueError, KeyError):
+                    continue
+    position = {config.name: index for index, config in enumerate(configs)}
+    return sorted(configs, key=lambda config: (-wins[config.name], position[config.name]))
+
+
+def _race_worker(snapshot: BoardSnapshot, config: SolverConfig, node_limit: int | None, results) -> None:
+    solver = BTSolver(Board.from_snapshot(snapshot), node_limit=node_limit, config=config)
+    solved = solver.solve()
+    results.put((config.name, solved, solver.solution_steps, solver.nodes_visited, solver.placements_tested,
+                 solver.unsolvable_reason, solver.forced_moves, solver.limit_reached))
+
+
+class PortfolioSolver:
+    """Race several BTSolver configurations on one board and keep the first answer.
+
+    Any configuration that finishes has either found a solution or exhausted
+    the whole tree, so the first result is final and the other processes are
+    terminated. When fewer ``processes`` than configurations are allowed, the
+    ones that won most often according to ``log_path`` run first. Each race
+    appends ``{"board", "winner", "solved", "seconds"}`` to that log.
+
+    ``node_limit`` bounds each configuration's search. One that reaches it
+    proves nothing, so the race waits for the others; when every entrant
+    reaches it, ``solve`` returns False with ``limit_reached`` set.
+    """
+
+    def __init__(
+        self,
+        board: Board,
+        configs: Sequence[SolverConfig] = DEFAULT_CONFIGS,
+        processes: int | None = None,
+        log_path: str | None = None,
+        cache: SolveCache | None = None,
+        node_limit: int | None = None,
+    ):
+        self.board = board
+        self.configs = list(configs)
+        self.processes = processes or min(len(self.configs), os.cpu_count() or 1)
+        self.log_path = log_path
+        self.cache = cache
+        self.node_limit = node_limit
+        self.solution_steps: List[tuple[PIECE_COLOR, Placement]] = []
+        self.nodes_visited = 0
+        self.placements_tested = 0
+        self.forced_moves = 0
+        self.winner: str | None = None
+        self.from_cache = False
+        self.cancelled = False
+        self.limit_reached = False
+        self.unsolvable_reason: str | None = None
+        self._procs: List[multiprocessing.Process] = []
+
+    def cancel(self) -> None:
+        """Stop the race; ``solve`` returns False."""
+        self.cancelled = True
+        self._terminate()
+
+    def _terminate(self) -> None:
+        for proc in self._procs:
+            if proc.is_alive():
+                proc.terminate()
+
+    def solve(self, timeout: float | None = None) -> bool:
+        self.solution_steps = []
+        self.nodes_visited = 0
+        self.placements_tested = 0
+        self.forced_moves = 0
+        self.winner = None
+        self.from_cache = False
+        self.cancelled = False
+        self.limit_reached = False
+        self.unsolvable_reason = None
+        key = self.board.canonical_key()
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                solved, self.solution_steps = cached
+                self.from_cache = True
+                return solved
+
+        entrants = rank_configs(self.configs, self.log_path)[: self.processes]
+        snapshot = self.board.snapshot()
+        results = multiprocessing.Queue()
+        self._procs = [
+            multiprocessing.Process(target=_race_worker, args=(snapshot, config, self.node_limit, results), daemon=True)
+            for config in entrants
+        ]
+        start = time.perf_counter()
+        for proc in self._procs:
+            proc.start()
+        outcome = None
+        try:
+            outcome = self._first_result(results, timeout)
+        finally:
+            self._terminate()
+            for proc in self._procs:
+                proc.join()
+            self._procs = []
+        if outcome is None:
+            return False
+        (self.winner, solved, self.solution_steps, self.nodes_visited, self.placements_tested,
+         self.unsolvable_reason, self.forced_moves, _limited) = outcome
+        self._log(key, solved, time.perf_counter() - start)
+        if self.cache is not None:
+            self.cache.put(key, solved, self.solution_steps)
+        return solved
+
+    def _first_result(self, results, timeout: float | None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        limited = 0
+        while True:
+            wait = 0.05 if deadline is None else min(0.05, deadline - time.monotonic())
+            if wait <= 0:
+                return None
+            try:
+                outcome = results.get(timeout=wait)
+            except queue.Empty:
+                if not self.cancelled and any(proc.is_alive() for proc in self._procs):
+                    continue
+                try:
+                    outcome = results.get_nowait()
+                except queue.Empty:
+                    return None
+            if not outcome[-1]:
+                return outcome
+            limited += 1
+            if limited == len(self._procs):
+                self.limit_reached = True
+                return None
+
+    def _log(self, key: str, solved: bool, seconds: float) -> None:
+        if not self.log_path:
+            return
+        record = {"board": key, "winner": self.winner, "solved": solved, "seconds": round(seconds, 6)}
+        os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+        with open(self.log_path, "a") as handle:
+            handle.write(json.dumps(record) + "\n")
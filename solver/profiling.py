@@ -0,0 +1,208 @@
+"""Profile solver runs: collapsed stacks and hot-function tables, scoped to one thread.
+
+``ProfileRun`` profiles the code inside its ``with`` block on the calling
+thread only, so a solve started from the GUI's solver thread is measured
+without the Tk main loop. Two modes:
+
+``sampling``
+    A background thread reads the solver thread's stack every ``interval``
+    seconds through ``sys._current_frames``. Overhead is a few percent, and
+    the samples are written as collapsed stacks (``a;b;c count`` per line),
+    the input format of flamegraph.pl, speedscope and inferno.
+``cprofile``
+    Deterministic ``cProfile`` of the block (it only hooks the thread that
+    enables it). Exact call counts at a higher overhead; the raw stats go to
+    a ``.prof`` file for pstats, snakeviz or flameprof.
+
+Either way a top-N table of the hottest functions is written next to it.
+"""
+from __future__ import annotations
+
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+from game_logic.board import Board
+from solver.cache import default_cache_path
+from solver.engines import ENGINES, SolveStats, create_engine
+
+MODES = ("sampling", "cprofile")
+
+
+def _function_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+class SamplingProfiler:
+    """Sample one thread's Python stack at a fixed interval.
+
+    ``stacks`` maps each root-to-leaf tuple of ``module:function`` names to
+    how many samples saw it. Frames above ``root`` (the caller that started
+    profiling) are left out, so stacks begin where the profiled code does.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter[Tuple[str, ...]] = Counter()
+        self.samples = 0
+        self._thread_id = 0
+        self._root = None
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def start(self, thread_id: int | None = None, root=None) -> None:
+        self._thread_id = thread_id or threading.get_ident()
+        self._root = root
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run, name="solver-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self._root = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_function_name(frame))
+                if frame is self._root:
+                    break
+                frame = frame.f_back
+            del frame
+            # A sample that raced with stop() shows the profiler shutting down, not the solve.
+            if stack and not self._stop.is_set():
+                stack.reverse()
+                self.stacks[tuple(stack)] += 1
+                self.samples += 1
+
+    def collapsed(self) -> str:
+        """Samples as collapsed stacks, heaviest first."""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def top(self, limit: int = 20) -> List[Tuple[str, int, int]]:
+        """``(function, self samples, total samples)``, most self time first."""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for name in set(stack):
+                total[name] += count
+        ranked = sorted(total, key=lambda name: (-own[name], -total[name], name))
+        return [(name, own[name], total[name]) for name in ranked[:limit]]
+
+    def table(self, limit: int = 20) -> str:
+        samples = self.samples or 1
+        rows = [f"{'self%':>6} {'total%':>6} {'samples':>8}  function"]
+        for name, own, total in self.top(limit):
+            rows.append(f"{100 * own / samples:6.1f} {100 * total / samples:6.1f} {own:8d}  {name}")
+        return "\n".join(rows) + "\n"
+
+
+class ProfileRun:
+    """Profile the body of a ``with`` block on the current thread and write the results.
+
+    On exit, files named ``<label>-<timestamp>`` are written to ``out_dir``:
+    ``.collapsed`` (sampling) or ``.prof`` (cprofile), and ``.top.txt``.
+    ``paths`` lists them and ``table`` holds the top-N text.
+    """
+
+    def __init__(self, out_dir: str, label: str = "solve", mode: str = "sampling",
+                 interval: float = 0.001, top: int = 20):
+        if mode not in MODES:
+            raise ValueError(f"unknown profiling mode {mode!r}; expected one of {', '.join(MODES)}")
+        self.out_dir = out_dir
+        self.label = label
+        self.mode = mode
+        self.top = top
+        self.sampler = SamplingProfiler(interval) if mode == "sampling" else None
+        self.profile = cProfile.Profile() if mode == "cprofile" else None
+        self.paths: Dict[str, str] = {}
+        self.table = ""
+        self.seconds = 0.0
+        self._start = 0.0
+
+    def __enter__(self) -> "ProfileRun":
+        self._start = time.perf_counter()
+        if self.sampler is not None:
+            self.sampler.start(root=sys._getframe(1))
+        else:
+            self.profile.enable()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        if self.sampler is not None:
+            self.sampler.stop()
+        else:
+            self.profile.disable()
+        self.seconds = time.perf_counter() - self._start
+        self._write()
+
+    def _write(self) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        stem = os.path.join(self.out_dir, f"{self.label}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        header = f"# {self.label}: {self.seconds:.3f}s, mode={self.mode}"
+        if self.sampler is not None:
+            self.paths["collapsed"] = f"{stem}.collapsed"
+            with open(self.paths["collapsed"], "w") as handle:
+                handle.write(self.sampler.collapsed())
+            self.table = f"{header}, {self.sampler.samples} samples\n{self.sampler.table(self.top)}"
+        else:
+            self.paths["prof"] = f"{stem}.prof"
+            self.profile.dump_stats(self.paths["prof"])
+            text = io.StringIO()
+            pstats.Stats(self.profile, stream=text).sort_stats("tottime").print_stats(self.top)
+            self.table = f"{header}\n{text.getvalue()}"
+        self.paths["top"] = f"{stem}.top.txt"
+        with open(self.paths["top"], "w") as handle:
+            handle.write(self.table)
+
+
+def default_profile_dir() -> str:
+    """Where GUI and CLI runs write profiles, next to the solve cache."""
+    return os.path.join(os.path.dirname(default_cache_path()), "profiles")
+
+
+def profile_solve(board: Board, engine: str = "auto", mode: str = "sampling", out_dir: str | None = None,
+                  interval: float = 0.001, top: int = 20) -> Tuple[bool, SolveStats, ProfileRun]:
+    """Solve ``board`` with ``engine`` under a profiler; return (solved, stats, run)."""
+    solver = create_engine(engine, board)
+    run = ProfileRun(out_dir or default_profile_dir(), label=f"solve-{engine}", mode=mode, interval=interval, top=top)
+    with run:
+        solved = solver.solve()
+    return solved, solver.stats(), run
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Solve one board under a profiler and print its hottest functions."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("board", help="board as printed by Board.canonical_key")
+    parser.add_argument("--engine", default="auto", choices=sorted(ENGINES))
+    parser.add_argument("--mode", default="sampling", choices=MODES)
+    parser.add_argument("--out", default=None, help="output directory (default: next to the solve cache)")
+    parser.add_argument("--interval", type=float, default=0.001, help="seconds between samples")
+    parser.add_argument("--top", type=int, default=20, help="rows in the hot-function table")
+    args = parser.parse_args(argv)
+    solved, stats, run = profile_solve(Board.from_canonical_key(args.board), engine=args.engine, mode=args.mode,
+                                       out_dir=args.out, interval=args.interval, top=args.top)
+    print(run.table, end="")
+    print(f"{'solved' if solved else 'no solution'} in {run.seconds:.3f}s, {stats.nodes} nodes", file=sys.stderr)
+    for kind, path in run.paths.items():
+        print(f"{kind}: {path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
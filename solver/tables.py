@@ -0,0 +1,349 @@
+"""Placement tables derived from the piece shapes and the board size.
+
+Building them takes tens of milliseconds, which every CLI run and pool
+worker would pay again, so ``get_tables`` keeps a binary copy next to the
+solve cache. The file name carries ``tables_fingerprint()``, a hash of the
+board size, piece shapes and codes, and the file format, so editing
+``game_logic/constants.py`` selects a new file, which is built on first use.
+Loading maps the file and copies each section out with
+``memoryview.cast``, with no per-value parsing.
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+from game_logic import NB_COLS, NB_ROWS, PIECE_CODES, PIECE_COLOR, PIECE_DIMENSIONS
+from game_logic.board import Board
+from solver.cache import default_cache_path, piece_set_version
+
+# (rotation, flip_h, flip_v, normalized offsets)
+Orientation = Tuple[int, bool, bool, Tuple[Tuple[int, int], ...]]
+
+TABLES_FORMAT = 1
+# Table files kept in the cache directory, most recently used first. Other
+# checkouts or branches with their own piece sets share the directory, so
+# their files must survive a rebuild here.
+KEEP_TABLE_FILES = 4
+_MAGIC = b"IQPT"
+_HEADER = struct.Struct("<4sH16sH")  # magic, format, fingerprint, section count
+_SECTION = struct.Struct("<8s1sxxxQQ")  # name, array typecode, byte offset, item count
+
+
+def cell_bit(row: int, col: int) -> int:
+    """Bit index of a cell in the occupancy masks.
+
+    Cells are numbered column-major so the lowest empty bit is the top of the
+    leftmost open column, which is the most constrained cell on a wide board.
+    """
+    return col * NB_ROWS + row
+
+
+def unique_orientations(color: PIECE_COLOR) -> Tuple[Orientation, ...]:
+    """Distinct orientations of ``color`` in the order BTSolver enumerates them.
+
+    Orientations are compared as cell sets: for symmetric pieces two
+    transforms can produce the same cells listed in a different order.
+    """
+    shaper = Board(generate=False)
+    seen: set[Tuple[Tuple[int, int], ...]] = set()
+    result: List[Orientation] = []
+    for rotation in (0, 90, 180, 270):
+        for flip_h in (False, True):
+            for flip_v in (False, True):
+                offsets = shaper.transform_piece(color, rotation, flip_h, flip_v)
+                cells = tuple(sorted(offsets))
+                if cells in seen:
+                    continue
+                seen.add(cells)
+                result.append((rotation, flip_h, flip_v, offsets))
+    return tuple(result)
+
+
+class PlacementTables:
+    """Every legal placement of every piece on an empty board, as bitmasks.
+
+    Placement ids index the parallel tuples ``masks``, ``piece_of`` and
+    ``placements``. ``by_min_cell[bit]`` lists the ids whose lowest occupied
+    bit is ``bit`` and ``by_cell[bit]`` the ids covering ``bit``.
+    ``size_sums[subset]`` has bit ``n`` set when some of the pieces in
+    ``subset`` (bit ``i`` standing for ``colors[i]``) add up to ``n`` cells.
+    """
+
+    __slots__ = (
+        "nb_rows",
+        "nb_cols",
+        "colors",
+        "codes",
+        "sizes",
+        "orientations",
+        "masks",
+        "piece_of",
+        "placements",
+        "by_min_cell",
+        "by_cell",
+        "size_sums",
+        "full_mask",
+    )
+
+    def __init__(self) -> None:
+        self._set_pieces()
+        self.orientations: Dict[PIECE_COLOR, Tuple[Orientation, ...]] = {
+            color: unique_orientations(color) for color in self.colors
+        }
+        cell_count = NB_ROWS * NB_COLS
+        masks: List[int] = []
+        piece_of: List[int] = []
+        placements: List[Tuple[int, int, int, bool, bool]] = []
+        by_min_cell: List[List[int]] = [[] for _ in range(cell_count)]
+        by_cell: List[List[int]] = [[] for _ in range(cell_count)]
+        for index, color in enumerate(self.colors):
+            for rotation, flip_h, flip_v, offsets in self.orientations[color]:
+                height = max(r for r, _ in offsets) + 1
+                width = max(c for _, c in offsets) + 1
+                for row in range(NB_ROWS - height + 1):
+                    for col in range(NB_COLS - width + 1):
+                        mask = 0
+                        for dr, dc in offsets:
+                            mask |= 1 << cell_bit(row + dr, col + dc)
+                        pid = len(masks)
+                        masks.append(mask)
+                        piece_of.append(index)
+                        placements.append((row, col, rotation, flip_h, flip_v))
+                        by_min_cell[(mask & -mask).bit_length() - 1].append(pid)
+                        for bit in range(cell_count):
+                            if mask >> bit & 1:
+                                by_cell[bit].append(pid)
+        self.masks = tuple(masks)
+        self.piece_of = bytes(piece_of)
+        self.placements = tuple(placements)
+        self.by_min_cell = tuple(tuple(ids) for ids in by_min_cell)
+        self.by_cell = tuple(tuple(ids) for ids in by_cell)
+        sums = [1] * (1 << len(self.colors))
+        for subset in range(1, len(sums)):
+            low = subset & -subset
+            rest = sums[subset ^ low]
+            sums[subset] = rest | rest << self.sizes[low.bit_length() - 1]
+        self.size_sums = tuple(sums)
+
+    def _set_pieces(self) -> None:
+        self.nb_rows = NB_ROWS
+        self.nb_cols = NB_COLS
+        self.colors: Tuple[PIECE_COLOR, ...] = tuple(
+            sorted((c for c in PIECE_DIMENSIONS if c != "empty"), key=lambda c: PIECE_CODES[c])
+        )
+        self.codes = tuple(PIECE_CODES[c] for c in self.colors)
+        self.sizes = tuple(len(PIECE_DIMENSIONS[c]) for c in self.colors)
+        self.full_mask = (1 << (NB_ROWS * NB_COLS)) - 1
+
+    def occupancy(self, board: Board) -> int:
+        """Bitmask of the non-empty cells of ``board``."""
+        occ = 0
+        for row in range(board.nb_rows):
+            for col in range(board.nb_cols):
+                if board.cells[row * board.nb_cols + col]:
+                    occ |= 1 << cell_bit(row, col)
+        return occ
+
+    # --- On-disk copy ---
+    def save(self, path: str) -> None:
+        """Write the tables for ``load``; the file is replaced atomically."""
+        orientations = array("B")
+        offsets = array("b")
+        for index, color in enumerate(self.colors):
+            for rotation, flip_h, flip_v, cells in self.orientations[color]:
+                orientations.extend((index, rotation // 90, flip_h, flip_v, len(cells)))
+                for cell in cells:
+                    offsets.extend(cell)
+        placements = array("B")
+        for row, col, rotation, flip_h, flip_v in self.placements:
+            placements.extend((row, col, rotation // 90, flip_h, flip_v))
+        sections = [
+            ("orients", orientations),
+            ("offsets", offsets),
+            ("masks", array("Q", self.masks)),
+            ("piece_of", array("B", self.piece_of)),
+            ("places", placements),
+            ("sizesums", array("Q", self.size_sums)),
+        ]
+        for name, lists in (("min", self.by_min_cell), ("cell", self.by_cell)):
+            starts = array("I", [0])
+            ids = array("H")
+            for group in lists:
+                ids.extend(group)
+                starts.append(len(ids))
+            sections += [(f"{name}_at", starts), (f"{name}_ids", ids)]
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        position = _HEADER.size + _SECTION.size * len(sections)
+        entries, blobs = [], []
+        for name, values in sections:
+            position += -position % 8
+            entries.append(_SECTION.pack(name.encode(), values.typecode.encode(), position, len(values)))
+            blobs.append((position, values.tobytes()))
+            position += len(blobs[-1][1])
+        data = bytearray(position)
+        data[:_HEADER.size] = _HEADER.pack(_MAGIC, TABLES_FORMAT, tables_fingerprint().encode(), len(sections))
+        data[_HEADER.size:_HEADER.size + len(entries) * _SECTION.size] = b"".join(entries)
+        for offset, blob in blobs:
+            data[offset:offset + len(blob)] = blob
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as handle:
+            handle.write(data)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PlacementTables":
+        """Tables from a file written by ``save``.
+
+        Raises ValueError when the file is damaged or was written for another
+        piece set or format, and OSError when it cannot be read.
+        """
+        with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                return cls._from_sections(_read_sections(view))
+            finally:
+                view.release()
+
+    @classmethod
+    def _from_sections(cls, sections: Dict[str, memoryview]) -> "PlacementTables":
+        try:
+            tables = cls.__new__(cls)
+            tables._set_pieces()
+            orientations: Dict[PIECE_COLOR, List[Orientation]] = {color: [] for color in tables.colors}
+            described, offsets = sections["orients"], sections["offsets"]
+            cursor = 0
+            for at in range(0, len(described), 5):
+                index, quarter, flip_h, flip_v, count = described[at:at + 5]
+                cells = tuple((offsets[i], offsets[i + 1]) for i in range(cursor, cursor + 2 * count, 2))
+                orientations[tables.colors[index]].append((quarter * 90, bool(flip_h), bool(flip_v), cells))
+                cursor += 2 * count
+            tables.orientations = {color: tuple(found) for color, found in orientations.items()}
+            tables.masks = tuple(sections["masks"])
+            tables.piece_of = sections["piece_of"].tobytes()
+            places = sections["places"]
+            tables.placements = tuple(
+                (places[at], places[at + 1], places[at + 2] * 90, bool(places[at + 3]), bool(places[at + 4]))
+                for at in range(0, len(places), 5)
+            )
+            tables.by_min_cell = _split(sections["min_at"], sections["min_ids"])
+            tables.by_cell = _split(sections["cell_at"], sections["cell_ids"])
+            tables.size_sums = tuple(sections["sizesums"])
+        except (KeyError, IndexError) as exc:
+            raise ValueError(f"incomplete placement tables: {exc}") from None
+        finally:
+            for section in sections.values():
+                section.release()
+        cell_count = tables.nb_rows * tables.nb_cols
+        if (len(tables.placements) != len(tables.masks) or len(tables.piece_of) != len(tables.masks)
+                or len(tables.by_cell) != cell_count or len(tables.size_sums) != 1 << len(tables.colors)):
+            raise ValueError("inconsistent placement tables")
+        return tables
+
+
+def _read_sections(view: memoryview) -> Dict[str, memoryview]:
+    if len(view) < _HEADER.size:
+        raise ValueError("truncated placement tables")
+    magic, version, fingerprint, count = _HEADER.unpack_from(view)
+    if magic != _MAGIC or version != TABLES_FORMAT:
+        raise ValueError(f"not a format {TABLES_FORMAT} placement table file")
+    if fingerprint.decode("ascii", "replace") != tables_fingerprint():
+        raise ValueError("placement tables were built for another piece set")
+    sections: Dict[str, memoryview] = {}
+    try:
+        for number in range(count):
+            raw_name, typecode, offset, items = _SECTION.unpack_from(view, _HEADER.size + number * _SECTION.size)
+            size = array(typecode.decode()).itemsize
+            if offset + items * size > len(view):
+                raise ValueError("truncated placement tables")
+            sections[raw_name.rstrip(b"\0").decode()] = view[offset:offset + items * size].cast(typecode.decode())
+    except (ValueError, TypeError, struct.error) as exc:
+        for section in sections.values():
+            section.release()
+        raise ValueError(f"damaged placement tables: {exc}") from None
+    return sections
+
+
+def _split(starts: Sequence[int], ids: Sequence[int]) -> Tuple[Tuple[int, ...], ...]:
+    return tuple(tuple(ids[starts[i]:starts[i + 1]]) for i in range(len(starts) - 1))
+
+
+def tables_fingerprint() -> str:
+    """Hash of everything the tables are derived from, plus the file format."""
+    payload = repr((TABLES_FORMAT, sys.byteorder, piece_set_version(), sorted(PIECE_CODES.items()))).encode()
+    return hashlib.sha1(payload).hexdigest()[:16]
+
+
+def default_tables_path() -> str:
+    """Cache file for the current piece set, next to the solve cache."""
+    return os.path.join(os.path.dirname(default_cache_path()), f"placement_tables-{tables_fingerprint()}.bin")
+
+
+def load_tables(path: str | None = None) -> PlacementTables:
+    """Tables from the cache file at ``path``, rebuilding and rewriting it if needed.
+
+    Loading marks the file as recently used. A rebuild also removes the
+    least recently used table files beyond ``KEEP_TABLE_FILES``. An
+    unwritable cache directory only costs the rebuild.
+    """
+    path = path or default_tables_path()
+    try:
+        tables = PlacementTables.load(path)
+    except (OSError, ValueError):
+        pass
+    else:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return tables
+    tables = PlacementTables()
+    try:
+        tables.save(path)
+        _prune_table_files(os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        pass
+    return tables
+
+
+def _prune_table_files(directory: str) -> None:
+    """Remove all but the ``KEEP_TABLE_FILES`` most recently used table files in ``directory``.
+
+    Only files that start with this module's magic number are touched.
+    """
+    found = []
+    for name in os.listdir(directory):
+        if not (name.startswith("placement_tables-") and name.endswith(".bin")):
+            continue
+        candidate = os.path.join(directory, name)
+        try:
+            with open(candidate, "rb") as handle:
+                if handle.read(len(_MAGIC)) != _MAGIC:
+                    continue
+            found.append((os.path.getmtime(candidate), candidate))
+        except OSError:
+            continue
+    found.sort(reverse=True)
+    for _, stale in found[KEEP_TABLE_FILES:]:
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+
+
+_TABLES: PlacementTables | None = None
+
+
+def get_tables() -> PlacementTables:
+    """Process-wide tables, loaded from (or built into) the on-disk cache on first use."""
+    global _TABLES
+    if _TABLES is None:
+        _TABLES = load_tables()
+    return _TABLES
@@ -0,0 +1,281 @@
+"""Compact binary traces of a BTSolver search, and their replay.
+
+A trace is a header holding the starting board, then one fixed 8-byte
+record per search event::
+
+    kind, depth, piece code, row, col, orientation, 2 pad bytes
+
+``orientation`` packs ``rotation // 90`` in bits 0-1, ``flip_h`` in bit 2
+and ``flip_v`` in bit 3. Fixed-width records let a reader memory-map the
+file and jump to any event by index without parsing what comes before.
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, Iterator, NamedTuple, Sequence, Tuple
+
+from game_logic import PIECE_CODES, PIECE_COLOR
+from game_logic.board import Board, BoardSnapshot
+from solver.bt_solver import BTSolver
+
+TRY, PRUNE, COMMIT, BACKTRACK, SOLUTION = 1, 2, 3, 4, 5
+EVENT_NAMES = {TRY: "try", PRUNE: "prune", COMMIT: "commit", BACKTRACK: "backtrack", SOLUTION: "solution"}
+
+MAGIC = b"IQTR"
+FORMAT_VERSION = 1
+RECORD = struct.Struct("<6B2x")
+_CODE_COLOR: Dict[int, PIECE_COLOR] = {code: color for color, code in PIECE_CODES.items()}
+_NO_PLACEMENT = (0, 0, 0, False, False)
+
+
+def _header_struct(cell_count: int) -> struct.Struct:
+    # magic, version, record size, rows, cols, cells, available-piece mask
+    return struct.Struct(f"<4sHHBB{cell_count}sH")
+
+
+def _data_offset(header: struct.Struct) -> int:
+    return -(-header.size // RECORD.size) * RECORD.size
+
+
+class TraceEvent(NamedTuple):
+    kind: int
+    depth: int
+    piece: PIECE_COLOR
+    placement: Tuple[int, int, int, bool, bool]
+
+    @property
+    def name(self) -> str:
+        return EVENT_NAMES.get(self.kind, "?")
+
+
+class TraceWriter:
+    """Append search events to a trace file through a fixed in-memory buffer.
+
+    Events are packed straight into a preallocated ``bytearray`` and written
+    out whenever it fills, so recording costs one ``pack_into`` per event.
+    """
+
+    def __init__(self, path: str, board: Board, buffer_events: int = 8192):
+        header = _header_struct(len(board.cells))
+        mask = 0
+        for color in board.available:
+            mask |= 1 << PIECE_CODES[color]
+        self.path = path
+        self.events = 0
+        self._handle = open(path, "wb")
+        head = header.pack(MAGIC, FORMAT_VERSION, RECORD.size, board.nb_rows, board.nb_cols, bytes(board.cells), mask)
+        self._handle.write(head.ljust(_data_offset(header), b"\0"))
+        self._buffer = bytearray(RECORD.size * buffer_events)
+        self._offset = 0
+
+    def _write(self, kind: int, depth: int, piece: PIECE_COLOR, placement: Tuple[int, int, int, bool, bool]) -> None:
+        row, col, rotation, flip_h, flip_v = placement
+        RECORD.pack_into(
+            self._buffer, self._offset,
+            kind, depth, PIECE_CODES[piece], row, col, rotation // 90 | flip_h << 2 | flip_v << 3,
+        )
+        self._offset += RECORD.size
+        self.events += 1
+        if self._offset == len(self._buffer):
+            self.flush()
+
+    def tried(self, depth: int, piece: PIECE_COLOR, placement) -> None:
+        self._write(TRY, depth, piece, placement)
+
+    def pruned(self, depth: int, piece: PIECE_COLOR, placement) -> None:
+        self._write(PRUNE, depth, piece, placement)
+
+    def committed(self, depth: int, piece: PIECE_COLOR, placement) -> None:
+        self._write(COMMIT, depth, piece, placement)
+
+    def backtracked(self, depth: int, piece: PIECE_COLOR, placement) -> None:
+        self._write(BACKTRACK, depth, piece, placement)
+
+    def solved(self, depth: int) -> None:
+        self._write(SOLUTION, depth, "empty", _NO_PLACEMENT)
+
+    def flush(self) -> None:
+        self._handle.write(memoryview(self._buffer)[: self._offset])
+        self._handle.flush()
+        self._offset = 0
+
+    def close(self) -> None:
+        if self._handle.closed:
+            return
+        self.flush()
+        self._handle.close()
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+class TraceReader:
+    """Random access to the events of a trace file through ``mmap``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            size = os.fstat(handle.fileno()).st_size
+            head = handle.read(8)
+            if len(head) < 8 or head[:4] != MAGIC:
+                raise ValueError(f"{path} is not a solve trace")
+            version, record_size = struct.unpack_from("<HH", head, 4)
+            if version != FORMAT_VERSION or record_size != RECORD.size:
+                raise ValueError(f"unsupported trace format {version}")
+            nb_rows, nb_cols = handle.read(2)
+            self._header = _header_struct(nb_rows * nb_cols)
+            self._start = _data_offset(self._header)
+            self._count = max(0, size - self._start) // RECORD.size
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        _, _, _, self.nb_rows, self.nb_cols, self._cells, self._mask = self._header.unpack_from(self._map)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> TraceEvent:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        kind, depth, code, row, col, orient = RECORD.unpack_from(self._map, self._start + index * RECORD.size)
+        placement = (row, col, (orient & 3) * 90, bool(orient & 4), bool(orient & 8))
+        return TraceEvent(kind, depth, _CODE_COLOR[code], placement)
+
+    def kind(self, index: int) -> int:
+        """Event kind at ``index``, read without decoding the rest of the record."""
+        return self._map[self._start + index * RECORD.size]
+
+    def __iter__(self) -> Iterator[TraceEvent]:
+        for index in range(self._count):
+            yield self[index]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of events of each kind, without decoding the records."""
+        kinds = self._map[self._start:self._start + self._count * RECORD.size:RECORD.size]
+        return {name: kinds.count(kind) for kind, name in EVENT_NAMES.items()}
+
+    def initial_board(self) -> Board:
+        board = Board(generate=False)
+        board.cells[:] = self._cells
+        board.available = [color for color in board.available if self._mask >> PIECE_CODES[color] & 1]
+        return board
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class TraceReplay:
+    """Board state at any event of a trace.
+
+    ``seek`` applies or reverts commit/backtrack events one at a time, so
+    moving a short way in either direction is cheap. A snapshot is kept every
+    ``checkpoint_every`` events on the way forward, so a long jump back to a
+    visited region restarts from the nearest snapshot instead of the start.
+    """
+
+    def __init__(self, reader: TraceReader, checkpoint_every: int = 65536):
+        self.reader = reader
+        self.board = reader.initial_board()
+        self.position = 0
+        self.checkpoint_every = checkpoint_every
+        self._checkpoints: Dict[int, BoardSnapshot] = {0: self.board.snapshot()}
+
+    def seek(self, index: int) -> Board:
+        """Move to just before event ``index`` (``len(reader)`` means the end)."""
+        index = max(0, min(index, len(self.reader)))
+        if index < self.position:
+            nearest = index - index % self.checkpoint_every
+            if self.position - index > self.checkpoint_every and nearest in self._checkpoints:
+                self.board.restore(self._checkpoints[nearest])
+                self.position = nearest
+            else:
+                while self.position > index:
+                    self.position -= 1
+                    if self.reader.kind(self.position) in (COMMIT, BACKTRACK):
+                        self._revert(self.reader[self.position])
+        reader = self.reader
+        every = self.checkpoint_every
+        position = self.position
+        while position < index:
+            if reader.kind(position) in (COMMIT, BACKTRACK):
+                self._apply(reader[position])
+            position += 1
+            if position % every == 0 and position not in self._checkpoints:
+                self._checkpoints[position] = self.board.snapshot()
+        self.position = position
+        return self.board
+
+    def step(self, count: int = 1) -> Board:
+        return self.seek(self.position + count)
+
+    def _place(self, event: TraceEvent) -> None:
+        self.board.place_piece(event.piece, *event.placement)
+        self.board.available.remove(event.piece)
+
+    def _apply(self, event: TraceEvent) -> None:
+        if event.kind == COMMIT:
+            self._place(event)
+        elif event.kind == BACKTRACK:
+            self.board.undo_last_piece()
+
+    def _revert(self, event: TraceEvent) -> None:
+        if event.kind == COMMIT:
+            self.board.undo_last_piece()
+        elif event.kind == BACKTRACK:
+            self._place(event)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Record a solve trace for a board, or replay one headless."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="solve a board and write its trace")
+    record.add_argument("board", help="board as printed by Board.canonical_key")
+    record.add_argument("trace", help="trace file to write")
+    replay = commands.add_parser("replay", help="print the board as the search moves")
+    replay.add_argument("trace")
+    replay.add_argument("--start", type=int, default=0, help="first event to show")
+    replay.add_argument("--speed", type=float, default=0.0, help="events per second (0: no delay)")
+    replay.add_argument("--every", type=int, default=1, help="print the board every N events")
+    commands.add_parser("summary", help="print event counts").add_argument("trace")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        board = Board.from_canonical_key(args.board)
+        with TraceWriter(args.trace, board) as writer:
+            solved = BTSolver(board, trace=writer).solve()
+        print(f"{'solved' if solved else 'no solution'}, {writer.events} events", file=sys.stderr)
+        return 0
+
+    reader = TraceReader(args.trace)
+    try:
+        if args.command == "summary":
+            print(f"{len(reader)} events: {reader.counts()}")
+            return 0
+        replay_view = TraceReplay(reader)
+        replay_view.seek(args.start)
+        delay = args.every / args.speed if args.speed > 0 else 0.0
+        while replay_view.position < len(reader):
+            board = replay_view.step(args.every)
+            event = reader[replay_view.position - 1]
+            print(f"#{replay_view.position} {event.name} depth={event.depth} {event.piece} {event.placement}")
+            print(board, end="\n\n")
+            if delay:
+                time.sleep(delay)
+    finally:
+        reader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,3 +1,17 @@
-"""Tests package marker. Allows test discovery via `python -m unittest discover`."""
+"""Tests package marker. Allows test discovery via `python -m unittest discover`.
+
+Importing it points ``IQ_PUZZLER_CACHE_DIR`` at a fresh temporary directory,
+so no test reads or writes the user's real cache. It is set for the whole
+process, not per module, because the placement tables are loaded once per
+process and pool workers inherit the environment.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+_CACHE_DIR = tempfile.mkdtemp(prefix="iq_puzzler_test_cache-")
+os.environ["IQ_PUZZLER_CACHE_DIR"] = _CACHE_DIR
+atexit.register(shutil.rmtree, _CACHE_DIR, ignore_errors=True)
 
 __all__ = []
@@ -0,0 +1,62 @@
+import time
+import unittest
+
+from game_logic.board import Board
+from solver.anytime import AnytimeSolver
+from tests.boards import empty_board, partial_board
+from tests.invariants_test import DEAD
+
+
+def replay(board, steps):
+	"""Apply ``steps`` to a copy of ``board``; fail if any placement is illegal."""
+	board = board.copy()
+	for color, placement in steps:
+		assert board.place_piece(color, *placement), (color, placement)
+		board.available.remove(color)
+	return board
+
+
+class TestAnytimeSolver(unittest.TestCase):
+	def test_solvable_board_is_solved_outright(self):
+		board = empty_board()
+		solver = AnytimeSolver(board)
+		self.assertTrue(solver.solve())
+		self.assertTrue(solver.complete)
+		self.assertEqual(solver.cells_covered, 55)
+		self.assertNotIn(0, replay(board, solver.solution_steps).cells)
+
+	def test_keeps_the_best_partial_of_an_unsolvable_board(self):
+		board = partial_board(["yellow", "green"])
+		board.available.append("light_blue")
+		solver = AnytimeSolver(board, time_budget=1.0)
+		self.assertFalse(solver.solve())
+		self.assertEqual((solver.cells_covered, solver.cells_total, solver.pieces_placed), (9, 9, 2))
+		self.assertNotIn(0, replay(board, solver.solution_steps).cells)
+
+	def test_partials_are_legal_and_improve(self):
+		for key in DEAD:
+			board = Board.from_canonical_key(key)
+			seen = []
+			solver = AnytimeSolver(board, on_improvement=seen.append)
+			start = time.perf_counter()
+			self.assertFalse(solver.solve())
+			self.assertLess(time.perf_counter() - start, 0.5)
+			done = replay(board, solver.solution_steps)
+			self.assertEqual(done.cells.count(0), solver.cells_total - solver.cells_covered)
+			self.assertEqual(len(seen), len(solver.improvements))
+			progress = [(cells, pieces) for _, cells, pieces in solver.improvements]
+			self.assertEqual(progress, sorted(progress))
+
+	def test_stops_at_the_time_budget(self):
+		# Mostly empty and unsolvable by area, so the partial search never runs out of tree.
+		board = empty_board()
+		board.available.remove("light_blue")
+		solver = AnytimeSolver(board, time_budget=0.05)
+		start = time.perf_counter()
+		self.assertFalse(solver.solve())
+		self.assertLess(time.perf_counter() - start, 0.3)
+		self.assertGreater(solver.cells_covered, 40)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,53 @@
+import dataclasses
+import pickle
+import unittest
+
+from game_logic import Board, BoardSnapshot
+from tests.boards import empty_board, partial_board
+
+
+class TestBoardSnapshot(unittest.TestCase):
+	def test_restore_round_trip(self):
+		board = empty_board()
+		self.assertTrue(board.place_piece("yellow", 0, 0))
+		board.available.remove("yellow")
+		snap = board.snapshot()
+		self.assertTrue(board.place_piece("green", 2, 2))
+		board.available.remove("green")
+		board.restore(snap)
+		self.assertEqual(board.snapshot(), snap)
+		self.assertEqual(board.undo_last_piece(), "yellow")
+		self.assertEqual(board.canonical_key(), empty_board().canonical_key())
+
+	def test_snapshot_is_immutable_and_detached(self):
+		board = partial_board(["yellow", "green"])
+		snap = board.snapshot()
+		with self.assertRaises(dataclasses.FrozenInstanceError):
+			snap.cells = b""
+		board.place_piece("yellow", 0, 4)
+		self.assertNotEqual(board.snapshot().cells, snap.cells)
+		self.assertEqual(snap.canonical_key(), partial_board(["yellow", "green"]).canonical_key())
+
+	def test_copy_is_independent(self):
+		board = partial_board(["yellow", "green"])
+		clone = board.copy()
+		clone.place_piece("yellow", 0, 4)
+		clone.available.remove("yellow")
+		self.assertIn("yellow", board.available)
+		self.assertEqual(board.get(0, 4), 0)
+
+	def test_snapshot_pickles_for_worker_processes(self):
+		snap = partial_board(["yellow"]).snapshot()
+		self.assertEqual(pickle.loads(pickle.dumps(snap)), snap)
+		self.assertEqual(Board.from_snapshot(snap).snapshot(), snap)
+
+	def test_board_uses_slots_and_compact_cells(self):
+		board = empty_board()
+		self.assertFalse(hasattr(board, "__dict__"))
+		self.assertIsInstance(board.cells, bytearray)
+		self.assertEqual(len(board.cells), board.nb_rows * board.nb_cols)
+		self.assertIsInstance(board.snapshot(), BoardSnapshot)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,37 @@
+"""Shared board fixtures for the test-suite."""
+from game_logic import Board, PIECE_COLOR
+
+# One complete tiling of the 5x11 board, as (color, placement) steps.
+SOLVED_STEPS: list[tuple[PIECE_COLOR, tuple[int, int, int, bool, bool]]] = [
+	("turquoise", (0, 7, 90, False, True)),
+	("red", (3, 7, 0, True, False)),
+	("pink", (0, 0, 0, False, False)),
+	("yellow", (0, 4, 0, False, False)),
+	("orange", (2, 5, 90, False, True)),
+	("purple", (1, 8, 0, True, False)),
+	("blue", (2, 0, 0, False, False)),
+	("lime", (0, 5, 0, True, False)),
+	("green", (0, 1, 90, False, False)),
+	("dark_blue", (3, 3, 0, False, False)),
+	("burgundy", (1, 2, 90, False, False)),
+	("light_blue", (0, 9, 0, False, True)),
+]
+
+
+def empty_board() -> Board:
+	"""Return a cleared board with every piece available."""
+	board = Board()
+	board.clear()
+	return board
+
+
+def partial_board(missing: list[PIECE_COLOR]) -> Board:
+	"""Return the solved layout with the ``missing`` pieces left to place."""
+	board = empty_board()
+	for color, placement in SOLVED_STEPS:
+		if color in missing:
+			continue
+		assert board.place_piece(color, *placement), color
+		board.available.remove(color)
+	board.history.clear()
+	return board
@@ -0,0 +1,51 @@
+import os
+import random
+import tempfile
+import unittest
+
+from batch.corpus import decode_layout, encode_layout, generate_corpus, read_corpus
+from game_logic.board import Board
+from tests.boards import partial_board
+
+
+class TestCorpus(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+
+	def test_record_round_trip(self):
+		key = partial_board(["yellow", "green", "lime"]).canonical_key()
+		record = encode_layout(key)
+		self.assertEqual(len(record), 30)
+		self.assertEqual(decode_layout(record), key)
+
+	def test_streams_distinct_valid_layouts(self):
+		for fmt in ("jsonl", "binary"):
+			path = os.path.join(self.tmp.name, f"corpus.{fmt}")
+			stats = generate_corpus(300, path, workers=2, seed=5, fmt=fmt, chunk=50)
+			keys = list(read_corpus(path))
+			self.assertEqual(stats["written"], 300)
+			self.assertEqual(len(keys), 300)
+			self.assertEqual(len(set(keys)), 300)
+			self.assertGreaterEqual(stats["attempts"] - stats["rejected"], 300 + stats["duplicates"])
+			for key in keys[:50]:
+				board = Board.from_canonical_key(key)
+				self.assertEqual(len(board.available), 10)
+				self.assertTrue(board.initial_layout_valid())
+
+	def test_output_does_not_depend_on_worker_count(self):
+		paths = [os.path.join(self.tmp.name, f"w{n}.jsonl") for n in (1, 3)]
+		for path, workers in zip(paths, (1, 3)):
+			generate_corpus(120, path, workers=workers, seed=9, chunk=40)
+		self.assertEqual(list(read_corpus(paths[0])), list(read_corpus(paths[1])))
+
+	def test_generate_puzzle_reports_failure(self):
+		board = Board(generate=False)
+		self.assertFalse(board.generate_puzzle(max_total_attempts=3, piece_attempts=0, rng=random.Random(0)))
+		self.assertEqual(len(board.available), 12)
+		self.assertTrue(board.generate_puzzle(rng=random.Random(0)))
+		self.assertEqual(len(board.available), 10)
+
+
+if __name__ == "__main__":
+	unittest.main()
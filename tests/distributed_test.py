@@ -0,0 +1,106 @@
+import multiprocessing
+import socket
+import time
+import unittest
+
+from solver.distributed import Coordinator, _Channel, _encode_steps, run_worker
+from solver.iterative import IterativeSolver
+from tests.boards import partial_board
+
+MISSING = ["turquoise", "red", "pink", "yellow", "orange", "purple", "lime"]
+
+
+def solution_set(solutions):
+	return {tuple(sorted(steps)) for steps in solutions}
+
+
+def local_solutions():
+	found = []
+	IterativeSolver(partial_board(MISSING)).run(on_solution=found.append)
+	return found
+
+
+class TestDonation(unittest.TestCase):
+	def test_donated_subtrees_partition_the_search(self):
+		solver = IterativeSolver(partial_board(MISSING))
+		found = []
+		solver.run(max_nodes=20, on_solution=found.append)
+		donated = []
+		while len(donated) < 3 and (unit := solver.donate()) is not None:
+			donated.append(unit)
+		solver.run(on_solution=found.append)
+		for prefix, piece, placements in donated:
+			board = partial_board(MISSING)
+			for color, placement in prefix:
+				board.place_piece(color, *placement)
+				board.available.remove(color)
+			part = IterativeSolver(board)
+			part.start_subtree(piece, placements)
+			part.run(on_solution=lambda steps, prefix=prefix: found.append(prefix + steps))
+		self.assertEqual(len(donated), 3)
+		self.assertEqual(len(found), len(local_solutions()))
+		self.assertEqual(solution_set(found), solution_set(local_solutions()))
+
+
+class TestDistributedSolve(unittest.TestCase):
+	def run_cluster(self, workers, coordinator=None, **options):
+		if coordinator is None:
+			coordinator = Coordinator(partial_board(MISSING), **options).start()
+			self.addCleanup(coordinator.close)
+		host, port = coordinator.address
+		procs = [multiprocessing.Process(target=run_worker, args=(host, port, 20)) for _ in range(workers)]
+		for proc in procs:
+			proc.start()
+		self.assertTrue(coordinator.wait(timeout=60))
+		for proc in procs:
+			proc.join(timeout=10)
+			self.assertEqual(proc.exitcode, 0)
+		return coordinator
+
+	def test_workers_find_every_solution_once(self):
+		coordinator = self.run_cluster(3)
+		expected = local_solutions()
+		self.assertEqual(coordinator.solution_count, len(expected))
+		self.assertEqual(len(coordinator.solutions), len(expected))
+		self.assertEqual(solution_set(coordinator.solutions), solution_set(expected))
+		self.assertGreater(coordinator.steals, 0)
+		self.assertEqual(coordinator.units_done, coordinator.steals + 1)
+
+	def test_dropped_worker_is_searched_again(self):
+		coordinator = Coordinator(partial_board(MISSING)).start()
+		self.addCleanup(coordinator.close)
+		# A worker that takes the root unit, reports a solution and a donated
+		# subtree, then disconnects before finishing.
+		solver = IterativeSolver(partial_board(MISSING))
+		found = []
+		solver.run(on_solution=found.append)
+		solver = IterativeSolver(partial_board(MISSING))
+		solver.run(max_nodes=20)
+		prefix, piece, placements = solver.donate()
+		with socket.create_connection(coordinator.address) as sock:
+			channel = _Channel(sock)
+			channel.send({"op": "hello"})
+			channel.recv()
+			channel.send({"op": "request"})
+			self.assertEqual(channel.recv()["op"], "work")
+			channel.send({"op": "solution", "steps": _encode_steps(found[0])})
+			channel.send({"op": "donate", "units": [{
+				"prefix": _encode_steps(prefix), "piece": piece, "placements": [list(p) for p in placements]}]})
+		deadline = time.monotonic() + 10
+		while coordinator.requeued_units == 0 and time.monotonic() < deadline:
+			time.sleep(0.01)
+		self.assertEqual(coordinator.requeued_units, 1)
+		self.run_cluster(2, coordinator)
+		expected = local_solutions()
+		self.assertEqual(coordinator.solution_count, len(expected))
+		self.assertEqual(len(coordinator.solutions), len(expected))
+		self.assertEqual(solution_set(coordinator.solutions), solution_set(expected))
+
+	def test_count_only_mode(self):
+		coordinator = self.run_cluster(2, collect_solutions=False)
+		self.assertEqual(coordinator.solution_count, len(local_solutions()))
+		self.assertEqual(coordinator.solutions, [])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+
+from solver.engines import (
+	COUNT,
+	ENGINES,
+	ENUMERATE,
+	TRACE,
+	BoardFeatures,
+	EngineSelector,
+	SelectionRule,
+	benchmark_boards,
+	create_engine,
+	engines_with,
+)
+from solver.trace import TraceReader, TraceReplay, TraceWriter
+from tests.boards import partial_board
+
+MISSING = ["turquoise", "red", "pink", "orange", "purple", "lime"]
+
+
+def record(engine, pieces, seconds, completed=True):
+	return {"engine": engine, "pieces_left": pieces, "seconds": seconds, "completed": completed}
+
+
+class TestEngineRegistry(unittest.TestCase):
+	def test_builtin_engines_are_registered(self):
+		self.assertTrue({"backtracking", "iterative", "kernel", "portfolio", "auto"} <= set(ENGINES))
+		self.assertIn("kernel", engines_with(ENUMERATE, COUNT))
+		self.assertNotIn("backtracking", engines_with(ENUMERATE))
+		with self.assertRaises(ValueError):
+			create_engine("nope", partial_board([]))
+
+	def test_engines_solve_and_report_stats(self):
+		for name in ("backtracking", "iterative", "kernel", "auto"):
+			board = partial_board(MISSING)
+			engine = create_engine(name, board)
+			self.assertTrue(engine.solve(), name)
+			for color, placement in engine.solution_steps:
+				self.assertTrue(board.place_piece(color, *placement), name)
+				board.available.remove(color)
+			self.assertNotIn(0, board.cells)
+			stats = engine.stats()
+			self.assertEqual(stats.steps, len(MISSING))
+			self.assertGreater(stats.nodes, 0)
+			self.assertFalse(stats.cached)
+
+	def test_enumeration_agrees_across_engines(self):
+		counts = {}
+		for name in engines_with(ENUMERATE):
+			found = []
+			counts[name] = create_engine(name, partial_board(MISSING)).enumerate(found.append)
+			self.assertEqual(len(found), counts[name])
+			self.assertEqual(create_engine(name, partial_board(MISSING)).count(limit=2), 2)
+		self.assertEqual(len(set(counts.values())), 1, counts)
+		with self.assertRaises(NotImplementedError):
+			create_engine("backtracking", partial_board(MISSING)).count()
+
+	def test_kernel_trace_replays_to_the_solution(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp, "kernel.iqtrace")
+			board = partial_board(MISSING)
+			engine = create_engine("kernel", board)
+			self.assertIn(TRACE, engine.capabilities)
+			with TraceWriter(path, board) as writer:
+				engine.trace = writer
+				self.assertTrue(engine.solve())
+			reader = TraceReader(path)
+			try:
+				self.assertEqual(reader.counts()["try"], engine.stats().placements)
+				self.assertNotIn(0, TraceReplay(reader).seek(len(reader)).cells)
+			finally:
+				reader.close()
+
+
+class TestEngineSelector(unittest.TestCase):
+	def test_calibration_picks_fastest_median_per_piece_count(self):
+		records = [
+			record("backtracking", 1, 0.001), record("kernel", 1, 0.002),
+			record("backtracking", 2, 0.001), record("kernel", 2, 0.003),
+			record("backtracking", 3, 0.001, completed=False), record("kernel", 3, 0.5),
+			record("backtracking", 4, 9.0), record("kernel", 4, 0.1),
+		]
+		selector = EngineSelector.calibrate(records)
+		self.assertEqual(selector.rules, [SelectionRule(2, "backtracking"), SelectionRule(4, "kernel")])
+		self.assertEqual(selector.select(partial_board(["lime"])), "backtracking")
+		self.assertEqual(selector.select(partial_board(MISSING)), "kernel")
+		self.assertEqual(selector.select(partial_board(["lime"]), needs=(ENUMERATE,)), "kernel")
+
+	def test_benchmark_boards_cover_every_piece_count(self):
+		boards = benchmark_boards(2, seed=1)
+		counts = sorted(BoardFeatures.of(board).pieces_left for board in boards)
+		self.assertEqual(counts, sorted(list(range(1, 13)) * 2))
+		for board in boards:
+			self.assertEqual(board.cells.count(0), sum(len(board.transform_piece(color)) for color in board.available))
+
+	def test_rules_round_trip_through_json(self):
+		selector = EngineSelector([SelectionRule(3, "iterative"), SelectionRule(12, "kernel")])
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp, "rules.json")
+			selector.save(path)
+			loaded = EngineSelector.load(path)
+			self.assertEqual(loaded.rules, selector.rules)
+			self.assertEqual(EngineSelector.load(os.path.join(tmp, "missing.json")).rules[0].engine, "kernel")
+
+	def test_auto_engine_uses_the_selected_engine(self):
+		engine = create_engine("auto", partial_board(MISSING))
+		engine.selector = EngineSelector([SelectionRule(12, "iterative")])
+		self.assertTrue(engine.solve())
+		self.assertEqual(engine.stats().engine, "iterative")
+
+
+if __name__ == "__main__":
+	unittest.main()
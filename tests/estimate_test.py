@@ -0,0 +1,58 @@
+import time
+import unittest
+
+from game_logic.board import Board
+from solver.bt_solver import SolverConfig
+from solver.estimate import TreeEstimator, estimate_tree
+from solver.iterative import IterativeSolver
+from tests.boards import empty_board, partial_board
+from tests.invariants_test import DEAD
+
+MISSING = ["yellow", "green", "red", "pink", "blue", "lime", "orange"]
+
+
+def tree_size(board, config):
+	solver = IterativeSolver(board, config=config)
+	solutions = []
+	solver.run(on_solution=solutions.append)
+	return solver.nodes_visited, len(solutions)
+
+
+class TestTreeEstimate(unittest.TestCase):
+	def test_converges_to_exhaustive_count(self):
+		for config in (SolverConfig(), SolverConfig(propagate=False)):
+			nodes, solutions = tree_size(partial_board(MISSING), config)
+			estimate = estimate_tree(partial_board(MISSING), probes=1000, time_budget=None, config=config)
+			self.assertLessEqual(estimate.nodes_low, nodes)
+			self.assertGreaterEqual(estimate.nodes_high, nodes)
+			self.assertAlmostEqual(estimate.solutions, solutions, delta=0.5)
+
+	def test_forced_board_is_exact(self):
+		estimate = estimate_tree(partial_board(["green"]), probes=8, time_budget=None)
+		self.assertEqual((estimate.nodes, estimate.nodes_low, estimate.nodes_high), (1.0, 1.0, 1.0))
+		self.assertEqual(estimate.solutions, 1.0)
+		# Without propagation the search branches once, into the only placement.
+		self.assertEqual(estimate_tree(partial_board(["green"]), config=SolverConfig(propagate=False)).nodes, 2.0)
+
+	def test_bigger_boards_cost_more(self):
+		small = estimate_tree(partial_board(MISSING[:5]), probes=200, time_budget=None)
+		large = estimate_tree(partial_board(MISSING), probes=200, time_budget=None)
+		self.assertLess(small.nodes, large.nodes)
+		self.assertLess(small.seconds, large.seconds)
+
+	def test_dead_board_reports_reason(self):
+		for key, reason in DEAD.items():
+			estimate = TreeEstimator(Board.from_canonical_key(key)).estimate()
+			self.assertEqual(estimate.unsolvable_reason, reason)
+			self.assertEqual((estimate.nodes, estimate.probes), (0.0, 0))
+
+	def test_time_budget_stops_probing(self):
+		start = time.perf_counter()
+		estimate = estimate_tree(empty_board(), probes=100000, time_budget=0.01)
+		self.assertGreaterEqual(estimate.probes, 2)
+		self.assertLess(estimate.probes, 100000)
+		self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from batch.corpus import generate_corpus, read_corpus
+from batch.feasibility import BatchFeasibility, np, triage_corpus
+from game_logic.board import Board
+from solver.tables import get_tables
+from tests.boards import empty_board, partial_board
+from tests.invariants_test import DEAD
+
+
+def legal_counts(board):
+	"""Per-piece legal placement counts, one board at a time."""
+	tables = get_tables()
+	occupied = tables.occupancy(board)
+	counts = [0] * len(tables.colors)
+	for pid, mask in enumerate(tables.masks):
+		if tables.colors[tables.piece_of[pid]] in board.available and not mask & occupied:
+			counts[tables.piece_of[pid]] += 1
+	return counts
+
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class TestBatchFeasibility(unittest.TestCase):
+	def setUp(self):
+		self.evaluator = BatchFeasibility(chunk=3)
+
+	def test_matches_single_board_counts(self):
+		boards = [empty_board(), partial_board(["green"]), partial_board(["yellow", "green", "red", "pink"])]
+		boards += [Board.from_canonical_key(key) for key in DEAD]
+		report = self.evaluator.evaluate(*self.evaluator.from_boards(boards))
+		for index, board in enumerate(boards):
+			self.assertEqual(report.legal_counts[index].tolist(), legal_counts(board))
+
+	def test_dead_and_forced_cells(self):
+		boards = [partial_board(["green"]), empty_board()] + [Board.from_canonical_key(key) for key in DEAD]
+		report = self.evaluator.evaluate(*self.evaluator.from_boards(boards))
+		# Only one green placement fits the hole it left, so all four cells are forced.
+		self.assertEqual(report.forced_counts[0], 4)
+		self.assertEqual(report.min_branching[0], 1)
+		self.assertEqual(report.forced_counts[1], 0)
+		self.assertFalse(report.dead[0] or report.dead[1])
+		tables = get_tables()
+		for index, key in enumerate(DEAD, start=2):
+			reason = DEAD[key]
+			if "covered" in reason or "legal placement" in reason:
+				self.assertTrue(report.dead[index], reason)
+			if "legal placement" in reason:
+				color = reason.split()[0]
+				self.assertTrue(report.stuck_pieces[index, tables.colors.index(color)])
+
+	def test_binary_corpus_matches_keys(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp, "corpus.bin")
+			generate_corpus(40, path, workers=1, seed=3, fmt="binary", chunk=20)
+			occupied, available = self.evaluator.from_binary_corpus(path)
+			expected = self.evaluator.from_keys(list(read_corpus(path)))
+		self.assertTrue((occupied == expected[0]).all())
+		self.assertTrue((available == expected[1]).all())
+
+	def test_triage_writes_alive_layouts(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			source = os.path.join(tmp, "mixed.jsonl")
+			alive_keys = [partial_board(["green"]).canonical_key(), empty_board().canonical_key()]
+			with open(source, "w") as handle:
+				for key in alive_keys + list(DEAD):
+					handle.write(f'{{"board": "{key}"}}\n')
+			alive = os.path.join(tmp, "alive.jsonl")
+			stats = triage_corpus(source, alive)
+			self.assertEqual(stats["boards"], len(alive_keys) + len(DEAD))
+			kept = list(read_corpus(alive))
+		self.assertEqual(kept[:2], alive_keys)
+		self.assertEqual(len(kept), stats["boards"] - stats["dead"])
+
+
+if __name__ == "__main__":
+	unittest.main()
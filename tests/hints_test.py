@@ -0,0 +1,85 @@
+import unittest
+
+from solver.hints import HintEngine
+from tests.boards import SOLVED_STEPS, empty_board, partial_board
+
+
+def play(board, step):
+	color, placement = step
+	assert board.place_piece(color, *placement)
+	board.available.remove(color)
+
+
+class TestHintEngine(unittest.TestCase):
+	def setUp(self):
+		self.engine = HintEngine()
+
+	def tearDown(self):
+		self.engine.shutdown()
+
+	def test_hint_extends_current_board(self):
+		board = partial_board(["light_blue", "burgundy", "green"])
+		self.engine.update(board)
+		step = self.engine.hint(timeout=30)
+		self.assertIsNotNone(step)
+		self.assertEqual(self.engine.state, "ready")
+		color, placement = step
+		self.assertIn(color, board.available)
+		self.assertTrue(board.can_place_piece(color, *placement))
+
+	def test_following_the_hint_reuses_the_plan(self):
+		board = partial_board(["light_blue", "burgundy", "green"])
+		self.engine.update(board)
+		first = self.engine.hint(timeout=30)
+		play(board, first)
+		self.engine.update(board)
+		self.assertEqual(self.engine.state, "ready")
+		second = self.engine.hint(timeout=0)
+		self.assertIsNotNone(second)
+		self.assertNotEqual(second[0], first[0])
+
+	def test_off_plan_move_is_answered_quickly(self):
+		board = empty_board()
+		self.engine.update(board)
+		self.assertIsNotNone(self.engine.hint(timeout=30))
+		plan = dict(self.engine._plan)
+		for color, placement in SOLVED_STEPS:
+			ours, theirs = board.copy(), board.copy()
+			play(ours, (color, placement))
+			play(theirs, (color, plan[color]))
+			if ours.canonical_key() != theirs.canonical_key():
+				break
+		else:
+			self.skipTest("the plan is the fixture tiling")
+		play(board, (color, placement))
+		self.engine.update(board)
+		step = self.engine.hint(timeout=0.05)
+		self.assertIsNotNone(step)
+		color, placement = step
+		self.assertTrue(board.can_place_piece(color, *placement))
+
+	def test_take_back_is_answered_from_memory(self):
+		board = partial_board(["light_blue", "burgundy"])
+		self.engine.update(board)
+		step = self.engine.hint(timeout=30)
+		play(board, step)
+		self.engine.update(board)
+		board.undo_last_piece()
+		self.engine.update(board)
+		self.assertEqual(self.engine.hint(timeout=0), step)
+
+	def test_dead_position_reported(self):
+		board = partial_board(["light_blue"])
+		board.available = ["green"]
+		self.engine.update(board)
+		self.assertIsNone(self.engine.hint(timeout=30))
+		self.assertEqual(self.engine.state, "dead")
+
+	def test_complete_board_needs_no_search(self):
+		board = partial_board([])
+		self.engine.update(board)
+		self.assertEqual(self.engine.state, "solved")
+
+
+if __name__ == "__main__":
+	unittest.main()
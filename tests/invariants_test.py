@@ -0,0 +1,82 @@
+import time
+import unittest
+
+from game_logic.board import Board
+from solver.bt_solver import BTSolver, SolverConfig
+from solver.engines import create_engine
+from solver.invariants import get_checker
+from solver.iterative import IterativeSolver
+from tests.boards import empty_board, partial_board
+
+# Dead boards, as canonical keys, with the reason the checker gives.
+DEAD = {
+	"0000001c0203333701cc223888711c2260844771996608044009660:5ab": "no piece combination fills a 7-cell region",
+	"22000047770022c994407362ccc984aa36655008aaa306655588833:1b": "isolated gap of 1 cells",
+	"00000337771040aa397211044aa399221004ab3b22010000bbb0000:568c":
+		"an empty cell cannot be covered by any remaining piece",
+	"bb221888000b2211118000bb200008c0a0044555ccaa04455000caa:3679":
+		"regions of [3, 3, 4, 7] cells cannot be filled together",
+	"000000a0009bb0008aa099b00008aa000bb08885500000005550000:123467c": "row stripe coloring cannot be balanced",
+	"3388855000030778055504307080009443070010994000001111000:26abc": "purple has no legal placement",
+}
+NO_PLACEMENT = "3388855000030778055504307080009443070010994000001111000:26abc"
+SPLIT_REGIONS = "bb221888000b2211118000bb200008c0a0044555ccaa04455000caa:3679"
+
+
+class TestInvariantChecker(unittest.TestCase):
+	def setUp(self):
+		self.checker = get_checker()
+
+	def test_solvable_boards_pass(self):
+		self.assertIsNone(self.checker.check(empty_board()))
+		self.assertIsNone(self.checker.check(partial_board(["yellow", "green", "red"])))
+		self.assertIsNone(self.checker.check(partial_board([])))
+
+	def test_area_mismatch(self):
+		board = partial_board(["light_blue", "green"])
+		board.available = ["green"]
+		self.assertEqual(self.checker.check(board), "7 empty cells but pieces cover 4")
+
+	def test_dead_boards(self):
+		for key, reason in DEAD.items():
+			board = Board.from_canonical_key(key)
+			self.assertEqual(self.checker.check(board), reason)
+			# The iterative search does not consult the checker.
+			search = IterativeSolver(board)
+			self.assertEqual(search.run(), "exhausted", key)
+
+	def test_check_is_fast(self):
+		board = Board.from_canonical_key(NO_PLACEMENT)
+		self.checker.check(board)
+		start = time.perf_counter()
+		for _ in range(100):
+			self.checker.check(board)
+		self.assertLess((time.perf_counter() - start) / 100, 0.005)
+
+
+class TestSolverIntegration(unittest.TestCase):
+	def test_bt_solver_skips_search(self):
+		solver = BTSolver(Board.from_canonical_key(NO_PLACEMENT))
+		self.assertFalse(solver.solve())
+		self.assertEqual(solver.unsolvable_reason, "purple has no legal placement")
+		self.assertEqual(solver.nodes_visited, 0)
+
+	def test_bt_solver_can_skip_check(self):
+		solver = BTSolver(Board.from_canonical_key(NO_PLACEMENT), config=SolverConfig(invariants=False))
+		self.assertFalse(solver.solve())
+		self.assertIsNone(solver.unsolvable_reason)
+		self.assertGreater(solver.nodes_visited, 0)
+
+	def test_reason_in_engine_stats(self):
+		engine = create_engine("kernel", Board.from_canonical_key(SPLIT_REGIONS))
+		self.assertFalse(engine.solve())
+		stats = engine.stats()
+		self.assertEqual(stats.nodes, 0)
+		self.assertIn("cannot be filled together", stats.unsolvable_reason)
+		engine = create_engine("kernel", partial_board(["green"]))
+		self.assertTrue(engine.solve())
+		self.assertIsNone(engine.stats().unsolvable_reason)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from solver import BTSolver
+from solver.iterative import IterativeSolver, main
+from tests.boards import partial_board
+
+MISSING = ["yellow", "green", "red", "pink"]
+# Large enough that forced-move propagation still leaves a tree to pause in.
+MISSING_DEEP = ["turquoise", "red", "pink", "orange", "purple", "lime"]
+
+
+def all_solutions(solver, max_nodes=None):
+	found = []
+	while solver.run(max_nodes=max_nodes, on_solution=found.append) != "exhausted":
+		pass
+	return found
+
+
+class TestIterativeSolver(unittest.TestCase):
+	def test_matches_recursive_solver(self):
+		recursive = BTSolver(partial_board(MISSING))
+		iterative = IterativeSolver(partial_board(MISSING))
+		self.assertTrue(recursive.solve())
+		self.assertTrue(iterative.solve())
+		self.assertEqual(iterative.solution_steps, recursive.solution_steps)
+		self.assertEqual(iterative.nodes_visited, recursive.nodes_visited)
+		self.assertEqual(iterative.placements_tested, recursive.placements_tested)
+
+	def test_stepping_does_not_change_the_search(self):
+		expected = all_solutions(IterativeSolver(partial_board(MISSING)))
+		self.assertEqual(all_solutions(IterativeSolver(partial_board(MISSING)), max_nodes=1), expected)
+		self.assertGreater(len(expected), 0)
+
+	def test_checkpoint_resumes_exactly(self):
+		expected = all_solutions(IterativeSolver(partial_board(MISSING_DEEP)))
+		solver = IterativeSolver(partial_board(MISSING_DEEP))
+		found = []
+		self.assertEqual(solver.run(max_nodes=3, on_solution=found.append), "paused")
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp, "search.ckpt")
+			solver.save_checkpoint(path)
+			resumed = IterativeSolver.load_checkpoint(path)
+		self.assertEqual(resumed.frames(), solver.frames())
+		self.assertEqual(resumed.nodes_visited, solver.nodes_visited)
+		found.extend(all_solutions(resumed))
+		self.assertEqual(found, expected)
+		self.assertTrue(resumed.exhausted)
+
+	def test_cli_resume_does_not_duplicate_output(self):
+		key = partial_board(MISSING).canonical_key()
+		with tempfile.TemporaryDirectory() as tmp:
+			out = os.path.join(tmp, "solutions.jsonl")
+			ckpt = os.path.join(tmp, "search.ckpt")
+			self.assertEqual(main([key, "--output", out, "--checkpoint", ckpt]), 0)
+			with open(out) as handle:
+				expected = handle.read()
+			# Simulate a crash after a partial write: resume must truncate and finish.
+			self.assertEqual(main([key, "--output", out, "--checkpoint", ckpt, "--every", "2"]), 0)
+			with open(out, "a") as handle:
+				handle.write("garbage\n")
+			self.assertEqual(main(["--output", out, "--checkpoint", ckpt, "--resume"]), 0)
+			with open(out) as handle:
+				self.assertEqual(handle.read(), expected)
+
+
+if __name__ == "__main__":
+	unittest.main()
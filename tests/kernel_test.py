@@ -0,0 +1,60 @@
+import tracemalloc
+import unittest
+
+from solver.iterative import IterativeSolver
+from solver.kernel import KernelSolver, SearchKernel
+from tests.boards import empty_board, partial_board
+
+MISSING = ["turquoise", "red", "pink", "orange", "purple", "lime"]
+
+
+def peak_growth(kernel, nodes):
+	"""Peak traced memory, beyond the starting point, of ``nodes`` kernel nodes."""
+	tracemalloc.start()
+	try:
+		baseline = tracemalloc.get_traced_memory()[0]
+		tracemalloc.reset_peak()
+		kernel.run(max_nodes=nodes, max_solutions=1 << 30)
+		return tracemalloc.get_traced_memory()[1] - baseline
+	finally:
+		tracemalloc.stop()
+
+
+class TestSearchKernel(unittest.TestCase):
+	def test_counts_match_iterative_enumeration(self):
+		for missing in (["green"], ["yellow", "green", "red", "pink"], MISSING):
+			iterative = IterativeSolver(partial_board(missing))
+			found = []
+			iterative.run(on_solution=found.append)
+			self.assertEqual(KernelSolver(partial_board(missing)).count(), len(found), missing)
+
+	def test_solves_empty_board(self):
+		board = empty_board()
+		solver = KernelSolver(board)
+		self.assertTrue(solver.solve())
+		self.assertEqual(len(solver.solution_steps), 12)
+		for color, placement in solver.solution_steps:
+			self.assertTrue(board.place_piece(color, *placement))
+			board.available.remove(color)
+		self.assertNotIn(0, board.cells)
+
+	def test_full_board_counts_once(self):
+		self.assertEqual(KernelSolver(partial_board([])).count(), 1)
+
+	def test_node_limit_pauses(self):
+		solver = KernelSolver(empty_board(), node_limit=10)
+		self.assertFalse(solver.solve())
+		self.assertTrue(solver.limit_reached)
+
+	def test_search_allocates_nothing_per_node(self):
+		kernel = SearchKernel()
+		kernel.load(empty_board())
+		kernel.run(max_nodes=100)
+		short = peak_growth(kernel, 1_000)
+		long = peak_growth(kernel, 20_000)
+		self.assertLess(short, 2048)
+		self.assertLess(long, 2048)
+
+
+if __name__ == "__main__":
+	unittest.main()
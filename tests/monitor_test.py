@@ -0,0 +1,88 @@
+import threading
+import time
+import unittest
+
+from game_logic.board import Board
+from solver.monitor import SolvabilityMonitor, quick_dead_reason
+from tests.boards import empty_board, partial_board
+
+# Passes every quick check; only a search shows that no tiling completes it.
+SEARCH_DEAD = "0005000000000050000000000550000000777500000007000000000:1234689abc"
+# Takes the kernel over 200k nodes to settle.
+SLOW_SEARCH = "0000000000000000000500000000095500000000995000000000050:1234678abc"
+
+
+class TestQuickChecks(unittest.TestCase):
+	def test_open_boards_pass(self):
+		self.assertIsNone(quick_dead_reason(empty_board()))
+		self.assertIsNone(quick_dead_reason(partial_board(["yellow", "green", "red"])))
+
+	def test_isolated_gap_detected(self):
+		board = empty_board()
+		# Wall off the top-left corner cell.
+		self.assertTrue(board.place_piece("light_blue", 0, 1, rotation=0))
+		board.available.remove("light_blue")
+		self.assertTrue(board.place_piece("green", 1, 0, rotation=0))
+		board.available.remove("green")
+		self.assertIn("gap", quick_dead_reason(board))
+
+	def test_region_capacity_detected(self):
+		board = partial_board(["light_blue"])
+		board.available = ["green"]
+		self.assertIn("empty cells", quick_dead_reason(board))
+
+
+class TestSolvabilityMonitor(unittest.TestCase):
+	def watch(self, monitor, board):
+		done = threading.Event()
+		result = {}
+
+		def on_result(status, reason):
+			result["status"] = status
+			done.set()
+
+		quick = monitor.watch(board, on_result)
+		if quick is None:
+			self.assertTrue(done.wait(30))
+		return quick, result.get("status")
+
+	def test_solvable_board_reported_alive(self):
+		monitor = SolvabilityMonitor()
+		quick, status = self.watch(monitor, partial_board(["light_blue", "burgundy"]))
+		self.assertIsNone(quick)
+		self.assertEqual(status, "alive")
+
+	def test_search_proves_dead_position_quickly(self):
+		board = Board.from_canonical_key(SEARCH_DEAD)
+		self.assertIsNone(quick_dead_reason(board))
+		start = time.perf_counter()
+		quick, status = self.watch(SolvabilityMonitor(), board)
+		self.assertIsNone(quick)
+		self.assertEqual(status, "dead")
+		self.assertLess(time.perf_counter() - start, 0.1)
+
+	def test_superseded_check_is_dropped(self):
+		monitor = SolvabilityMonitor(node_limit=10_000_000)
+		calls = []
+		monitor.watch(Board.from_canonical_key(SLOW_SEARCH), lambda status, reason: calls.append(status))
+		quick, status = self.watch(monitor, partial_board(["light_blue"]))
+		self.assertEqual(status, "alive")
+		self.assertEqual(calls, [])
+
+	def test_generation_marks_stale_results(self):
+		monitor = SolvabilityMonitor()
+		_quick, status = self.watch(monitor, partial_board(["light_blue", "burgundy"]))
+		generation = monitor.generation
+		self.assertTrue(monitor.is_current(generation))
+		monitor.watch(partial_board(["light_blue"]), lambda status, reason: None)
+		self.assertFalse(monitor.is_current(generation))
+		self.assertTrue(monitor.is_current(monitor.generation))
+
+	def test_node_limit_yields_unknown(self):
+		monitor = SolvabilityMonitor(node_limit=1)
+		_quick, status = self.watch(monitor, partial_board(["yellow", "green", "red", "pink"]))
+		self.assertEqual(status, "unknown")
+
+
+if __name__ == "__main__":
+	unittest.main()
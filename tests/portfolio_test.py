@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+
+from solver import BTSolver
+from solver.bt_solver import SolverConfig
+from solver.engines import create_engine, default_portfolio_log_path
+from solver.portfolio import PortfolioSolver, rank_configs
+from tests.boards import empty_board, partial_board
+
+CONFIGS = [
+	SolverConfig(name="a"),
+	SolverConfig(name="b", variable_order="small", value_seed=7),
+]
+
+
+class TestSolverConfig(unittest.TestCase):
+	def test_shuffled_value_order_is_reproducible_and_valid(self):
+		config = SolverConfig(name="s", value_seed=5)
+		first = BTSolver(partial_board(["yellow", "green", "red"]), config=config)
+		second = BTSolver(partial_board(["yellow", "green", "red"]), config=config)
+		self.assertTrue(first.solve())
+		self.assertTrue(second.solve())
+		self.assertEqual(first.solution_steps, second.solution_steps)
+		board = partial_board(["yellow", "green", "red"])
+		for color, placement in first.solution_steps:
+			self.assertTrue(board.place_piece(color, *placement))
+
+
+class TestPortfolio(unittest.TestCase):
+	def test_race_returns_a_solution_and_logs_winner(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			log = os.path.join(tmp, "race.jsonl")
+			portfolio = PortfolioSolver(partial_board(["yellow", "green", "red"]), configs=CONFIGS, processes=2, log_path=log)
+			self.assertTrue(portfolio.solve(timeout=60))
+			self.assertIn(portfolio.winner, {"a", "b"})
+			board = partial_board(["yellow", "green", "red"])
+			for color, placement in portfolio.solution_steps:
+				self.assertTrue(board.place_piece(color, *placement))
+			with open(log) as handle:
+				record = json.loads(handle.readline())
+			self.assertEqual(record["winner"], portfolio.winner)
+
+	def test_unsolvable_board_is_final_on_first_result(self):
+		board = partial_board(["light_blue"])
+		board.available = ["green"]
+		portfolio = PortfolioSolver(board, configs=CONFIGS, processes=2)
+		self.assertFalse(portfolio.solve(timeout=60))
+		self.assertIsNotNone(portfolio.winner)
+
+	def test_node_limit_is_not_a_verdict(self):
+		portfolio = PortfolioSolver(empty_board(), configs=CONFIGS, processes=2, node_limit=1)
+		self.assertFalse(portfolio.solve(timeout=60))
+		self.assertTrue(portfolio.limit_reached)
+		self.assertIsNone(portfolio.winner)
+
+	def test_engine_logs_races_by_default(self):
+		log = default_portfolio_log_path()
+		if os.path.exists(log):
+			os.remove(log)
+		engine = create_engine("portfolio", partial_board(["yellow", "green", "red"]), node_limit=100_000)
+		self.assertTrue(engine.solve())
+		with open(log) as handle:
+			self.assertEqual(json.loads(handle.readline())["solved"], True)
+		engine = create_engine("portfolio", empty_board(), node_limit=1)
+		self.assertFalse(engine.solve())
+		self.assertTrue(engine.stats().limit_reached)
+
+	def test_log_drives_config_order(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			log = os.path.join(tmp, "race.jsonl")
+			with open(log, "w") as handle:
+				for winner in ("b", "b", "a"):
+					handle.write(json.dumps({"winner": winner}) + "\n")
+			self.assertEqual([c.name for c in rank_configs(CONFIGS, log)], ["b", "a"])
+			self.assertEqual([c.name for c in rank_configs(CONFIGS, None)], ["a", "b"])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from solver.bt_solver import BTSolver, SolverConfig
+from solver.profiling import ProfileRun, SamplingProfiler, profile_solve
+from tests.boards import partial_board
+
+MISSING = ["yellow", "green", "red", "pink", "blue", "lime", "orange"]
+
+
+def busy_bystander(stop):
+	"""Spin in another thread; a thread-scoped profile must not see it."""
+	while not stop.is_set():
+		sum(range(1000))
+
+
+def solve_for(seconds):
+	"""Repeat a full solve until ``seconds`` pass, so sampling gets enough stacks."""
+	deadline = time.perf_counter() + seconds
+	while time.perf_counter() < deadline:
+		BTSolver(partial_board(MISSING), config=SolverConfig(propagate=False)).solve()
+
+
+class TestSamplingProfile(unittest.TestCase):
+	def test_only_the_profiled_thread_is_sampled(self):
+		stop = threading.Event()
+		bystander = threading.Thread(target=busy_bystander, args=(stop,))
+		bystander.start()
+		try:
+			with tempfile.TemporaryDirectory() as tmp:
+				with ProfileRun(tmp, label="unit", interval=0.0005) as run:
+					solve_for(0.3)
+				with open(run.paths["collapsed"]) as handle:
+					collapsed = handle.read()
+				self.assertTrue(os.path.exists(run.paths["top"]))
+		finally:
+			stop.set()
+			bystander.join()
+		self.assertGreater(run.sampler.samples, 0)
+		self.assertIn("solver.bt_solver:", collapsed)
+		self.assertNotIn("busy_bystander", collapsed)
+		# Stacks start at the profiled block, not in the test runner.
+		self.assertTrue(all(line.startswith("tests.profiling_test:") for line in collapsed.splitlines()))
+		self.assertIn("self%", run.table)
+
+	def test_collapsed_and_top_counts(self):
+		sampler = SamplingProfiler()
+		sampler.stacks.update({("a", "b"): 3, ("a", "c"): 1})
+		sampler.samples = 4
+		self.assertEqual(sampler.collapsed(), "a;b 3\na;c 1\n")
+		self.assertEqual(sampler.top(), [("b", 3, 3), ("c", 1, 1), ("a", 0, 4)])
+
+
+class TestCProfile(unittest.TestCase):
+	def test_profile_solve_writes_stats(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			solved, stats, run = profile_solve(partial_board(MISSING), engine="backtracking", mode="cprofile",
+				out_dir=tmp)
+			self.assertTrue(os.path.getsize(run.paths["prof"]) > 0)
+		self.assertTrue(solved)
+		self.assertEqual(stats.engine, "backtracking")
+		self.assertIn("_domain_for", run.table)
+
+	def test_unknown_mode(self):
+		with self.assertRaises(ValueError):
+			ProfileRun(".", mode="perf")
+
+
+if __name__ == "__main__":
+	unittest.main()
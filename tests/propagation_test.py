@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from solver.bt_solver import BTSolver, SolverConfig
+from solver.engines import create_engine
+from solver.iterative import IterativeSolver
+from solver.trace import TraceReader, TraceReplay, TraceWriter
+from tests.boards import partial_board
+
+MISSING = ["yellow", "green", "red", "pink", "blue", "lime", "orange"]
+NO_PROPAGATION = SolverConfig(propagate=False)
+
+
+def enumerate_all(solver):
+	found = []
+	solver.run(on_solution=found.append)
+	return found
+
+
+class TestForcedMoves(unittest.TestCase):
+	def test_forced_placement_is_applied_and_unwound(self):
+		board = partial_board(["green"])
+		before = bytes(board.cells)
+		solver = BTSolver(board)
+		path = []
+		self.assertEqual(solver._propagate(path), {})
+		self.assertEqual([color for color, _ in path], ["green"])
+		self.assertEqual(solver.forced_moves, 1)
+		self.assertNotIn(0, board.cells)
+		solver._unwind(path, 0)
+		self.assertEqual(bytes(board.cells), before)
+		self.assertIn("green", board.available)
+		self.assertEqual(solver.assignment, {})
+
+	def test_same_solutions_with_fewer_nodes(self):
+		plain = IterativeSolver(partial_board(MISSING), config=NO_PROPAGATION)
+		propagated = IterativeSolver(partial_board(MISSING))
+		expected = enumerate_all(plain)
+		found = enumerate_all(propagated)
+		self.assertEqual(sorted(map(sorted, found)), sorted(map(sorted, expected)))
+		self.assertLess(propagated.nodes_visited, plain.nodes_visited)
+		self.assertGreater(propagated.forced_moves, 0)
+
+	def test_recursive_and_iterative_search_agree(self):
+		recursive = BTSolver(partial_board(MISSING))
+		iterative = IterativeSolver(partial_board(MISSING))
+		self.assertTrue(recursive.solve())
+		self.assertTrue(iterative.solve())
+		self.assertEqual(iterative.solution_steps, recursive.solution_steps)
+		self.assertEqual(iterative.forced_moves, recursive.forced_moves)
+		self.assertEqual(iterative.nodes_visited, recursive.nodes_visited)
+
+	def test_forced_moves_in_stats_and_trace(self):
+		engine = create_engine("backtracking", partial_board(MISSING))
+		self.assertTrue(engine.solve())
+		self.assertGreater(engine.stats().forced, 0)
+		board = partial_board(MISSING)
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp, "search.iqtrace")
+			with TraceWriter(path, board) as writer:
+				solver = BTSolver(board, trace=writer)
+				self.assertTrue(solver.solve())
+			reader = TraceReader(path)
+			try:
+				final = TraceReplay(reader).seek(len(reader))
+			finally:
+				reader.close()
+		self.assertNotIn(0, final.cells)
+		self.assertEqual(final.available, [])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,37 @@
+import random
+import unittest
+
+from batch.puzzles import count_solutions, rate_puzzle, uniquify
+from tests.boards import SOLVED_STEPS, partial_board
+
+MISSING = ["turquoise", "red", "pink", "orange", "purple", "lime"]
+
+
+class TestPuzzleGeneration(unittest.TestCase):
+	def test_counter_stops_at_limit(self):
+		board = partial_board(MISSING)
+		total = count_solutions(board, limit=1000)
+		self.assertGreater(total, 1)
+		self.assertEqual(count_solutions(board, limit=2), 2)
+		self.assertEqual(count_solutions(partial_board([]), limit=2), 1)
+
+	def test_uniquify_yields_single_solution(self):
+		board = partial_board(MISSING)
+		solution = [step for step in SOLVED_STEPS if step[0] in MISSING]
+		puzzle = uniquify(board, solution, random.Random(3))
+		self.assertEqual(count_solutions(puzzle, limit=2), 1)
+		self.assertLess(len(puzzle.available), len(MISSING))
+
+	def test_rating_reports_search_statistics(self):
+		board = partial_board(MISSING)
+		puzzle = uniquify(board, [s for s in SOLVED_STEPS if s[0] in MISSING], random.Random(3))
+		rating = rate_puzzle(puzzle)
+		self.assertEqual(rating.solutions, 1)
+		self.assertGreaterEqual(rating.nodes, rating.nodes_to_first)
+		self.assertIn(rating.tier, {"easy", "medium", "hard", "expert"})
+		harder = rate_puzzle(board)
+		self.assertGreater(harder.nodes, rating.nodes)
+
+
+if __name__ == "__main__":
+	unittest.main()
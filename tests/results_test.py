@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+
+from batch.results import ResultStore, ResultWriter, SolveResult, np, pack_step, unpack_step
+from batch.runner import cost_chunks, plan_by_cost, solve_corpus, solve_key
+from solver.estimate import TreeEstimate
+from tests.boards import SOLVED_STEPS, partial_board
+from tests.invariants_test import DEAD
+
+MISSING = [["green"], ["yellow", "green"], ["red", "pink"], ["yellow", "green", "red"], ["lime", "blue", "pink"]]
+
+
+def result(missing, nodes, status="solved", engine="kernel"):
+	key = partial_board(missing).canonical_key()
+	solution = tuple(step for step in SOLVED_STEPS if step[0] in missing) if status == "solved" else ()
+	return SolveResult(key, status, engine, nodes=nodes, placements=2 * nodes, forced=1, seconds=0.5,
+		solution=solution)
+
+
+class TestStepPacking(unittest.TestCase):
+	def test_round_trip(self):
+		for color, placement in SOLVED_STEPS:
+			value = pack_step(color, placement)
+			self.assertLess(value, 1 << 15)
+			self.assertEqual(unpack_step(value), (color, placement))
+
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class TestResultStore(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.path = os.path.join(self.tmp.name, "results")
+
+	def write(self, results):
+		with ResultWriter(self.path, flush_every=2) as writer:
+			for item in results:
+				writer.append(item)
+		return writer
+
+	def test_rows_read_back_from_many_segments(self):
+		first = [result(missing, nodes) for nodes, missing in enumerate(MISSING[:3], start=1)]
+		second = [result(MISSING[3], 40, status="limit", engine="iterative")]
+		self.write(first)
+		self.write(second)
+		store = ResultStore(self.path)
+		self.assertEqual(len(store.segments), 2)
+		self.assertEqual(list(store), first + second)
+		self.assertEqual(store.column("nodes").tolist(), [1, 2, 3, 40])
+		self.assertEqual(store.column("pieces").tolist(), [1, 2, 2, 3])
+
+	def test_lookup_through_index_and_unindexed_tail(self):
+		self.write([result(missing, nodes) for nodes, missing in enumerate(MISSING, start=1)])
+		store = ResultStore(self.path)
+		self.assertEqual(store.build_index(), len(MISSING))
+		self.assertEqual(store.lookup(partial_board(MISSING[2]).canonical_key()).nodes, 3)
+		self.assertIsNone(store.lookup(next(iter(DEAD))))
+		# Re-solving a board after indexing: the newer, unindexed row wins.
+		self.write([result(MISSING[2], 99, status="exhausted")])
+		self.assertEqual(store.lookup(partial_board(MISSING[2]).canonical_key()).nodes, 99)
+		store.build_index()
+		self.assertEqual(store.lookup(partial_board(MISSING[2]).canonical_key()).status, "exhausted")
+
+	def test_torn_append_is_ignored(self):
+		writer = self.write([result(MISSING[0], 1), result(MISSING[1], 2)])
+		with open(os.path.join(writer.segment, "nodes.col"), "ab") as handle:
+			handle.write(b"\x07" * 8)
+		self.assertEqual(len(ResultStore(self.path)), 2)
+
+	def test_aggregates(self):
+		nodes = {1: [5, 7], 2: [1, 2, 30], 3: [4]}
+		self.write([result(MISSING[0], value) for value in nodes[1]]
+			+ [result(MISSING[1], value) for value in nodes[2]]
+			+ [result(MISSING[3], value, status="limit") for value in nodes[3]])
+		store = ResultStore(self.path)
+		summary = store.aggregate("nodes", by="pieces", percentiles=(50, 99))
+		self.assertEqual(set(summary), {1, 2, 3})
+		self.assertEqual(summary[2]["count"], 3)
+		self.assertEqual(summary[2]["p50"], 2.0)
+		self.assertAlmostEqual(summary[2]["p99"], float(np.percentile(nodes[2], 99)))
+		self.assertEqual(store.aggregate("nodes", by="status")["limit"]["max"], 4.0)
+		self.assertEqual(store.percentile("nodes", 50, pieces=1), 6.0)
+		self.assertEqual(store.aggregate("nodes", by=None, status="solved")["all"]["count"], 5)
+
+
+class TestCostPlan(unittest.TestCase):
+	def test_expensive_boards_first_in_balanced_chunks(self):
+		nodes = {"a": 1.0, "b": 300.0, "c": 40.0, "d": 0.0, "e": 60.0}
+		estimates = [(key, TreeEstimate(count, count, count, count, 0.0, 2, 0.01, 0.0)) for key, count in nodes.items()]
+		planned = plan_by_cost(estimates, "kernel", routes=((50, "backtracking"), (2, "iterative")))
+		self.assertEqual([key for key, _, _ in planned], ["b", "e", "c", "a", "d"])
+		self.assertEqual([engine for _, engine, _ in planned],
+			["kernel", "kernel", "backtracking", "iterative", "iterative"])
+		chunks = list(cost_chunks(planned, shards=3, limit=2))
+		self.assertEqual(chunks[0], [("b", "kernel")])
+		self.assertEqual(sum(len(chunk) for chunk in chunks), len(nodes))
+		self.assertTrue(all(len(chunk) <= 2 for chunk in chunks))
+
+
+@unittest.skipUnless(np is not None, "numpy not installed")
+class TestSolveCorpus(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.keys = [partial_board(missing).canonical_key() for missing in MISSING] + list(DEAD)[:2]
+		self.corpus = os.path.join(self.tmp.name, "corpus.jsonl")
+		with open(self.corpus, "w") as handle:
+			for key in self.keys:
+				handle.write(f'{{"board": "{key}"}}\n')
+		self.store_path = os.path.join(self.tmp.name, "results")
+
+	def test_workers_fill_store(self):
+		stats = solve_corpus(self.corpus, self.store_path, engine="kernel", workers=2, chunk=2)
+		store = ResultStore(self.store_path)
+		self.assertEqual(stats["boards"], len(self.keys))
+		self.assertEqual(stats["solved"], len(MISSING))
+		self.assertEqual(stats["unsolvable"], 2)
+		self.assertEqual(len(store), len(self.keys))
+		for key in self.keys:
+			stored = store.lookup(key)
+			self.assertEqual(stored.engine, "kernel")
+			self.assertEqual(stored.status, "solved" if key not in DEAD else "unsolvable")
+			self.assertEqual(stored.solution, solve_key(key, "kernel").solution)
+		self.assertEqual(len(store.lookup(self.keys[0]).solution), len(MISSING[0]))
+
+	def test_cost_schedule_routes_engines(self):
+		# Dead boards are predicted to cost nothing, so only they take the route.
+		stats = solve_corpus(self.corpus, self.store_path, engine="kernel", workers=2, chunk=4, schedule="cost",
+			routes=((0, "backtracking"),), estimate_budget=0.001)
+		self.assertEqual((stats["solved"], stats["unsolvable"]), (len(MISSING), 2))
+		self.assertIn("predicted_seconds", stats)
+		store = ResultStore(self.store_path)
+		for key in self.keys:
+			self.assertEqual(store.lookup(key).engine, "backtracking" if key in DEAD else "kernel")
+
+
+if __name__ == "__main__":
+	unittest.main()
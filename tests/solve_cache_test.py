@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from solver import BTSolver, SolveCache
+from tests.boards import SOLVED_STEPS, empty_board, partial_board
+
+
+class TestSolveCache(unittest.TestCase):
+	def test_round_trip_solved_and_unsolvable(self):
+		cache = SolveCache()
+		cache.put("a", True, SOLVED_STEPS[:2])
+		cache.put("b", False, [])
+		self.assertEqual(cache.get("a"), (True, SOLVED_STEPS[:2]))
+		self.assertEqual(cache.get("b"), (False, []))
+		self.assertIsNone(cache.get("missing"))
+
+	def test_lru_eviction_keeps_recently_used(self):
+		cache = SolveCache(max_entries=2)
+		cache.put("a", False, [])
+		cache.put("b", False, [])
+		cache.get("a")
+		cache.put("c", False, [])
+		self.assertIn("a", cache)
+		self.assertNotIn("b", cache)
+		self.assertIn("c", cache)
+		self.assertEqual(len(cache), 2)
+
+	def test_piece_set_change_invalidates_file(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp, "cache.sqlite3")
+			cache = SolveCache(path)
+			cache.put("a", False, [])
+			cache.close()
+			with mock.patch("solver.cache.piece_set_version", return_value="other"):
+				reopened = SolveCache(path)
+			self.assertIsNone(reopened.get("a"))
+			reopened.close()
+
+	def test_canonical_key_ignores_available_order(self):
+		board = partial_board(["yellow", "green"])
+		key = board.canonical_key()
+		board.available.reverse()
+		self.assertEqual(board.canonical_key(), key)
+		self.assertNotEqual(empty_board().canonical_key(), key)
+
+
+class TestSolverUsesCache(unittest.TestCase):
+	def test_second_solve_is_served_from_cache(self):
+		cache = SolveCache()
+		board = partial_board(["light_blue", "burgundy"])
+		solver = BTSolver(board, cache=cache)
+		self.assertTrue(solver.solve())
+		self.assertFalse(solver.from_cache)
+		steps = list(solver.solution_steps)
+		self.assertTrue(solver.solve())
+		self.assertTrue(solver.from_cache)
+		self.assertEqual(solver.nodes_visited, 0)
+		self.assertEqual(solver.solution_steps, steps)
+
+	def test_cached_unsolvable_short_circuits(self):
+		cache = SolveCache()
+		board = empty_board()
+		cache.put(board.canonical_key(), False, [])
+		solver = BTSolver(board, cache=cache)
+		self.assertFalse(solver.solve())
+		self.assertTrue(solver.from_cache)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from game_logic import PIECE_DIMENSIONS
+from solver.tables import KEEP_TABLE_FILES, PlacementTables, load_tables, tables_fingerprint
+
+
+class TestPlacementTableCache(unittest.TestCase):
+	@classmethod
+	def setUpClass(cls):
+		cls.built = PlacementTables()
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		self.path = os.path.join(self.tmp.name, f"placement_tables-{tables_fingerprint()}.bin")
+
+	def assertSameTables(self, tables):
+		for name in PlacementTables.__slots__:
+			self.assertEqual(getattr(tables, name), getattr(self.built, name), name)
+
+	def test_round_trip(self):
+		self.built.save(self.path)
+		self.assertSameTables(PlacementTables.load(self.path))
+
+	def test_size_sums(self):
+		tables = self.built
+		subset = 0b101000000011  # the first two pieces, the tenth and the last
+		sizes = [tables.sizes[index] for index in range(len(tables.colors)) if subset >> index & 1]
+		expected = {sum(size for bit, size in enumerate(sizes) if pick >> bit & 1) for pick in range(1 << len(sizes))}
+		found = {total for total in range(64) if tables.size_sums[subset] >> total & 1}
+		self.assertEqual(found, expected)
+
+	def test_missing_or_damaged_file_is_rebuilt(self):
+		self.assertSameTables(load_tables(self.path))
+		self.assertTrue(os.path.exists(self.path))
+		with open(self.path, "r+b") as handle:
+			handle.truncate(os.path.getsize(self.path) // 2)
+		with self.assertRaises(ValueError):
+			PlacementTables.load(self.path)
+		self.assertSameTables(load_tables(self.path))
+		self.assertSameTables(PlacementTables.load(self.path))
+
+	def test_piece_set_change_selects_new_file(self):
+		self.built.save(self.path)
+		stale = tables_fingerprint()
+		with mock.patch.dict(PIECE_DIMENSIONS, {"light_blue": ((0, 0), (1, 0), (1, 1), (2, 1))}):
+			self.assertNotEqual(tables_fingerprint(), stale)
+			with self.assertRaises(ValueError):
+				PlacementTables.load(self.path)
+			fresh = os.path.join(self.tmp.name, f"placement_tables-{tables_fingerprint()}.bin")
+			rebuilt = load_tables(fresh)
+			self.assertEqual(rebuilt.sizes[rebuilt.colors.index("light_blue")], 4)
+		# Another checkout may still use the old piece set: its file is kept.
+		self.assertEqual(sorted(os.listdir(self.tmp.name)), sorted([os.path.basename(self.path), os.path.basename(fresh)]))
+
+	def test_rebuild_keeps_recent_table_files_only(self):
+		stale = []
+		for number in range(KEEP_TABLE_FILES + 2):
+			path = os.path.join(self.tmp.name, f"placement_tables-{number:016x}.bin")
+			self.built.save(path)
+			os.utime(path, (1000 + number, 1000 + number))
+			stale.append(path)
+		foreign = os.path.join(self.tmp.name, "placement_tables-notours.bin")
+		with open(foreign, "wb") as handle:
+			handle.write(b"something else")
+		os.utime(foreign, (1, 1))
+		load_tables(self.path)
+		kept = set(os.listdir(self.tmp.name))
+		expected = {os.path.basename(path) for path in [self.path] + stale[-(KEEP_TABLE_FILES - 1):]}
+		self.assertEqual(kept, expected | {os.path.basename(foreign)})
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from solver import BTSolver
+from solver.trace import BACKTRACK, COMMIT, SOLUTION, TRY, TraceReader, TraceReplay, TraceWriter
+from tests.boards import partial_board
+
+MISSING = ["yellow", "green", "red", "pink", "lime", "orange"]
+
+
+class TestSolveTrace(unittest.TestCase):
+	def setUp(self):
+		tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(tmp.cleanup)
+		self.path = os.path.join(tmp.name, "solve.iqtrace")
+		self.board = partial_board(MISSING)
+		with TraceWriter(self.path, self.board, buffer_events=4) as writer:
+			self.solver = BTSolver(self.board, trace=writer)
+			self.assertTrue(self.solver.solve())
+		self.reader = TraceReader(self.path)
+		self.addCleanup(self.reader.close)
+
+	def test_records_every_event(self):
+		counts = self.reader.counts()
+		self.assertEqual(counts["try"], self.solver.placements_tested)
+		self.assertEqual(counts["try"], counts["prune"] + counts["commit"])
+		self.assertEqual(counts["commit"] - counts["backtrack"], len(MISSING))
+		self.assertEqual(counts["solution"], 1)
+		self.assertEqual(self.reader[0].kind, TRY)
+		self.assertEqual(self.reader[-1].kind, SOLUTION)
+		path = []
+		for event in self.reader:
+			if event.kind == COMMIT:
+				path.append((event.piece, event.placement))
+			elif event.kind == BACKTRACK:
+				self.assertEqual(path.pop(), (event.piece, event.placement))
+		self.assertEqual(path, self.solver.solution_steps)
+
+	def test_replay_reaches_solution_and_scrubs_back(self):
+		replay = TraceReplay(self.reader, checkpoint_every=4)
+		self.assertEqual(replay.board.cells, self.board.cells)
+		final = replay.seek(len(self.reader))
+		self.assertNotIn(0, final.cells)
+		self.assertEqual(final.available, [])
+		middle = len(self.reader) // 2
+		expected = bytes(TraceReplay(self.reader).seek(middle).cells)
+		self.assertEqual(bytes(replay.seek(middle).cells), expected)
+		replay.seek(1)
+		self.assertEqual(bytes(replay.seek(middle).cells), expected)
+		self.assertEqual(bytes(replay.seek(0).cells), bytes(self.board.cells))
+
+	def test_headless_replay(self):
+		result = subprocess.run(
+			[sys.executable, "-m", "solver.trace", "replay", self.path, "--every", "1000"],
+			capture_output=True, text=True, check=True,
+		)
+		self.assertIn("solution", result.stdout)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+from game_logic import NB_COLS, NB_ROWS
+from solver.bt_solver import BTSolver, SolverConfig
+from solver.tables import cell_bit, get_tables
+from solver.value_order import VALUE_ORDERS, OrderState, ValueOrderer, open_sides, placements_removed
+from tests.boards import empty_board, partial_board
+
+MISSING = ["yellow", "green", "red", "pink", "blue"]
+
+
+def order_state(orderer, board):
+	tables = get_tables()
+	left = sum(1 << tables.colors.index(color) for color in board.available if color != "empty")
+	return OrderState(orderer._index, tables.occupancy(board), left)
+
+
+class TestValueOrders(unittest.TestCase):
+	def test_every_order_permutes_the_domain_and_solves(self):
+		for name in VALUE_ORDERS:
+			board = partial_board(MISSING)
+			solver = BTSolver(board, config=SolverConfig(value_order=name))
+			domain = solver._domain_for("yellow")
+			self.assertCountEqual(solver._value_order("yellow"), domain)
+			self.assertTrue(solver.solve(), name)
+			for color, placement in solver.solution_steps:
+				self.assertTrue(board.place_piece(color, *placement))
+
+	def test_walls_prefers_corners(self):
+		board = empty_board()
+		tables = get_tables()
+		corners = sum(1 << cell_bit(row, col) for row in (0, NB_ROWS - 1) for col in (0, NB_COLS - 1))
+		border = sum(1 << cell_bit(row, col) for row in range(NB_ROWS) for col in range(NB_COLS)
+			if row in (0, NB_ROWS - 1) or col in (0, NB_COLS - 1))
+		orderer = ValueOrderer("walls")
+		piece = tables.colors.index("yellow")
+		ordered = orderer.order(board, "yellow", BTSolver(board)._domain_for("yellow"))
+		first, last = (tables.masks[orderer._index.pid_of[piece, placement]] for placement in (ordered[0], ordered[-1]))
+		self.assertTrue(first & corners)
+		self.assertFalse(last & border)
+
+	def test_lcv_counts_overlapping_placements(self):
+		board = partial_board(MISSING)
+		orderer = ValueOrderer("lcv")
+		state = order_state(orderer, board)
+		tables = get_tables()
+		piece = tables.colors.index("yellow")
+		occ = tables.occupancy(board)
+		others = [pid for pid, owner in enumerate(tables.piece_of)
+			if owner != piece and tables.colors[owner] in board.available and not tables.masks[pid] & occ]
+		for placement in BTSolver(board)._domain_for("yellow"):
+			pid = orderer._index.pid_of[piece, placement]
+			expected = sum(1 for other in others if tables.masks[other] & tables.masks[pid])
+			self.assertEqual(placements_removed(state, piece, pid), expected)
+
+	def test_orders_are_cached_per_occupancy(self):
+		board = partial_board(MISSING)
+		orderer = ValueOrderer("combined", max_entries=1)
+		domain = BTSolver(board)._domain_for("yellow")
+		first = orderer.order(board, "yellow", domain)
+		self.assertEqual(orderer.order(board, "yellow", domain), first)
+		self.assertEqual((orderer.hits, orderer.misses), (1, 1))
+		orderer.order(board, "green", BTSolver(board)._domain_for("green"))
+		orderer.order(board, "yellow", domain)
+		self.assertEqual(orderer.misses, 3)
+
+	def test_seed_only_breaks_ties(self):
+		board = partial_board(MISSING)
+		orderer = ValueOrderer("walls")
+		state = order_state(orderer, board)
+		piece = get_tables().colors.index("yellow")
+		for seed in (None, 3):
+			ordered = BTSolver(board, config=SolverConfig(value_order="walls", value_seed=seed))._value_order("yellow")
+			scores = [open_sides(state, piece, orderer._index.pid_of[piece, placement]) for placement in ordered]
+			self.assertEqual(scores, sorted(scores))
+
+	def test_unknown_order(self):
+		with self.assertRaises(ValueError):
+			BTSolver(empty_board(), config=SolverConfig(value_order="nope"))
+
+
+if __name__ == "__main__":
+	unittest.main()